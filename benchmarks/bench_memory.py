@@ -0,0 +1,79 @@
+# Benchmark: memory of a parsed resolution (slotted model vs the same tree as dict-backed objects)
+# and the size / speed of its encodings
+# usage (from the repository root): python -m benchmarks.bench_memory [n_clauses]
+
+import json
+import pickle
+import sys
+import tracemalloc
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Callable
+
+from benchmarks.bench_render import build_resolution
+from src.core.resolution import Resolution
+
+
+def as_namespaces(d: dict) -> SimpleNamespace:
+    """The same tree with a __dict__ per object, as the model was before __slots__"""
+    def clause(c: dict) -> SimpleNamespace:
+        return SimpleNamespace(index=c["index"], verb=c["verb"], text=c["text"], listsubclauses=[
+            SimpleNamespace(index=sc["index"], text=sc["text"], listsubsubclauses=[
+                SimpleNamespace(index=ssc["index"], text=ssc["text"]) for ssc in sc["subsubclauses"]])
+            for sc in c["subclauses"]])
+    return SimpleNamespace(committee=d["committee"], mainSubmitter=d["mainSubmitter"],
+                           coSubmitters=list(d["coSubmitters"]), topic=d["topic"],
+                           preambs=[SimpleNamespace(**p) for p in d["preambs"]],
+                           clauses=[clause(c) for c in d["clauses"]])
+
+
+def allocated(build: Callable[[], object]) -> int:
+    """Bytes still allocated by build() once it returns (its result is kept alive until then)"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return after - before
+
+
+def best_of(fn: Callable[[], object], repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        fn()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    n_clauses = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    data = build_resolution(n_clauses).to_dict()
+    # both trees are built from the same (already allocated) strings, so only the objects are counted
+    slotted = allocated(lambda: Resolution.from_dict(data))
+    dicts = allocated(lambda: as_namespaces(data))
+    reso = Resolution.from_dict(data)
+    print(f"{n_clauses} clauses, {len(reso.preambs)} preambs, "
+          f"{sum(len(c.listsubclauses) for c in reso.clauses)} subclauses")
+    print(f"  objects, __slots__     : {slotted / 1024:9.1f} KiB")
+    print(f"  objects, __dict__      : {dicts / 1024:9.1f} KiB  ({dicts / slotted:.2f}x)")
+
+    encoded = reso.to_bytes()
+    print(f"  to_bytes               : {len(encoded) / 1024:9.1f} KiB  "
+          f"encode {best_of(reso.to_bytes) * 1000:.1f} ms, decode {best_of(lambda: Resolution.from_bytes(encoded)) * 1000:.1f} ms")
+    as_json = json.dumps(reso.to_dict()).encode()
+    print(f"  to_dict + json         : {len(as_json) / 1024:9.1f} KiB  "
+          f"encode {best_of(lambda: json.dumps(reso.to_dict())) * 1000:.1f} ms, "
+          f"decode {best_of(lambda: Resolution.from_dict(json.loads(as_json))) * 1000:.1f} ms")
+    as_pickle = pickle.dumps(reso.to_dict())
+    print(f"  to_dict + pickle       : {len(as_pickle) / 1024:9.1f} KiB  "
+          f"encode {best_of(lambda: pickle.dumps(reso.to_dict())) * 1000:.1f} ms, "
+          f"decode {best_of(lambda: Resolution.from_dict(pickle.loads(as_pickle))) * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,118 @@
+# Benchmark: reading numbered paragraphs from a document with many numbering definitions
+# usage (from the repository root): python -m benchmarks.bench_numbering [n_abstract_nums] [n_paragraphs]
+
+import random
+import sys
+import tempfile
+import os
+from time import perf_counter
+
+from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+
+import src.document as doc
+
+FORMATS = ['decimal', 'lowerLetter', 'lowerRoman', 'upperLetter', 'upperRoman', 'bullet']
+
+
+def build_document(path: str, n_abstract: int = 500, n_paragraphs: int = 2000, seed: int = 0) -> None:
+    """Write a .docx with n_abstract <w:abstractNum>/<w:num> pairs and paragraphs spread across them"""
+    rng = random.Random(seed)
+    d = Document()
+    ct_num = d.part.numbering_part.element
+    for i in range(1, n_abstract + 1):
+        abstractNum = OxmlElement('w:abstractNum')
+        abstractNum.set(qn('w:abstractNumId'), str(i))
+        for lvl in range(9):
+            lvl_elm = OxmlElement('w:lvl')
+            lvl_elm.set(qn('w:ilvl'), str(lvl))
+            start = OxmlElement('w:start')
+            start.set(qn('w:val'), '1')
+            numFmt = OxmlElement('w:numFmt')
+            numFmt.set(qn('w:val'), FORMATS[(i + lvl) % len(FORMATS)])
+            lvl_elm.append(start)
+            lvl_elm.append(numFmt)
+            abstractNum.append(lvl_elm)
+        ct_num.append(abstractNum)
+    for i in range(1, n_abstract + 1):
+        num = OxmlElement('w:num')
+        num.set(qn('w:numId'), str(i))
+        abstractNumId = OxmlElement('w:abstractNumId')
+        abstractNumId.set(qn('w:val'), str(i))
+        num.append(abstractNumId)
+        ct_num.append(num)
+    for i in range(n_paragraphs):
+        p = d.add_paragraph(f"Paragraph {i}")
+        numPr = p._p.get_or_add_pPr().get_or_add_numPr()
+        ilvl = OxmlElement('w:ilvl')
+        ilvl.set(qn('w:val'), str(rng.randint(0, 2)))
+        numId = OxmlElement('w:numId')
+        numId.set(qn('w:val'), str(rng.randint(1, n_abstract)))
+        numPr.append(ilvl)
+        numPr.append(numId)
+    d.save(path)
+
+
+class LinearScanNumbering:
+    """The previous lookups: a findall over every <w:num> / <w:abstractNum> per numbered paragraph"""
+
+    def __init__(self, numbering_element):
+        self.element = numbering_element
+
+    def abstract_num_id(self, numId):
+        for num in self.element.findall(qn('w:num')):
+            if num.get(qn('w:numId')) == str(numId):
+                abstractNumId = num.find(qn('w:abstractNumId'))
+                if abstractNumId is not None:
+                    return abstractNumId.get(qn('w:val'))
+        return None
+
+    def level(self, numId, ilvl):
+        abstract_num_id = self.abstract_num_id(numId)
+        for abstractNum in self.element.findall(qn('w:abstractNum')):
+            if abstractNum.get(qn('w:abstractNumId')) == abstract_num_id:
+                for lvl in abstractNum.findall(qn('w:lvl')):
+                    if lvl.get(qn('w:ilvl')) == str(ilvl):
+                        numFmt = lvl.find(qn('w:numFmt'))
+                        if numFmt is not None:
+                            return doc.NumberingLevel(numFmt.get(qn('w:val')), None)
+        return None
+
+
+class LinearScanDocument(doc.document):
+    def get_numbering_model(self):  # type: ignore
+        return LinearScanNumbering(self._doc.part.numbering_part.element)
+
+
+def best_of(fn, repeat: int = 3) -> tuple[float, object]:
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = perf_counter()
+        result = fn()
+        best = min(best, perf_counter() - start)
+    return best, result
+
+
+def main() -> int:
+    n_abstract = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    n_paragraphs = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    fd, path = tempfile.mkstemp(suffix='.docx')
+    os.close(fd)
+    try:
+        build_document(path, n_abstract, n_paragraphs)
+        indexed = doc.document(path, path)
+        linear = LinearScanDocument(path, path)
+        t_indexed, r_indexed = best_of(lambda: list(indexed.get_paragraphs()))
+        t_linear, r_linear = best_of(lambda: list(linear.get_paragraphs()))
+    finally:
+        os.unlink(path)
+    assert r_indexed == r_linear, "indexed and linear lookups disagree"
+    print(f"{n_abstract} abstractNums, {n_paragraphs} numbered paragraphs")
+    print(f"  linear scan   : {t_linear * 1000:9.1f} ms")
+    print(f"  indexed model : {t_indexed * 1000:9.1f} ms  ({t_linear / t_indexed:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
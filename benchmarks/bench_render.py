@@ -0,0 +1,89 @@
+# Benchmark: writeToFile with the python-docx and lxml render backends and the streaming writer
+# usage (from the repository root): python -m benchmarks.bench_render [n_clauses]
+
+import io
+import random
+import sys
+import tracemalloc
+import zipfile
+from time import perf_counter
+
+from lxml import etree
+
+import src.main as formatter
+from src.core.resolution import Resolution, preamb, clause, subclause, subsubclause
+
+VERBS = ['urges', 'requests', 'encourages', 'calls upon', 'recommends', 'further invites']
+WORDS = ['member', 'states', 'to', 'ensure', 'sustainable', 'development', 'of', 'the', 'regional',
+         'frameworks', 'including', 'through', 'funding', 'by', 'international', 'organisations']
+
+
+def build_resolution(n_clauses: int = 2000, seed: int = 0) -> Resolution:
+    """A resolution with n_clauses operative clauses, about a third of them with sub(sub)clauses"""
+    rng = random.Random(seed)
+
+    def sentence() -> str:
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 24)))
+
+    reso = Resolution("General Assembly", "Germany", ["France", "Japan", "Brazil"], "Benchmarking")
+    reso.preambs = [preamb("recalling", sentence()) for _ in range(max(1, n_clauses // 10))]
+    for i in range(1, n_clauses + 1):
+        cl = clause(i, rng.choice(VERBS), sentence())
+        if rng.random() < 0.3:
+            for j in range(rng.randint(1, 3)):
+                sub = subclause(j + 1, sentence())
+                if rng.random() < 0.3:
+                    sub.listsubsubclauses = [subsubclause(k + 1, sentence()) for k in range(rng.randint(1, 2))]
+                cl.append(sub)
+        reso.clauses.append(cl)
+    return reso
+
+
+def render(resolution: Resolution, backend: str) -> bytes:
+    out = io.BytesIO()
+    formatter.writeToFile(resolution, out, backend=backend)
+    return out.getvalue()
+
+
+def canonical_body(data: bytes) -> bytes:
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        return etree.tostring(etree.fromstring(z.read('word/document.xml')), method='c14n')
+
+
+def best_of(fn, repeat: int = 3) -> tuple[float, object]:
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = perf_counter()
+        result = fn()
+        best = min(best, perf_counter() - start)
+    return best, result
+
+
+def peak_memory(resolution: Resolution, backend: str) -> int:
+    """Peak Python allocations while rendering, not counting the output itself"""
+    tracemalloc.start()
+    try:
+        output = render(resolution, backend)
+        return tracemalloc.get_traced_memory()[1] - len(output)
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> int:
+    n_clauses = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    resolution = build_resolution(n_clauses)
+    timings: dict[str, float] = {}
+    outputs: dict[str, bytes] = {}
+    for backend in formatter.OUTPUT_BACKENDS:
+        timings[backend], outputs[backend] = best_of(lambda: render(resolution, backend)) # type: ignore
+    for backend in formatter.OUTPUT_BACKENDS:
+        assert canonical_body(outputs[backend]) == canonical_body(outputs['docx']), f"{backend} disagrees"
+    print(f"{n_clauses} clauses, {len(resolution.preambs)} preambs (peak: Python allocations, lxml's own are not traced)")
+    for backend in formatter.OUTPUT_BACKENDS:
+        print(f"  {backend:11} : {timings[backend] * 1000:9.1f} ms  ({timings['docx'] / timings[backend]:.1f}x)  "
+              f"peak {peak_memory(resolution, backend) / 2**20:6.1f} MiB")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
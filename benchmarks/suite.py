@@ -0,0 +1,156 @@
+# Benchmark suite: times every stage of formatting synthetic resolutions and saves the results as JSON
+# usage (from the repository root):
+#   python -m benchmarks.suite [--sizes small,medium,large] [--repeat N] [--noise P] [--output FILE] [--compare OLD.json]
+
+import argparse
+import io
+import json
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+import src.main as formatter
+from benchmarks.synth import SynthOptions, generate_bytes
+from src.cache import LRUCache
+from src.reader import DocxReader, read_paragraphs
+
+SIZES: dict[str, dict[str, int]] = {
+    'small':  {'preambs': 10,  'clauses': 20,   'subclauses': 2, 'subsubclauses': 1},
+    'medium': {'preambs': 30,  'clauses': 100,  'subclauses': 2, 'subsubclauses': 1},
+    'large':  {'preambs': 100, 'clauses': 1000, 'subclauses': 2, 'subsubclauses': 1},
+}
+
+# the clause line pattern the parser uses to find operative clauses
+CLAUSE_LINE = re.compile(r'^\s*(\d+)\s*[\.\)]\s*(.+)$')
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def measure(fn: Callable[[], object], repeat: int) -> dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = perf_counter()
+        fn()
+        samples.append(perf_counter() - start)
+    return {'min': min(samples), 'median': statistics.median(samples), 'mean': statistics.fmean(samples)}
+
+
+def load(data: bytes) -> None:
+    with DocxReader(io.BytesIO(data)):
+        pass
+
+def parse(data: bytes):
+    """Parse as the CLI and server do (DocxReader), classifying every line: no cache hits from earlier runs"""
+    with DocxReader(io.BytesIO(data)) as reader:
+        return formatter.ResolutionParser(formatter.rules, cache=LRUCache(0, 0)).parseToResolution(reader)
+
+
+def run_stages(data: bytes, repeat: int) -> dict[str, dict[str, float]]:
+    """Time each stage on its own, feeding it the output of the previous stage"""
+    compiled = formatter.rules.compiled
+    lines = [record.line.strip() for record in read_paragraphs(io.BytesIO(data))]
+    bodies = [m.group(2).strip() for m in map(CLAUSE_LINE.match, lines) if m]
+    resolution, _, _ = parse(data)
+    rendered = formatter.buildDocument(resolution, io.BytesIO())
+
+    def headers() -> None:
+        pending = formatter.HEADER_FIELDS
+        for line in lines:
+            found = formatter.match_header_field(line, pending)
+            if found is not None:
+                pending = tuple(f for f in pending if f != found[0])
+
+    def preambs() -> None:
+        for line in lines:
+            compiled.preamb_trie.match(line)
+
+    def operationals() -> None:
+        for body in bodies:
+            compiled.operationals_automaton.search(body)
+
+    return {
+        'load': measure(lambda: load(data), repeat),
+        'get_paragraphs': measure(lambda: list(read_paragraphs(io.BytesIO(data))), repeat),
+        'headers': measure(headers, repeat),
+        'preambs': measure(preambs, repeat),
+        'operationals': measure(operationals, repeat),
+        'parse': measure(lambda: parse(data), repeat),
+        'render': measure(lambda: formatter.buildDocument(resolution, io.BytesIO()), repeat),
+        'save': measure(lambda: rendered.save(io.BytesIO()), repeat),
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old: dict, new: dict) -> None:
+    """Print the median of every stage in new relative to old (< 1.00x is slower)"""
+    old_results = {r['size']: r['stages'] for r in old['results']}
+    for result in new['results']:
+        before = old_results.get(result['size'])
+        if before is None:
+            continue
+        print(f"{result['size']} vs {old['meta'].get('revision') or 'previous run'}:")
+        for stage, timing in result['stages'].items():
+            if stage in before:
+                print(f"  {stage:15} {before[stage]['median'] / timing['median']:6.2f}x")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Time each formatting stage on synthetic resolutions')
+    parser.add_argument('--sizes', default='small,medium,large', help=f"comma-separated, from {', '.join(SIZES)}")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--noise', type=float, default=0.2, help='messy-formatting probability for the generator')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help='JSON file to write (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(',') if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)}")
+
+    formatter.rules.load() # keep config loading out of the first stage timed
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': [],
+    }
+    for size in sizes:
+        options = SynthOptions(**SIZES[size], noise=args.noise, seed=args.seed)
+        data = generate_bytes(options)
+        stages = run_stages(data, args.repeat)
+        report['results'].append({'size': size, 'options': options.to_dict(), 'bytes': len(data), 'stages': stages})
+        print(f"{size} ({options.clauses} clauses, {len(data) // 1024} KiB)")
+        for stage, timing in stages.items():
+            print(f"  {stage:15} {timing['median'] * 1000:9.2f} ms")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text(encoding='utf-8')), report)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,132 @@
+# Synthetic resolution generator for benchmarks
+# usage (from the repository root):
+#   python -m benchmarks.synth OUTPUT.docx [--preambs N] [--clauses N] [--subclauses N] [--subsubclauses N] [--noise P] [--seed N]
+
+import argparse
+import io
+import random
+from pathlib import Path
+from typing import IO
+
+import roman
+
+import src.document as doc
+from src.rules import registry as rules
+
+WORDS = ['member', 'states', 'to', 'ensure', 'sustainable', 'development', 'of', 'the', 'regional',
+         'frameworks', 'including', 'through', 'funding', 'by', 'international', 'organisations',
+         'cooperation', 'access', 'education', 'health', 'climate', 'data', 'transparency', 'in']
+COUNTRIES = ['Germany', 'France', 'Japan', 'Brazil', 'Kenya', 'India', 'Canada', 'Chile', 'Egypt', 'Norway']
+
+
+class SynthOptions:
+    """
+    What to generate. subclauses / subsubclauses are averages per parent (each parent gets 0..2n).
+    noise is the probability that a line is made messy: native Word numbering instead of a typed
+    label, stray punctuation, or a clause broken over two paragraphs (a continuation line to merge back).
+    """
+
+    def __init__(self, preambs: int = 10, clauses: int = 20, subclauses: int = 2, subsubclauses: int = 1,
+                 noise: float = 0.0, seed: int = 0) -> None:
+        self.preambs = preambs
+        self.clauses = clauses
+        self.subclauses = subclauses
+        self.subsubclauses = subsubclauses
+        self.noise = noise
+        self.seed = seed
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def _sentence(rng: random.Random, low: int = 6, high: int = 20) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def _stray_punctuation(rng: random.Random, text: str) -> str:
+    words = text.split(' ')
+    i = rng.randrange(len(words))
+    words[i] = words[i] + rng.choice([',,', ' ,', ';;', ' ;'])
+    text = ' '.join(words)
+    return rng.choice([text, f'"{text}"', f'{text} ', f'  {text}'])
+
+
+def generate(output: str | Path | IO[bytes], options: SynthOptions | None = None) -> None:
+    """Write a resolution .docx to output (a path or a binary stream)"""
+    options = options or SynthOptions()
+    rng = random.Random(options.seed)
+    preamb_phrases = rules.preamb_phrases
+    operational_phrases = rules.operationals_phrases
+
+    def messy() -> bool:
+        return options.noise > 0 and rng.random() < options.noise
+
+    def line(text: str) -> str:
+        return _stray_punctuation(rng, text) if messy() else text
+
+    out = doc.document(None, str(output) if isinstance(output, (str, Path)) else output, backend="lxml")
+
+    def numbered(label: str, text: str, level: int) -> None:
+        if messy():
+            # native numbering: Word renders the label, the text has none
+            out.append(doc.paragraph(line(text), list_level=level))
+        else:
+            out.append(doc.paragraph(f"{label} {line(text)}"))
+
+    cosubmitters = rng.sample(COUNTRIES[1:], k=min(3, len(COUNTRIES) - 1))
+    for header in ("Committee: General Assembly",
+                   f"Main Submitter: {COUNTRIES[0]}",
+                   f"Co-Submitters: {', '.join(cosubmitters)}",
+                   f"Topic: {_sentence(rng, 3, 6).capitalize()}",
+                   "The General Assembly,"):
+        out.append(doc.paragraph(header))
+
+    for _ in range(options.preambs):
+        phrase = rng.choice(preamb_phrases)
+        out.append(doc.paragraph(line(f"{phrase[0].upper()}{phrase[1:]} {_sentence(rng)},")))
+
+    for i in range(1, options.clauses + 1):
+        n_sub = rng.randint(0, 2 * options.subclauses) if options.subclauses else 0
+        verb = rng.choice(operational_phrases)
+        text = f"{verb[0].upper()}{verb[1:]} {_sentence(rng)}{':' if n_sub else ';'}"
+        if messy():
+            # a clause broken over two paragraphs: the second one continues the first
+            words = text.split(' ')
+            cut = max(2, len(words) // 2)
+            numbered(f"{i}.", ' '.join(words[:cut]), 1)
+            out.append(doc.paragraph(' '.join(words[cut:])))
+        else:
+            numbered(f"{i}.", text, 1)
+        for j in range(n_sub):
+            n_subsub = rng.randint(0, 2 * options.subsubclauses) if options.subsubclauses else 0
+            numbered(f"{chr(ord('a') + j % 26)}.", f"{_sentence(rng)}{':' if n_subsub else ','}", 2)
+            for k in range(1, n_subsub + 1):
+                numbered(f"{roman.toRoman(k).lower()}.", f"{_sentence(rng)},", 3)
+
+    out.save()
+
+
+def generate_bytes(options: SynthOptions | None = None) -> bytes:
+    stream = io.BytesIO()
+    generate(stream, options)
+    return stream.getvalue()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Write a synthetic resolution .docx')
+    parser.add_argument('output', help='output .docx path')
+    parser.add_argument('--preambs', type=int, default=10)
+    parser.add_argument('--clauses', type=int, default=20)
+    parser.add_argument('--subclauses', type=int, default=2, help='average subclauses per clause')
+    parser.add_argument('--subsubclauses', type=int, default=1, help='average sub-subclauses per subclause')
+    parser.add_argument('--noise', type=float, default=0.0, help='probability (0-1) that a line is made messy')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    generate(args.output, SynthOptions(args.preambs, args.clauses, args.subclauses, args.subsubclauses,
+                                       args.noise, args.seed))
+    print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,32 +1,77 @@
 import src.main as formatter
-import src.document as mydoc
-from flask import Flask, request, send_file, render_template_string, after_this_request
+from flask import Flask, request, send_file, render_template_string
 from flask_cors import CORS
 import os
-from werkzeug.utils import secure_filename
-import tempfile
 from docx import Document
+from docx.opc.exceptions import PackageNotFoundError
 import io
+import math
+import zipfile
 from pathlib import Path
+from typing import IO
 from version import get_version_info
+from src.jobs import JobQueue, QueueFull
+from src.cache import LRUCache, ResultCache
+from src.profiling import recording
+from src.reader import DocxReader
+from src.rules import ProfileRegistry, RuleRegistry, PROFILES_DIR
 
 app = Flask(__name__)
 CORS(app, expose_headers=['Content-Disposition', 'Content-Type'])
 
-# Configure upload settings
-UPLOAD_FOLDER = 'uploads'
+# Configure upload settings (uploads are processed in memory, nothing is written to disk)
 ALLOWED_EXTENSIONS = {'docx'}
 
-# Create upload folder if it doesn't exist
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
+# Background jobs (/jobs): number of documents formatted at once, finished jobs kept for download,
+# jobs allowed to wait for a worker (POST /jobs answers 503 beyond that)
+app.config['JOB_WORKERS'] = int(os.environ.get('RESO_JOB_WORKERS', '2'))
+app.config['JOB_HISTORY'] = int(os.environ.get('RESO_JOB_HISTORY', '256'))
+app.config['JOB_QUEUE'] = int(os.environ.get('RESO_JOB_QUEUE', '64'))
+job_queue = JobQueue(workers=app.config['JOB_WORKERS'], max_finished=app.config['JOB_HISTORY'],
+                     max_queued=app.config['JOB_QUEUE'])
+
+# Formatted results by content (SHA-256 of the upload + phrase config fingerprint), optionally also on disk
+app.config['CACHE_ENTRIES'] = int(os.environ.get('RESO_CACHE_ENTRIES', '128'))
+app.config['CACHE_MB'] = int(os.environ.get('RESO_CACHE_MB', '64'))
+app.config['CACHE_DIR'] = os.environ.get('RESO_CACHE_DIR') or None
+app.config['CACHE_DISK_MB'] = int(os.environ.get('RESO_CACHE_DISK_MB', '1024'))
+result_cache = ResultCache(
+    max_entries=app.config['CACHE_ENTRIES'],
+    max_bytes=app.config['CACHE_MB'] * 1024 * 1024,
+    disk_dir=app.config['CACHE_DIR'],
+    max_disk_bytes=app.config['CACHE_DISK_MB'] * 1024 * 1024,
+)
+
+# Classification of recurring lines (boilerplate preambs / clauses), shared by every request
+app.config['CLASSIFY_CACHE_ENTRIES'] = int(os.environ.get('RESO_CLASSIFY_CACHE_ENTRIES', str(formatter.CLASSIFY_CACHE_ENTRIES)))
+app.config['CLASSIFY_CACHE_MB'] = int(os.environ.get('RESO_CLASSIFY_CACHE_MB', str(formatter.CLASSIFY_CACHE_BYTES // (1024 * 1024))))
+classify_cache = LRUCache(app.config['CLASSIFY_CACHE_ENTRIES'], app.config['CLASSIFY_CACHE_MB'] * 1024 * 1024)
+
+# Rule profiles (one directory of phrase configs + profile.json per conference), chosen with `profile`
+# on /upload, /parse and /jobs; compiled ones are kept, so switching between them costs nothing
+app.config['PROFILES_DIR'] = os.environ.get('RESO_PROFILES_DIR') or str(PROFILES_DIR)
+app.config['PROFILE_CACHE'] = int(os.environ.get('RESO_PROFILE_CACHE', '16'))
+profiles = ProfileRegistry(app.config['PROFILES_DIR'], max_profiles=app.config['PROFILE_CACHE'],
+                           default=formatter.rules)
+
+def parser_for(rules: RuleRegistry) -> formatter.ResolutionParser:
+    # parsers keep no state between documents, making one per request is free
+    return formatter.ResolutionParser(rules, cache=classify_cache)
+
+# Seconds to wait for a locked output path before giving up (only when formatting to a path, uploads stay in memory)
+app.config['SAVE_TIMEOUT'] = float(os.environ.get('RESO_SAVE_TIMEOUT', '10'))
+
+DOCX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def getCommitteeShortened(committee: str) -> str:
+def getCommitteeShortened(committee: str, committees: dict[str, str] | None = None) -> str:
+    """Shorthand for the committee: from committees (a profile's, lower case names) first, then the built-in names"""
+    if committees and committee.lower() in committees:
+        return committees[committee.lower()].upper()
     result = {
         "environment programme": "unep",
         "un environment programme": "unep",
@@ -92,77 +137,207 @@ def getCommitteeShortened(committee: str) -> str:
     # print("Unable to get shorthand for committee:", committee)
     return committee
 
-def process_document(filename: str) -> tuple[str, str]:
-    d = mydoc.document(str(Path(filename)), str(Path(filename)))
-    parseResult = formatter.parseToResolution(d)
+def process_document(source: str | IO[bytes], output: str | IO[bytes] | None = None, rules: RuleRegistry | None = None) \
+        -> tuple[str, str, list[formatter.ResolutionParsingError]]:
+    """Format source (a path or a binary stream) into output (defaults to overwriting source) with rules (default: the default profile)"""
+    if isinstance(source, str):
+        source = str(Path(source))
+    if output is None:
+        output = source
+    if rules is None:
+        rules = profiles.default
+    with DocxReader(source) as d:
+        parseResult = parser_for(rules).parseToResolution(d)
     parsedResolution, components, errorList = parseResult
     mainSub = parsedResolution.mainSubmitter
-    cmt = getCommitteeShortened(parsedResolution.committee)
-    formatter.writeToFile(parsedResolution, filename)
-    return mainSub, cmt
+    cmt = getCommitteeShortened(parsedResolution.committee, rules.options.committees)
+    formatter.writeToFile(parsedResolution, output, timeout=app.config['SAVE_TIMEOUT'], rules=rules)
+    return mainSub, cmt, errorList
 
-@app.route('/')
-def index():
-    version_info = get_version_info()
-    return f"Backend is running! Use /upload to upload files.\n\n{version_info}"
+def format_bytes(data: bytes, rules: RuleRegistry | None = None) -> dict:
+    """Upload bytes -> formatted document bytes, all in memory, with the seconds spent per stage"""
+    output = io.BytesIO()
+    with recording() as timings:
+        mainSub, cmt, errorList = process_document(io.BytesIO(data), output, rules)
+    return {'filename': f"DR_{mainSub}_{cmt}", 'data': output.getvalue(), 'errors': errors_to_json(errorList),
+            'stages': timings.as_dict()}
 
-@app.route('/upload', methods=['POST'])
-def upload_file():
+def parse_bytes(data: bytes, rules: RuleRegistry | None = None) -> dict:
+    """Upload bytes -> the parsed clause tree, errors and summary as JSON-ready data; nothing is rendered"""
+    if rules is None:
+        rules = profiles.default
+    with recording() as timings:
+        with DocxReader(io.BytesIO(data)) as d:
+            parsedResolution, components, errorList = parser_for(rules).parseToResolution(d)
+    committee = getCommitteeShortened(parsedResolution.committee, rules.options.committees)
+    return {
+        'filename': f"DR_{parsedResolution.mainSubmitter}_{committee}",
+        'resolution': parsedResolution.to_dict(),
+        'errors': errors_to_json(errorList),
+        'summary': parsedResolution.summary(),
+        'stages': timings.as_dict(),
+    }
+
+def server_timing(stages: dict[str, float]) -> str:
+    """Server-Timing header value (durations in ms), shows up in the browser's network panel"""
+    return ', '.join(f'{name.replace(" ", "-")};dur={seconds * 1000:.1f}' for name, seconds in stages.items())
+
+def errors_to_json(errorList: list[formatter.ResolutionParsingError]) -> list[dict]:
+    return [{'line': e.line, 'message': e.args[0] if e.args else str(e)} for e in errorList]
+
+def validate_upload():
+    """Returns (file, None) for a valid .docx upload, (None, error response) otherwise"""
     # Check if file was uploaded
     if 'file' not in request.files:
-        return {'error': 'No file part'}, 400
+        return None, ({'error': 'No file part'}, 400)
     
     file = request.files['file']
     
     # Check if file was selected
     if file.filename == '' or file.filename is None:
-        return {'error': 'No selected file'}, 400
+        return None, ({'error': 'No selected file'}, 400)
     
     # Check if it's a docx file
     if not allowed_file(file.filename):
-        return {'error': 'File type not allowed. Please upload .docx files only'}, 400
+        return None, ({'error': 'File type not allowed. Please upload .docx files only'}, 400)
+    return file, None
+
+def request_rules():
+    """Returns (rules, None) for the request's `profile` (form field or query parameter), (None, error response) otherwise"""
+    name = request.form.get('profile') or request.args.get('profile') or None
+    try:
+        return profiles.get(name), None
+    except KeyError:
+        return None, ({'error': f'Unknown profile: {name}', 'profiles': profiles.names()}, 400)
+
+def format_cached(data: bytes, rules: RuleRegistry | None = None) -> tuple[dict, bool]:
+    """format_bytes through the result cache: re-uploads of the same draft skip parsing and rendering.
+    Returns (result, cache hit)"""
+    if rules is None:
+        rules = profiles.default
+    key = result_cache.key(data, rules.fingerprint)
+    return result_cache.get_or_compute(key, lambda: format_bytes(data, rules))
+
+def docx_response(source, custom_filename: str):
+    response = send_file(
+        source,
+        as_attachment=True,
+        download_name=custom_filename,
+        mimetype=DOCX_MIMETYPE,
+    )
+    # Add custom header with filename
+    response.headers['X-Filename'] = custom_filename
+    # Expose both headers
+    response.headers['Access-Control-Expose-Headers'] = 'Content-Disposition, X-Filename'
+    response.headers['Content-Disposition'] = f'attachment; filename="{custom_filename}"'
+    return response
+
+@app.route('/')
+def index():
+    version_info = get_version_info()
+    return f"Backend is running! Use /upload to upload files, /parse to preview them, or /jobs to queue them.\n\n{version_info}"
+
+@app.route('/upload', methods=['POST'])
+def upload_file():
+    file, error = validate_upload()
+    if error is not None:
+        return error
+    rules, error = request_rules()
+    if error is not None:
+        return error
     
     try:
-        # Save uploaded file temporarily
-        filename = secure_filename(file.filename)
-        temp_input = tempfile.NamedTemporaryFile(delete=False, suffix='.docx')
-        file.save(temp_input.name)
-        temp_input.close()
-        
-        # Process the document
-        mainSub, cmt = process_document(temp_input.name)
-        
-        # Send the processed file back to user
-        @after_this_request
-        def cleanup(response):
-            try:
-                os.unlink(temp_input.name)
-            except Exception as e:
-                app.logger.error(f"Error deleting temp file: {e}")
-            return response
-        custom_filename = f"DR_{mainSub}_{cmt}"
-        response = send_file(
-            temp_input.name,
-            as_attachment=True,
-            download_name=custom_filename,
-            mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-        )
-        # Add custom header with filename
-        response.headers['X-Filename'] = custom_filename
-        # Expose both headers
-        response.headers['Access-Control-Expose-Headers'] = 'Content-Disposition, X-Filename'
-        response.headers['Content-Disposition'] = f'attachment; filename="{custom_filename}"'
+        # upload stream -> BytesIO -> Resolution -> BytesIO -> response, no temp files
+        result, hit = format_cached(file.read(), rules) # type: ignore
+        response = docx_response(io.BytesIO(result['data']), result['filename'])
+        response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+        if not hit:
+            response.headers['Server-Timing'] = server_timing(result.get('stages', {}))
         return response
         
     except Exception as e:
         return {'error': str(e)}, 500
-    
-    finally:
-        # Clean up temporary files
-        try:
-            os.unlink(temp_input.name) # type: ignore
-        except:
-            pass
+
+@app.route('/parse', methods=['POST'])
+def parse_file():
+    """Preview: the clause tree and the errors of an upload, without formatting it"""
+    file, error = validate_upload()
+    if error is not None:
+        return error
+    rules, error = request_rules()
+    if error is not None:
+        return error
+
+    try:
+        result = parse_bytes(file.read(), rules) # type: ignore
+    except (PackageNotFoundError, zipfile.BadZipFile):
+        return {'error': 'Invalid or unreadable .docx file'}, 400
+    except Exception as e:
+        return {'error': str(e)}, 500
+    return result, 200, {'Server-Timing': server_timing(result['stages'])}
+
+def job_status(job) -> dict:
+    status = {
+        'id': job.id,
+        'status': job.status,
+        'timings': job.timings(),
+        'queue_depth': job_queue.queue_depth(),
+    }
+    if job.status == 'done':
+        status['filename'] = job.result['filename']
+        status['errors'] = job.result['errors']
+        status['stages'] = job.result.get('stages', {})
+    elif job.status == 'failed':
+        status['error'] = job.error
+    return status
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    file, error = validate_upload()
+    if error is not None:
+        return error
+    rules, error = request_rules()
+    if error is not None:
+        return error
+
+    # Read the upload now, the request stream is gone once we return
+    try:
+        job = job_queue.submit(lambda data: format_cached(data, rules)[0], file.read()) # type: ignore
+    except QueueFull:
+        retry_after = max(1, math.ceil(job_queue.estimated_wait()))
+        return {'error': 'Too many queued jobs, try again later', 'queue_depth': job_queue.queue_depth()}, \
+            503, {'Retry-After': str(retry_after)}
+    return job_status(job), 202, {'Location': f'/jobs/{job.id}'}
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    return {**job_queue.stats(), 'queue_depth': job_queue.queue_depth()}
+
+@app.route('/cache', methods=['GET'])
+def cache_stats():
+    return {**result_cache.stats(), 'classification': classify_cache.stats(), 'profiles': profiles.stats()}
+
+@app.route('/profiles', methods=['GET'])
+def list_profiles():
+    return {'profiles': profiles.names()}
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        return {'error': 'Unknown job'}, 404
+    return job_status(job)
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        return {'error': 'Unknown job'}, 404
+    if job.status == 'failed':
+        return {'error': job.error}, 500
+    if job.status != 'done':
+        return {'error': f'Job is {job.status}', 'status': job.status}, 409
+    return docx_response(io.BytesIO(job.result['data']), job.result['filename'])
 
 # if __name__ == '__main__':
 #     app.run(debug=True, port=5000)
\ No newline at end of file
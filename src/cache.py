@@ -0,0 +1,240 @@
+# caches shared by the server and the CLI
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache bounded by number of entries and by total size in bytes"""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[Any, tuple[Any, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Any, value: Any, size: int = 0) -> None:
+        """Store value; size is its (approximate) size in bytes. Values larger than the whole cache are not kept."""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._bytes -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class ResultCache:
+    """
+    Content-addressed cache of formatted documents.
+
+    An entry is a dict {'filename': str, 'data': bytes, 'errors': list} keyed by the SHA-256 of the
+    uploaded bytes and the fingerprint of the phrase configs that produced it. Entries live in an
+    in-memory LRU and, if disk_dir is given, also on disk (<key>.docx + <key>.json) so they survive
+    restarts; once the disk tier holds more than max_disk_bytes, the least recently used entries are
+    deleted. Concurrent requests for the same key are coalesced: only the first one computes.
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024, disk_dir: str | Path | None = None,
+                 max_disk_bytes: int = 1024 * 1024 * 1024) -> None:
+        self.memory = LRUCache(max_entries, max_bytes)
+        self.disk_dir = Path(disk_dir) if disk_dir is not None else None
+        self.max_disk_bytes = max_disk_bytes
+        self._disk_lock = threading.Lock()
+        self._disk_bytes = 0
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(size for _, _, size in self._disk_entries())
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+        self.disk_evictions = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def key(data: bytes, fingerprint: str) -> str:
+        h = hashlib.sha256(data)
+        h.update(b"\0" + fingerprint.encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        entry = self.memory.get(key)
+        if entry is None and self.disk_dir is not None:
+            entry = self._read_disk(key)
+            if entry is not None:
+                self.disk_hits += 1
+                self.memory.put(key, entry, len(entry["data"]))
+        return entry
+
+    def put(self, key: str, entry: dict) -> None:
+        self.memory.put(key, entry, len(entry["data"]))
+        if self.disk_dir is not None:
+            self._write_disk(key, entry)
+
+    def get_or_compute(self, key: str, compute: Callable[[], dict]) -> tuple[dict, bool]:
+        """
+        Returns (entry, hit). On a miss, compute() runs once per key even if several threads ask
+        at the same time; the others wait for its result (or its exception).
+        """
+        entry = self.get(key)
+        if entry is not None:
+            return entry, True
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                # another thread may have finished (and left _inflight) since our lookup
+                entry = self.memory.get(key)
+                if entry is not None:
+                    return entry, True
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result(), True # type: ignore
+        try:
+            entry = compute()
+            self.put(key, entry)
+            future.set_result(entry) # type: ignore
+            return entry, False
+        except BaseException as e:
+            future.set_exception(e) # type: ignore
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self) -> dict[str, int | float | str | None]:
+        return {
+            **self.memory.stats(),
+            "disk_hits": self.disk_hits,
+            "disk_bytes": self._disk_bytes,
+            "disk_evictions": self.disk_evictions,
+            "coalesced": self.coalesced,
+            "disk_dir": str(self.disk_dir) if self.disk_dir is not None else None,
+        }
+
+    def _read_disk(self, key: str) -> dict | None:
+        assert self.disk_dir is not None
+        try:
+            meta = json.loads((self.disk_dir / f"{key}.json").read_text(encoding="utf-8"))
+            data = (self.disk_dir / f"{key}.docx").read_bytes()
+            os.utime(self.disk_dir / f"{key}.json") # recently used: evicted last
+        except (OSError, ValueError):
+            return None
+        return {**meta, "data": data}
+
+    def _disk_entries(self) -> list[tuple[float, str, int]]:
+        """(last used, key, bytes) of every entry on disk"""
+        assert self.disk_dir is not None
+        used: dict[str, float] = {}
+        sizes: dict[str, int] = {}
+        for f in os.scandir(self.disk_dir):
+            key, suffix = os.path.splitext(f.name)
+            if suffix not in (".docx", ".json"):
+                continue # a write in progress
+            try:
+                stat = f.stat()
+            except OSError:
+                continue
+            sizes[key] = sizes.get(key, 0) + stat.st_size
+            if suffix == ".json":
+                used[key] = stat.st_mtime
+        return [(used.get(key, 0.0), key, size) for key, size in sizes.items()]
+
+    def _evict_disk(self) -> None:
+        """Delete the least recently used entries until the disk tier fits in max_disk_bytes"""
+        assert self.disk_dir is not None
+        entries = sorted(self._disk_entries())
+        self._disk_bytes = sum(size for _, _, size in entries)
+        for _, key, size in entries:
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            # the .json first: without it the entry is a miss, never a .json without its .docx
+            for suffix in (".json", ".docx"):
+                try:
+                    os.remove(self.disk_dir / f"{key}{suffix}")
+                except FileNotFoundError:
+                    pass
+            self._disk_bytes -= size
+            self.disk_evictions += 1
+
+    def _write_disk(self, key: str, entry: dict) -> None:
+        assert self.disk_dir is not None
+        meta = {k: v for k, v in entry.items() if k != "data"}
+        payloads = ((".docx", entry["data"]), (".json", json.dumps(meta).encode("utf-8")))
+        if sum(len(payload) for _, payload in payloads) > self.max_disk_bytes:
+            return
+        try:
+            with self._disk_lock:
+                # the .json is written last and read first, so a reader never sees it without its .docx
+                for suffix, payload in payloads:
+                    target = self.disk_dir / f"{key}{suffix}"
+                    fd, tmp = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+                    try:
+                        with os.fdopen(fd, "wb") as f:
+                            f.write(payload)
+                        try:
+                            replaced = target.stat().st_size
+                        except FileNotFoundError:
+                            replaced = 0
+                        os.replace(tmp, target)
+                    except BaseException:
+                        os.remove(tmp) # skipped by _disk_entries, so it would never be evicted
+                        raise
+                    self._disk_bytes += len(payload) - replaced
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._evict_disk()
+        except OSError:
+            pass # the disk tier is best effort
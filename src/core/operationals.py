@@ -2,14 +2,23 @@ from docx.api import Document
 import src.document as doc
 
 class subsubclause:
+    __slots__ = ("index", "text")
+
     def __init__(self,
                  index: int, 
                  text: str = "Sub sub clause text") -> None:
         self.index = index
         self.text = text
+    def to_dict(self) -> dict:
+        return {"index": self.index, "text": self.text}
+    @classmethod
+    def from_dict(cls, d: dict) -> 'subsubclause':
+        return cls(d["index"], d["text"])
 
 
 class subclause:
+    __slots__ = ("index", "text", "listsubsubclauses")
+
     def __init__(self,
                  index: int,
                  text: str = "Sub clause text",
@@ -21,8 +30,18 @@ class subclause:
         self.listsubsubclauses = listsubsubclauses if listsubsubclauses is not None else []
     def append(self, ssc: subsubclause) -> None:
         self.listsubsubclauses.append(ssc)
+    def to_dict(self) -> dict:
+        return {"index": self.index, "text": self.text,
+                "subsubclauses": [ssc.to_dict() for ssc in self.listsubsubclauses]}
+    @classmethod
+    def from_dict(cls, d: dict) -> 'subclause':
+        sc = cls(d["index"], listsubsubclauses=[subsubclause.from_dict(ssc) for ssc in d["subsubclauses"]])
+        sc.text = d["text"] # as stored, without the trailing comma __init__ adds
+        return sc
 
 class clause:
+    __slots__ = ("index", "verb", "text", "listsubclauses")
+
     def __init__(self,
                  index: int,
                  verb: str = "clause verb",
@@ -36,6 +55,14 @@ class clause:
         self.listsubclauses = listsubclauses if listsubclauses is not None else []
     def append(self, sc: subclause) -> None:
         self.listsubclauses.append(sc)
+    def to_dict(self) -> dict:
+        return {"index": self.index, "verb": self.verb, "text": self.text,
+                "subclauses": [sc.to_dict() for sc in self.listsubclauses]}
+    @classmethod
+    def from_dict(cls, d: dict) -> 'clause':
+        cl = cls(d["index"], d["verb"], listsubclauses=[subclause.from_dict(sc) for sc in d["subclauses"]])
+        cl.text = d["text"] # as stored, without the trailing comma __init__ adds
+        return cl
         
     def toDocParagraphs(self) -> list[doc.paragraph]:
         paragraphs = []
@@ -46,24 +73,17 @@ class clause:
         clause_content.add_run(self.text)
         paragraphs.append(clause_content)
 
-        print(f"clause_cotent: {clause_content}")
-        print(f"paragraphs: {[str(p) for p in paragraphs]}")
-
         # Subclauses (level 2, a), b), c), ...)
         for subcl in self.listsubclauses:
             subclause_text = subcl.text
             subclause_paragraph = doc.paragraph(subclause_text, list_level=2)
             paragraphs.append(subclause_paragraph)
-            print(f"subclause_paragraph: {subclause_paragraph}")
-            print(f"paragraphs: {[str(p) for p in paragraphs]}")
 
             # Sub-subclauses (level 3, i., ii., iii., ...)
             for subsubcl in subcl.listsubsubclauses:
                 subsubclause_text = subsubcl.text
                 subsubclause_paragraph = doc.paragraph(subsubclause_text, list_level=3)
                 paragraphs.append(subsubclause_paragraph)
-                print(f"subsubclause_paragraph: {subsubclause_paragraph}")
-                print(f"paragraphs: {[str(p) for p in paragraphs]}")
         return paragraphs
 
             
\ No newline at end of file
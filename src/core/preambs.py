@@ -2,10 +2,17 @@ from docx.api import Document
 import src.document as doc
 
 class preamb:
+    __slots__ = ("adverb", "content")
+
     def __init__(self, adverb: str = "Adverb",
                     content: str = "content") -> None:
         self.adverb = adverb
         self.content = content
+    def to_dict(self) -> dict:
+        return {"adverb": self.adverb, "content": self.content}
+    @classmethod
+    def from_dict(cls, d: dict) -> 'preamb':
+        return cls(d["adverb"], d["content"])
     def toDocParagraph(self) -> doc.paragraph:
         _p = doc.paragraph(self.adverb, italic=True)
         _p.add_run(" " + self.content + ",")
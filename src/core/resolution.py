@@ -4,7 +4,115 @@ import src.document as doc
 from colorama import Fore, Back, Style, init
 init() # colorama
 
+# Binary encoding (Resolution.to_bytes): magic and version, the distinct strings as one UTF-8 blob,
+# then LEB128 varints: the length (in characters) of every string, and the structure as string
+# references, list lengths and (zigzag-encoded) clause indices.
+_MAGIC = b"RESO"
+_VERSION = 1
+
+def _put_varint(out: bytearray, n: int) -> None:
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+def _varints(data: bytes) -> list[int]:
+    values = []
+    append = values.append
+    result = shift = 0
+    for byte in data:
+        if byte < 0x80:
+            append(result | (byte << shift))
+            result = shift = 0
+        else:
+            result |= (byte & 0x7F) << shift
+            shift += 7
+    if shift:
+        raise ValueError("truncated varint")
+    return values
+
+class _Writer:
+    __slots__ = ("body", "strings")
+
+    def __init__(self) -> None:
+        self.body = bytearray()
+        self.strings: dict[str, int] = {}
+
+    def int(self, n: int) -> None:
+        _put_varint(self.body, n * 2 if n >= 0 else -n * 2 - 1)
+
+    def count(self, n: int) -> None:
+        _put_varint(self.body, n)
+
+    def str(self, s: str) -> None:
+        ref = self.strings.get(s)
+        if ref is None:
+            ref = self.strings[s] = len(self.strings)
+        _put_varint(self.body, ref)
+
+    def getvalue(self) -> bytes:
+        blob = "".join(self.strings).encode("utf-8") # in reference order
+        out = bytearray(_MAGIC)
+        out.append(_VERSION)
+        _put_varint(out, len(self.strings))
+        _put_varint(out, len(blob))
+        out += blob
+        for s in self.strings:
+            _put_varint(out, len(s))
+        return bytes(out + self.body)
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+class _Reader:
+    """Decodes all strings and varints up front, the structure is then read value by value"""
+    __slots__ = ("strings", "values", "next")
+
+    def __init__(self, data: bytes) -> None:
+        if len(data) <= len(_MAGIC) or data[:len(_MAGIC)] != _MAGIC:
+            raise ValueError("not an encoded resolution")
+        if data[len(_MAGIC)] != _VERSION:
+            raise ValueError(f"unsupported resolution encoding version {data[len(_MAGIC)]}")
+        n_strings, pos = _read_varint(data, len(_MAGIC) + 1)
+        blob_size, pos = _read_varint(data, pos)
+        text = data[pos:pos + blob_size].decode("utf-8")
+        values = _varints(data[pos + blob_size:])
+        if len(values) < n_strings:
+            raise ValueError("truncated string table")
+        self.strings: list[str] = []
+        offset = 0
+        for length in values[:n_strings]:
+            self.strings.append(text[offset:offset + length])
+            offset += length
+        if offset != len(text):
+            raise ValueError("string lengths do not match the string table")
+        self.values = iter(values[n_strings:])
+        self.next = self.values.__next__
+
+    def count(self) -> int:
+        return self.next()
+
+    def int(self) -> int:
+        n = self.next()
+        return (n >> 1) ^ -(n & 1)
+
+    def str(self) -> str:
+        return self.strings[self.next()]
+
+    def done(self) -> bool:
+        return next(self.values, None) is None
+
+
 class Resolution:
+    __slots__ = ("committee", "mainSubmitter", "coSubmitters", "topic", "preambs", "clauses")
+
     def __init__(self, 
                 committee: str = "Test Committee",
                 mainSubmitter: str = "Main Submitter Country Name",
@@ -68,3 +176,77 @@ class Resolution:
         return (f"Resolution on '{self.topic}' by {self.mainSubmitter} "
                 f"({len(self.preambs)} preambs, {len(self.clauses)} clauses, "
                 f"{sum(len(clause.listsubclauses) for clause in self.clauses)} subclauses)")
+
+    def to_dict(self) -> dict:
+        """Plain dicts, lists and strings (JSON-ready); from_dict rebuilds an equal resolution"""
+        return {
+            "committee": self.committee,
+            "mainSubmitter": self.mainSubmitter,
+            "coSubmitters": list(self.coSubmitters),
+            "topic": self.topic,
+            "preambs": [p.to_dict() for p in self.preambs],
+            "clauses": [c.to_dict() for c in self.clauses],
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'Resolution':
+        return cls(d["committee"], d["mainSubmitter"], list(d["coSubmitters"]), d["topic"],
+                   [preamb.from_dict(p) for p in d["preambs"]],
+                   [clause.from_dict(c) for c in d["clauses"]])
+
+    def to_bytes(self) -> bytes:
+        """Compact binary encoding, each distinct string is stored once (see from_bytes)"""
+        w = _Writer()
+        w.str(self.committee)
+        w.str(self.mainSubmitter)
+        w.str(self.topic)
+        w.count(len(self.coSubmitters))
+        for country in self.coSubmitters:
+            w.str(country)
+        w.count(len(self.preambs))
+        for p in self.preambs:
+            w.str(p.adverb)
+            w.str(p.content)
+        w.count(len(self.clauses))
+        for c in self.clauses:
+            w.int(c.index)
+            w.str(c.verb)
+            w.str(c.text)
+            w.count(len(c.listsubclauses))
+            for sc in c.listsubclauses:
+                w.int(sc.index)
+                w.str(sc.text)
+                w.count(len(sc.listsubsubclauses))
+                for ssc in sc.listsubsubclauses:
+                    w.int(ssc.index)
+                    w.str(ssc.text)
+        return w.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Resolution':
+        """Decode to_bytes output; raises ValueError for anything else"""
+        try:
+            r = _Reader(data)
+            reso = cls(r.str(), r.str(), None, r.str())
+            reso.coSubmitters = [r.str() for _ in range(r.count())]
+            reso.preambs = [preamb(r.str(), r.str()) for _ in range(r.count())]
+            for _ in range(r.count()):
+                c = clause(r.int(), r.str())
+                c.text = r.str()
+                for _ in range(r.count()):
+                    sc = subclause(r.int())
+                    sc.text = r.str()
+                    sc.listsubsubclauses = [subsubclause(r.int(), r.str()) for _ in range(r.count())]
+                    c.listsubclauses.append(sc)
+                reso.clauses.append(c)
+        except StopIteration:
+            raise ValueError("corrupt resolution encoding: truncated") from None
+        except (IndexError, UnicodeDecodeError) as e:
+            raise ValueError(f"corrupt resolution encoding: {e}") from None
+        if not r.done():
+            raise ValueError("corrupt resolution encoding: trailing data")
+        return reso
+
+    def __reduce__(self):
+        # pickling (e.g. to and from worker processes) goes through the compact encoding
+        return (type(self).from_bytes, (self.to_bytes(),))
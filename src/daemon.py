@@ -0,0 +1,316 @@
+# Resident formatter: keeps the interpreter, the imports and the loaded rules around between runs.
+# usage (from the repository root):
+#   python -m src.daemon start [--idle-timeout SECONDS]   # in the background
+#   python -m src.daemon serve [--idle-timeout SECONDS]   # in the foreground
+#   python -m src.daemon status | stop
+# While it runs, `python -m src.main ...` hands its arguments to it instead of formatting in-process.
+# Only the standard library is imported here, the client side must stay cheap to start.
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stderr, redirect_stdout
+
+DEFAULT_IDLE_TIMEOUT = 15 * 60 # seconds without a request before the daemon exits
+MAX_REQUEST = 1024 * 1024
+CONNECT_TIMEOUT = 2.0 # seconds; a daemon that doesn't accept by then is treated as absent
+# seconds a client waits for the reply (RESO_DAEMON_TIMEOUT) before formatting in-process instead
+DEFAULT_REPLY_TIMEOUT = 600.0
+# the checkout this module belongs to: a daemon only formats for clients from the same one
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def default_socket_path() -> str:
+    """
+    RESO_DAEMON_SOCKET, or a per-checkout socket in the user's runtime directory, or else in a
+    directory of the user's own (mode 0700) in the shared temp directory
+    """
+    path = os.environ.get("RESO_DAEMON_SOCKET")
+    if path:
+        return path
+    checkout = hashlib.sha256(ROOT.encode("utf-8")).hexdigest()[:12]
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return os.path.join(runtime, f"resoformatter-{checkout}.sock")
+    user = os.getuid() if hasattr(os, "getuid") else os.getlogin()
+    return os.path.join(_private_directory(os.path.join(tempfile.gettempdir(), f"resoformatter-{user}")),
+                        f"{checkout}.sock")
+
+
+def _private_directory(path: str) -> str:
+    """path, created if needed; PermissionError unless it's a real directory only this user can use"""
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if hasattr(os, "getuid") and (not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid()
+                                  or info.st_mode & 0o077):
+        raise PermissionError(f"{path} is not a private directory of this user")
+    return path
+
+
+def _owned_by_this_user(path: str) -> bool:
+    """Whether the socket at path was bound by this user (always true where there are no uids)"""
+    return not hasattr(os, "getuid") or os.stat(path).st_uid == os.getuid()
+
+
+# ==== client ====
+
+def request(message: dict, socket_path: str | None = None, timeout: float | None = None,
+            connect_timeout: float | None = None) -> dict | None:
+    """
+    Send one request to the daemon; None if no daemon of this user is listening.
+    timeout bounds sending and waiting for the reply, connect_timeout (default: timeout) connecting;
+    socket.timeout is raised when either runs out.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    socket_path = socket_path or default_socket_path()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(connect_timeout if connect_timeout is not None else timeout)
+        try:
+            # someone else's socket would get our argv and cwd, and could answer anything
+            if not _owned_by_this_user(socket_path):
+                return None
+            sock.connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+        sock.settimeout(timeout)
+        sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        return None # went away (e.g. idle shutdown) before answering
+    return json.loads(line)
+
+
+def run_client(argv: list[str], socket_path: str | None = None) -> int | None:
+    """
+    Run the formatter CLI with argv in the daemon, printing its output here.
+    Returns the exit code, or None if there's no daemon or it didn't answer within RESO_DAEMON_TIMEOUT
+    seconds (RESO_NO_DAEMON=1 never uses one).
+    """
+    if os.environ.get("RESO_NO_DAEMON"):
+        return None
+    try:
+        timeout = float(os.environ.get("RESO_DAEMON_TIMEOUT") or DEFAULT_REPLY_TIMEOUT)
+        reply = request({"op": "format", "argv": argv, "cwd": os.getcwd(), "root": ROOT}, socket_path,
+                        timeout=timeout, connect_timeout=CONNECT_TIMEOUT)
+    except socket.timeout: # stuck, or busy with someone else's long batch
+        return None
+    except (OSError, ValueError): # no daemon, or a garbled / truncated reply
+        return None
+    if reply is None or reply.get("wrong_checkout"):
+        return None
+    sys.stdout.write(reply.get("stdout", ""))
+    sys.stderr.write(reply.get("stderr", ""))
+    return reply.get("code", 1)
+
+
+# ==== daemon ====
+
+def _exit_code(code) -> int:
+    # as the interpreter does for SystemExit
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+class Daemon:
+    """Serves requests one at a time, each one a main() run in the client's working directory"""
+
+    def __init__(self, socket_path: str, idle_timeout: float = DEFAULT_IDLE_TIMEOUT) -> None:
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        self.started = time.time()
+        self.requests = 0
+        self.running = False
+
+    def serve(self) -> None:
+        import src.main as formatter # the imports and rules this daemon exists to keep loaded
+        import src.rules
+        self.formatter = formatter
+        self.rules_module = src.rules
+        formatter.rules.load()
+        self._rules_signature = self.rules_module.file_signature(formatter.rules.config_dir, formatter.rules.base_dir)
+        self._rules_hash = self.rules_module.content_hash(formatter.rules.config_dir, formatter.rules.base_dir)
+
+        if os.path.exists(self.socket_path):
+            if request({"op": "status"}, self.socket_path, timeout=1) is not None:
+                raise RuntimeError(f"a daemon is already listening on {self.socket_path}")
+            os.remove(self.socket_path) # left behind by one that died
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+            old_umask = os.umask(0o177) # the socket is only for this user
+            try:
+                server.bind(self.socket_path)
+            finally:
+                os.umask(old_umask)
+            server.listen()
+            self.running = True
+            last_request = time.monotonic()
+            try:
+                while self.running:
+                    remaining = self.idle_timeout - (time.monotonic() - last_request)
+                    if remaining <= 0:
+                        break
+                    server.settimeout(remaining)
+                    try:
+                        conn, _ = server.accept()
+                    except socket.timeout:
+                        continue
+                    with conn:
+                        self._handle(conn)
+                    last_request = time.monotonic()
+            finally:
+                self.running = False
+                try:
+                    os.remove(self.socket_path)
+                except OSError:
+                    pass
+
+    def _handle(self, conn: socket.socket) -> None:
+        conn.settimeout(10)
+        try:
+            with conn.makefile("rb") as f:
+                line = f.readline(MAX_REQUEST)
+            message = json.loads(line)
+            reply = self.dispatch(message)
+        except (OSError, ValueError) as e:
+            reply = {"stderr": f"bad request: {e}\n", "code": 2}
+        try:
+            conn.sendall(json.dumps(reply).encode("utf-8") + b"\n")
+        except OSError:
+            pass # the client is gone
+
+    def dispatch(self, message: dict) -> dict:
+        op = message.get("op")
+        if op == "status":
+            return self.status()
+        if op == "stop":
+            self.running = False
+            return {"stopping": True}
+        if op == "format":
+            if message.get("root", ROOT) != ROOT:
+                # another checkout's client: its code and configs may differ, it formats in-process
+                return {"wrong_checkout": True, "root": ROOT}
+            self.requests += 1
+            return self.format(list(message.get("argv", [])), message.get("cwd") or os.getcwd())
+        return {"stderr": f"unknown op: {op}\n", "code": 2}
+
+    def status(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "socket": self.socket_path,
+            "uptime": time.time() - self.started,
+            "requests": self.requests,
+            "idle_timeout": self.idle_timeout,
+            "rules_fingerprint": self.formatter.rules.fingerprint,
+        }
+
+    def refresh_rules(self) -> None:
+        """Reload the phrase configs if they were edited since they were loaded, as a new CLI process would read them"""
+        rules = self.formatter.rules
+        signature = self.rules_module.file_signature(rules.config_dir, rules.base_dir)
+        if signature == self._rules_signature:
+            return
+        self._rules_signature = signature
+        digest = self.rules_module.content_hash(rules.config_dir, rules.base_dir)
+        if digest != self._rules_hash:
+            self._rules_hash = digest
+            rules.reload()
+            self.rules_module.profiles.reload() # profiles fall back to these configs
+
+    def format(self, argv: list[str], cwd: str) -> dict:
+        stdout, stderr = io.StringIO(), io.StringIO()
+        try:
+            self.refresh_rules()
+        except (OSError, ValueError) as e: # e.g. saved mid-edit: keep the loaded rules
+            stderr.write(f"Warning: phrase configs not reloaded: {e}\n")
+        previous = os.getcwd()
+        self.formatter.verbose = False # main() only ever turns it on
+        try:
+            os.chdir(cwd)
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                try:
+                    code = self.formatter.main(argv)
+                except SystemExit as e: # argparse errors and --help
+                    code = _exit_code(e.code)
+                except Exception as e:
+                    print(f"{type(e).__name__}: {e}", file=sys.stderr)
+                    code = 1
+        except OSError as e:
+            return {"stderr": f"cannot use working directory {cwd}: {e}\n", "code": 1}
+        finally:
+            os.chdir(previous)
+        return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "code": code}
+
+
+def start(socket_path: str, idle_timeout: float, wait: float = 30.0) -> bool:
+    """Start `serve` as a detached background process and wait until it answers"""
+    subprocess.Popen([sys.executable, "-m", "src.daemon", "--socket", socket_path, "serve",
+                      "--idle-timeout", str(idle_timeout)],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if request({"op": "status"}, socket_path, timeout=1) is not None:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.daemon", description="Resident resolution formatter")
+    parser.add_argument("--socket", default=None, help="Unix socket path (default: RESO_DAEMON_SOCKET or a per-user path)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("start", "start in the background"), ("serve", "run in the foreground")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT,
+                             help=f"exit after this many seconds without a request (default: {DEFAULT_IDLE_TIMEOUT})")
+    commands.add_parser("status", help="show whether a daemon is running")
+    commands.add_parser("stop", help="stop the running daemon")
+    args = parser.parse_args(argv)
+    socket_path = args.socket or default_socket_path()
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("Unix sockets are not available on this platform", file=sys.stderr)
+        return 1
+    if args.command == "serve":
+        Daemon(socket_path, args.idle_timeout).serve()
+        return 0
+    if args.command == "start":
+        if request({"op": "status"}, socket_path, timeout=1) is not None:
+            print(f"Already running on {socket_path}")
+            return 0
+        if not start(socket_path, args.idle_timeout):
+            print(f"Daemon did not come up on {socket_path}", file=sys.stderr)
+            return 1
+        print(f"Started on {socket_path}")
+        return 0
+
+    reply = request({"op": args.command}, socket_path, timeout=5)
+    if reply is None:
+        print(f"Not running ({socket_path})")
+        return 1 if args.command == "status" else 0
+    if args.command == "status":
+        print(f"Running on {reply['socket']}: pid {reply['pid']}, up {reply['uptime']:.0f}s, "
+              f"{reply['requests']} runs, idle timeout {reply['idle_timeout']:.0f}s, rules {reply['rules_fingerprint'][:12]}")
+    else:
+        print("Stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,35 @@
 from docx import Document
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-from docx.shared import Pt, RGBColor, Inches
+from docx.enum.text import WD_LINE_SPACING, WD_UNDERLINE
+from docx.enum.style import WD_STYLE_TYPE
+from docx.shared import Pt, RGBColor, Inches, Length, Emu, Twips
 from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
+from docx.oxml.simpletypes import ST_HpsMeasure, ST_SignedTwipsMeasure, ST_TwipsMeasure
+from lxml.etree import SubElement
 from docx.oxml.numbering import CT_Numbering
 from docx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
-from typing import Union
-from time import sleep
+from typing import Any, Callable, Union, NamedTuple, IO, Iterator
+from docx.text.paragraph import Paragraph
+from time import sleep, monotonic
+from src.profiling import span
+import copy
+import os
+import shutil
+import threading
+import uuid
 
 class ResoFormattingError(BaseException):
     def __init__(self, msg: str | None = None):
         super().__init__(msg)
 
+class SaveTimeoutError(ResoFormattingError, TimeoutError):
+    """document.save gave up because the output file stayed locked (e.g. open in Word) until the deadline"""
+    def __init__(self, filename: str, timeout: float):
+        super().__init__(f"Timed out after {timeout:g}s waiting to write {filename}")
+        self.filename = filename
+        self.timeout = timeout
+
 
 
 class NumberingStyleManager:
@@ -102,6 +120,94 @@ class NumberingStyleManager:
 
         return p
 
+class NumberingLevel(NamedTuple):
+    fmt: str          # w:numFmt, e.g. 'decimal', 'lowerLetter'
+    start: int | None # w:start (or w:startOverride for an override)
+
+
+class ParagraphRecord(NamedTuple):
+    """One non-empty paragraph as read by document.get_paragraphs"""
+    text: str          # stripped paragraph text
+    label: str         # rendered numbering label, e.g. "1." or "b.", "" if not numbered
+    level: int | None  # list level (ilvl, 0-based) of a numbered paragraph
+    index: int         # position of the paragraph in the document body (empty paragraphs included)
+
+    @property
+    def line(self) -> str:
+        """The paragraph as one line of text, numbering label first"""
+        return f"{self.label} {self.text}" if self.label else self.text
+
+
+class NumberingModel:
+    """
+    Dict-based view of numbering.xml, parsed in one pass:
+        numId -> abstractNumId -> level -> format / start,
+    plus the per-numId <w:lvlOverride> entries.
+    Lookups are O(1) instead of scanning every <w:num> / <w:abstractNum>.
+    Ids and levels are kept as the strings found in the XML.
+    """
+
+    def __init__(self, numbering_element=None):
+        self.abstract_ids: dict[str, str] = {}                         # numId -> abstractNumId
+        self.levels: dict[str, dict[str, NumberingLevel]] = {}         # abstractNumId -> ilvl -> level
+        self.overrides: dict[str, dict[str, NumberingLevel]] = {}      # numId -> ilvl -> overridden level
+        self.start_overrides: dict[str, dict[str, int]] = {}           # numId -> ilvl -> w:startOverride
+        if numbering_element is not None:
+            self._parse(numbering_element)
+
+    @staticmethod
+    def _level(lvl) -> NumberingLevel | None:
+        numFmt = lvl.find(qn('w:numFmt'))
+        if numFmt is None or numFmt.get(qn('w:val')) is None:
+            return None
+        start = lvl.find(qn('w:start'))
+        start_val = start.get(qn('w:val')) if start is not None else None
+        return NumberingLevel(numFmt.get(qn('w:val')), int(start_val) if start_val and start_val.lstrip('-').isdigit() else None)
+
+    def _parse(self, numbering_element) -> None:
+        # the first definition wins on duplicate ids, like the linear lookups did
+        for el in numbering_element.iterchildren(qn('w:abstractNum')):
+            levels = self.levels.setdefault(el.get(qn('w:abstractNumId')), {})
+            for lvl in el.iterchildren(qn('w:lvl')):
+                level = self._level(lvl)
+                if level is not None:
+                    levels.setdefault(lvl.get(qn('w:ilvl')), level)
+        for el in numbering_element.iterchildren(qn('w:num')):
+            num_id = el.get(qn('w:numId'))
+            if num_id in self.abstract_ids:
+                continue
+            abstractNumId = el.find(qn('w:abstractNumId'))
+            if abstractNumId is None:
+                continue
+            self.abstract_ids[num_id] = abstractNumId.get(qn('w:val'))
+            for override in el.iterchildren(qn('w:lvlOverride')):
+                ilvl = override.get(qn('w:ilvl'))
+                startOverride = override.find(qn('w:startOverride'))
+                if startOverride is not None and (val := startOverride.get(qn('w:val'))) is not None and val.isdigit():
+                    self.start_overrides.setdefault(num_id, {})[ilvl] = int(val)
+                lvl = override.find(qn('w:lvl'))
+                level = self._level(lvl) if lvl is not None else None
+                if level is not None:
+                    self.overrides.setdefault(num_id, {})[ilvl] = level
+
+    def abstract_num_id(self, num_id) -> str | None:
+        return self.abstract_ids.get(str(num_id))
+
+    def number_format(self, abstract_num_id, ilvl) -> str | None:
+        level = self.levels.get(str(abstract_num_id), {}).get(str(ilvl))
+        return level.fmt if level is not None else None
+
+    def level(self, num_id, ilvl) -> NumberingLevel | None:
+        """Effective level definition for a concrete numbering, overrides applied"""
+        override = self.overrides.get(str(num_id), {}).get(str(ilvl))
+        if override is not None:
+            return override
+        abstract_num_id = self.abstract_num_id(num_id)
+        if abstract_num_id is None:
+            return None
+        return self.levels.get(abstract_num_id, {}).get(str(ilvl))
+
+
 # --- helper: reuse a single NumberingStyleManager per python-docx Document ---
 def _get_numbering_manager(doc: Document) -> NumberingStyleManager: # type: ignore
     """
@@ -114,6 +220,92 @@ def _get_numbering_manager(doc: Document) -> NumberingStyleManager: # type: igno
     return doc._numbering_manager
 
 
+# --- new documents start as a copy of a skeleton built once per process ---
+# keyed by (overall style, font, font size, line spacing); the skeleton has the style settings and
+# the list numbering definitions, and its (large, read-only while rendering) styles tree is shared
+# by every copy instead of being copied, until document.getdocument() hands the copy out
+_skeletons: dict[tuple, Document] = {} # type: ignore
+_skeletons_lock = threading.Lock()
+
+def _new_document(overallstyle: str, font: str, fontsize: int | float, line_spacing: int | float) -> Document: # type: ignore
+    key = (overallstyle, font, fontsize, line_spacing)
+    skeleton = _skeletons.get(key)
+    if skeleton is None:
+        skeleton = Document()
+        _apply_style(skeleton, overallstyle, font, fontsize, line_spacing)
+        _get_numbering_manager(skeleton)
+        with _skeletons_lock:
+            skeleton = _skeletons.setdefault(key, skeleton)
+    styles = skeleton.part._styles_part.element
+    return copy.deepcopy(skeleton, {id(styles): styles})
+
+def _apply_style(doc: Document, overallstyle: str, font: str, fontsize: int | float, line_spacing: int | float) -> None: # type: ignore
+    doc.styles[overallstyle].font.name = font # type: ignore
+    doc.styles[overallstyle].font.size = Pt(fontsize) # type: ignore
+    doc.styles[overallstyle].paragraph_format.line_spacing = line_spacing # type: ignore
+
+
+# ==== lxml backend ====
+# paragraph.render_lxml writes the same <w:p> markup as paragraph.render, but with lxml SubElement
+# calls instead of python-docx proxies (add_run, run.bold = ..., Pt, RGBColor), which are slow per object.
+
+RENDER_BACKENDS = ("docx", "lxml")
+
+_W_VAL = qn('w:val')
+_W_P, _W_PPR, _W_PSTYLE, _W_NUMPR, _W_ILVL, _W_NUMID = (qn(t) for t in ('w:p', 'w:pPr', 'w:pStyle', 'w:numPr', 'w:ilvl', 'w:numId'))
+_W_SPACING, _W_LINE, _W_LINERULE, _W_IND, _W_JC = (qn(t) for t in ('w:spacing', 'w:line', 'w:lineRule', 'w:ind', 'w:jc'))
+_W_LEFT, _W_RIGHT, _W_FIRSTLINE, _W_HANGING = (qn(t) for t in ('w:left', 'w:right', 'w:firstLine', 'w:hanging'))
+_W_R, _W_RPR, _W_B, _W_I, _W_COLOR, _W_SZ, _W_U, _W_T = (qn(t) for t in ('w:r', 'w:rPr', 'w:b', 'w:i', 'w:color', 'w:sz', 'w:u', 'w:t'))
+_XML_SPACE = qn('xml:space')
+
+# the hanging indent NumberingStyleManager.add_numbered_paragraph gives list paragraphs
+_LIST_INDENT = 0.31988
+
+def _line_spacing_attrs(value) -> tuple[str, str] | None:
+    """(w:line, w:lineRule) as ParagraphFormat.line_spacing would set them, None for no <w:spacing>"""
+    if value is None:
+        return None
+    if isinstance(value, Length):
+        return ST_SignedTwipsMeasure.to_xml(value), WD_LINE_SPACING.to_xml(WD_LINE_SPACING.EXACTLY) # type: ignore
+    return (ST_SignedTwipsMeasure.to_xml(Emu(value * Twips(240))), # type: ignore
+            WD_LINE_SPACING.to_xml(WD_LINE_SPACING.MULTIPLE)) # type: ignore
+
+def _on_off(rPr, tag: str, value) -> None:
+    if value is None:
+        return
+    el = SubElement(rPr, tag)
+    if not value:
+        el.set(_W_VAL, "0")
+
+def _append_run(p, text: str, bold, italic, underline, size: Length | None, font_color) -> None:
+    """Append a <w:r> like paragraph.add_run(text) followed by the run property setters"""
+    r = SubElement(p, _W_R)
+    # python-docx always creates <w:rPr> once any property is assigned; children in schema order
+    rPr = SubElement(r, _W_RPR)
+    _on_off(rPr, _W_B, bold)
+    _on_off(rPr, _W_I, italic)
+    if font_color:
+        SubElement(rPr, _W_COLOR).set(_W_VAL, "%02X%02X%02X" % tuple(font_color))
+    if size is not None:
+        SubElement(rPr, _W_SZ).set(_W_VAL, ST_HpsMeasure.to_xml(size))
+    if underline is not None:
+        val = WD_UNDERLINE.SINGLE if underline is True else WD_UNDERLINE.NONE if underline is False else underline
+        SubElement(rPr, _W_U).set(_W_VAL, WD_UNDERLINE.to_xml(val)) # type: ignore
+    if not text:
+        return
+    if "\t" in text or "\n" in text or "\r" in text:
+        r.text = text # tabs and line breaks become <w:tab/> / <w:br/>
+        return
+    t = SubElement(r, _W_T)
+    t.text = text
+    if len(text.strip()) < len(text):
+        t.set(_XML_SPACE, "preserve")
+
+def _length(value):
+    # same conversion as paragraph.render (Length is an int subclass, so it is converted too)
+    return Inches(value) if isinstance(value, (int, float)) else value
+
+
 class paragraph:
     def __init__(
         self,
@@ -308,8 +500,8 @@ class paragraph:
         # line spacing
         p.paragraph_format.line_spacing = self.line_spacing if self.line_spacing is not None else doc.styles['Normal'].paragraph_format.line_spacing
 
-    def render(self, doc: Document) -> None: # type: ignore
-        """Render the paragraph to a docx Document."""
+    def render(self, doc: Document): # type: ignore
+        """Render the paragraph to the end of a docx Document. Returns the new <w:p> element."""
         # Handle list paragraphs differently
         if self.list_level > 0:
             mgr = _get_numbering_manager(doc)
@@ -383,6 +575,79 @@ class paragraph:
         
         # line spacing
         p.paragraph_format.line_spacing = self.line_spacing if self.line_spacing is not None else doc.styles['Normal'].paragraph_format.line_spacing
+        return p._p
+
+    def render_lxml(self, doc: Document, default_line_spacing=None): # type: ignore
+        """
+        Render the paragraph to a docx Document like render(), building the XML directly.
+        Returns the new <w:p> element.
+        default_line_spacing: the Normal style's line spacing, looked up in doc if not given.
+        """
+        p = self.to_lxml(doc, default_line_spacing)
+        body = doc.element.body
+        sectPr = body.sectPr
+        if sectPr is not None:
+            sectPr.addprevious(p)
+        else:
+            body.append(p)
+        return p
+
+    def to_lxml(self, doc: Document, default_line_spacing=None): # type: ignore
+        """The <w:p> element render_lxml would add to doc, without adding it (doc is only read)"""
+        p = OxmlElement('w:p')
+        pPr = SubElement(p, _W_PPR)
+
+        ind: dict[str, str] = {}
+        if self.list_level > 0:
+            num_id = _get_numbering_manager(doc).num_id
+            numPr = SubElement(pPr, _W_NUMPR)
+            SubElement(numPr, _W_ILVL).set(_W_VAL, str(self.list_level - 1))
+            SubElement(numPr, _W_NUMID).set(_W_VAL, num_id) # type: ignore
+            ind[_W_LEFT] = ST_SignedTwipsMeasure.to_xml(Inches(_LIST_INDENT * self.list_level))
+            ind[_W_HANGING] = ST_TwipsMeasure.to_xml(Inches(_LIST_INDENT))
+            # add_numbered_paragraph("") leaves an empty run in front
+            SubElement(p, _W_R)
+        elif self.style is not None:
+            style_id = doc.part.get_style_id(self.style, WD_STYLE_TYPE.PARAGRAPH)
+            if style_id is not None:
+                SubElement(pPr, _W_PSTYLE).set(_W_VAL, style_id)
+
+        if self._runs:
+            for run_spec in self._runs:
+                _append_run(p, run_spec["text"], run_spec["bold"], run_spec["italic"], run_spec["underline"],
+                            Pt(run_spec["font_size"]) if run_spec["font_size"] else None,
+                            run_spec.get("font_color") or self.font_color)
+        else:
+            _append_run(p, self.text, self.bold, self.italic, self.underline, Pt(self.font_size), self.font_color)
+
+        line_spacing = self.line_spacing
+        if line_spacing is None:
+            line_spacing = default_line_spacing if default_line_spacing is not None \
+                else doc.styles['Normal'].paragraph_format.line_spacing
+        spacing = _line_spacing_attrs(line_spacing)
+        if spacing is not None:
+            spacing_el = SubElement(pPr, _W_SPACING)
+            spacing_el.set(_W_LINE, spacing[0])
+            spacing_el.set(_W_LINERULE, spacing[1])
+
+        if self.first_line_indent is not None:
+            first_line = _length(self.first_line_indent)
+            ind.pop(_W_FIRSTLINE, None)
+            ind.pop(_W_HANGING, None)
+            if first_line < 0:
+                ind[_W_HANGING] = ST_TwipsMeasure.to_xml(-first_line)
+            else:
+                ind[_W_FIRSTLINE] = ST_TwipsMeasure.to_xml(first_line)
+        if self.left_indent is not None:
+            ind[_W_LEFT] = ST_SignedTwipsMeasure.to_xml(_length(self.left_indent))
+        if self.right_indent is not None:
+            ind[_W_RIGHT] = ST_SignedTwipsMeasure.to_xml(_length(self.right_indent))
+        if ind:
+            SubElement(pPr, _W_IND, ind)
+
+        if self.align is not None:
+            SubElement(pPr, _W_JC).set(_W_VAL, WD_PARAGRAPH_ALIGNMENT.to_xml(self.align)) # type: ignore
+        return p
 
     def _apply_formatting(self, run) -> None:
         """Helper to apply formatting to a run."""
@@ -419,23 +684,105 @@ class paragraph:
         return self.text
     
     
+# ==== saving ====
+
+def save_output(outputfile: str | IO[bytes], write: Callable[[IO[bytes]], None],
+                atomic: bool = True, timeout: float | None = None) -> None:
+    """
+    Call write(f) to produce outputfile, a path or a binary stream; see document.save for atomic
+    and timeout. write is called once, unless atomic is False and the target is locked.
+    """
+    if not isinstance(outputfile, str):
+        # a stream: nothing can hold a lock on it
+        write(outputfile)
+        return
+    if atomic:
+        tmp = _write_temp(outputfile, write)
+        try:
+            _retry_locked(outputfile, timeout, lambda: os.replace(tmp, outputfile))
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+    else:
+        def write_file() -> None:
+            with open(outputfile, "wb") as f:
+                write(f)
+        _retry_locked(outputfile, timeout, write_file)
+
+def _write_temp(outputfile: str, write: Callable[[IO[bytes]], None]) -> str:
+    """Serialize into a new file in the target's directory (so the final rename stays on one filesystem)"""
+    directory, name = os.path.split(os.path.abspath(outputfile))
+    tmp = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(tmp, "xb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(outputfile):
+            shutil.copymode(outputfile, tmp)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return tmp
+
+def _retry_locked(outputfile: str, timeout: float | None, write) -> None:
+    deadline = None if timeout is None else monotonic() + timeout
+    delay = 0.05
+    printed = False
+    while True:
+        try:
+            write()
+            return
+        except PermissionError as pe:
+            if not printed:
+                print(f"Waiting to close the file: {pe.filename or outputfile}")
+                printed = True
+            wait = delay
+            if deadline is not None:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    raise SaveTimeoutError(outputfile, timeout) from pe # type: ignore
+                wait = min(delay, remaining)
+            sleep(wait)
+            delay = min(delay * 2, 1.0)
+
+
 # inputfile=None for write-only (needs testing)
+# inputfile / outputfile may also be binary file-like objects (e.g. io.BytesIO) to stay in memory
 class document:
     def __init__(self, 
-                 inputfile: str | None ="tests/inputs/test1.docx",
-                 outputfile : str ="tests/outputs/test1.docx",
+                 inputfile: str | IO[bytes] | None ="tests/inputs/test1.docx",
+                 outputfile : str | IO[bytes] ="tests/outputs/test1.docx",
                  paragraphs: list[paragraph] | None = None,
                  overallstyle : str = "Normal",
                  font: str = "Times New Roman",
                  fontsize : int | float = 12,
-                 line_spacing: int | float = 1):
+                 line_spacing: int | float = 1,
+                 backend: str = "docx"): # "docx": python-docx API, "lxml": paragraph.render_lxml
+        if backend not in RENDER_BACKENDS:
+            raise ValueError(f"Invalid render backend: {backend}")
+        self.backend = backend
         self.paragraphs = paragraphs if paragraphs is not None else []
+        # id(paragraph) -> the <w:p> element rendered for it; paragraphs passed here have none until rendered
+        self._elements: dict[int, Any] = {}
+        self._unrendered = len(self.paragraphs)
         self.inputfile = inputfile
         self.outputfile = outputfile
-        self._doc = Document(inputfile) if inputfile is not None else Document()
-        self._doc.styles[overallstyle].font.name = font # type: ignore
-        self._doc.styles[overallstyle].font.size = Pt(fontsize) # type: ignore
-        self._doc.styles[overallstyle].paragraph_format.line_spacing = line_spacing # type: ignore
+        if inputfile is not None:
+            with span("load"):
+                self._doc = Document(inputfile)
+            _apply_style(self._doc, overallstyle, font, fontsize, line_spacing)
+        else:
+            # shares the skeleton's styles: don't change them on this document (getdocument copies them)
+            self._doc = _new_document(overallstyle, font, fontsize, line_spacing)
+        self._shared_styles = inputfile is None
+        self._default_line_spacing = None
         
     def append(self, paragraph: paragraph, index: int | None = None) -> 'document':
         """
@@ -443,226 +790,229 @@ class document:
         
         Args:
             paragraph: The paragraph object to add
-            index: Optional index position to insert at. If None, appends to end.
+            index: Optional index position to insert at (as in list.insert). If None, appends to end.
         
         Returns:
             document: Self for method chaining
+
+        Raises:
+            ValueError: paragraph is already in the document
         """
+        if id(paragraph) in self._elements:
+            raise ValueError("paragraph is already in the document")
         if index is None:
             # Append to the end
+            self._elements[id(paragraph)] = self._render(paragraph)
             self.paragraphs.append(paragraph)
-            paragraph.render(self._doc)
-        else:
-            # Insert at specified index
-            self.paragraphs.insert(index, paragraph)
-            
-            # Clear the current document content and re-render all paragraphs
+            return self
+
+        if self._unrendered:
+            # paragraphs passed to __init__ have no element to insert next to yet
             self.rebuild_document()
-        
+        n = len(self.paragraphs)
+        if index < 0:
+            index = max(index + n, 0)
+        index = min(index, n)
+
+        # render only the new paragraph, then move it next to its neighbour's element
+        element = self._render(paragraph)
+        if index < n:
+            self._elements[id(self.paragraphs[index])].addprevious(element)
+        elif n:
+            self._elements[id(self.paragraphs[-1])].addnext(element)
+        self._elements[id(paragraph)] = element
+        self.paragraphs.insert(index, paragraph)
         return self
 
     def rebuild_document(self) -> None:
         """
-        Rebuild the document by clearing all content and re-rendering all paragraphs.
-        This is necessary when inserting paragraphs at specific positions.
+        Rebuild the document by removing the paragraphs rendered so far and re-rendering all paragraphs.
+        Content that was already in the input document is left in place.
         """
-        # Clear all existing paragraphs from the document
-        for element in self._doc.element.body:
-            if element.tag.endswith('p'):  # Remove paragraph elements
-                self._doc.element.body.remove(element)
+        for element in self._elements.values():
+            element.getparent().remove(element)
         
         # Re-render all paragraphs in the correct order
-        for para in self.paragraphs:
-            para.render(self._doc)
+        self._elements = {id(para): self._render(para) for para in self.paragraphs}
+        self._unrendered = 0
+
+    def _render(self, paragraph: paragraph):
+        if self.backend == "lxml":
+            if self._default_line_spacing is None:
+                self._default_line_spacing = self._doc.styles['Normal'].paragraph_format.line_spacing
+            return paragraph.render_lxml(self._doc, self._default_line_spacing)
+        return paragraph.render(self._doc)
     
     def remove(self, paragraph: paragraph) -> None:
-        self.paragraphs.remove(paragraph)
-    def save(self, outputfile : str | None = None, verbose: bool = False) -> None:
+        """
+        Remove paragraph, and its element from the document body (found through its id, O(1)).
+        Dropping it from self.paragraphs is still a list removal, O(n) in the number of paragraphs;
+        ValueError if it isn't in the document.
+        """
+        self.paragraphs.remove(paragraph) # paragraphs compare by identity
+        element = self._elements.pop(id(paragraph), None)
+        if element is None:
+            self._unrendered -= 1
+        else:
+            element.getparent().remove(element)
+
+    def save(self, outputfile : str | IO[bytes] | None = None, verbose: bool = False,
+             atomic: bool = True, timeout: float | None = None) -> None:
+        """
+        Save to outputfile (defaults to the document's output), a path or a binary stream.
+
+        atomic: write to a temporary file next to the target and rename it into place, so the target
+            is never left half written and the document is serialized only once.
+        timeout: seconds to keep retrying while the target is locked (PermissionError, e.g. the file is
+            open in Word), with exponential backoff; SaveTimeoutError is raised after that.
+            None waits until the file is closed.
+        """
         if outputfile is None:
             outputfile = self.outputfile
-        printed = False
-        while True:
-            try:
-                self._doc.save(outputfile)
-                break
-            except PermissionError as pe:
-                if not printed:
-                    print(f"Waiting to close the file: {pe.filename}")
-                    printed = True
-                else:
-                    sleep(0.1)
-        if verbose: print(f"File saved to {outputfile}")
+        save_output(outputfile, self._doc.save, atomic, timeout)
+        if verbose: print(f"File saved to {outputfile}" if isinstance(outputfile, str) else "File saved to stream")
+
     def getdocument(self) -> Document: # type: ignore
+        """The python-docx Document; changes to it (styles included) stay in this document"""
+        if self._shared_styles:
+            # callers may change the styles: they get their own copy of the skeleton's
+            styles_part = self._doc.part._styles_part
+            styles_part._element = copy.deepcopy(styles_part._element)
+            self._shared_styles = False
         return self._doc
 
-    def get_paragraphs(self) -> list[str]:
+    def get_paragraphs(self) -> Iterator[ParagraphRecord]:
         """
-        Returns a list of text content from all paragraphs in the document,
-        including proper hierarchical numbering information.
+        Yields a ParagraphRecord for every non-empty paragraph of the document, in order,
+        including proper hierarchical numbering information. Use record.line for the
+        "label text" string. Paragraphs are read lazily, so a caller can stop early.
         """
-        paragraphs_text = []
         # Track numbering state for each list and level
         numbering_states = {}
         current_list_context = None
-        
-        for i, paragraph in enumerate(self._doc.paragraphs):
-            text = paragraph.text.strip()
-            if not text:
-                continue
-                
-            # Extract numbering information with proper hierarchy
-            numbering_text, list_context = self._extract_hierarchical_numbering(
-                paragraph, numbering_states, current_list_context
-            )
-            
-            if list_context:
-                current_list_context = list_context
-                
-            if numbering_text:
-                paragraphs_text.append(f"{numbering_text} {text}")
-            else:
-                paragraphs_text.append(text)
-        
-        return paragraphs_text
+        # numbering.xml is parsed once per read, not once per numbered paragraph
+        with span("extract numbering"):
+            numbering = self.get_numbering_model()
+
+        for i, p in enumerate(self._doc.element.body.iterchildren(qn('w:p'))):
+            with span("extract numbering"):
+                paragraph = Paragraph(p, self._doc) # type: ignore
+                text = paragraph.text.strip()
+                if not text:
+                    continue
+
+                # Extract numbering information with proper hierarchy
+                numbering_text, list_context, level = self._extract_hierarchical_numbering(
+                    paragraph, numbering_states, current_list_context, numbering
+                )
+
+                if list_context:
+                    current_list_context = list_context
+
+            # outside the span: the caller's work between paragraphs isn't ours
+            yield ParagraphRecord(text, numbering_text, level, i)
+
+    def get_numbering_model(self) -> NumberingModel:
+        """Parse numbering.xml of the document into a NumberingModel"""
+        numbering_part = self._doc.part.numbering_part
+        return NumberingModel(numbering_part.element if numbering_part is not None else None)
 
     def _extract_hierarchical_numbering(self, 
                                         paragraph,
                                         numbering_states, 
-                                        current_list_context) -> tuple:
+                                        current_list_context,
+                                        numbering: NumberingModel | None = None) -> tuple:
         """
         Extract numbering information from a paragraph - show only current level number.
+        Returns (label, list context, level).
         """
+        if numbering is None:
+            numbering = self.get_numbering_model()
         try:
             pPr = paragraph._p.pPr
             if pPr is None:
-                return "", current_list_context
+                return "", current_list_context, None
                 
             numPr = pPr.numPr
             if numPr is None:
-                return "", current_list_context
+                return "", current_list_context, None
                 
             # Get numbering ID and level
             numId_elem = numPr.numId
             ilvl_elem = numPr.ilvl
             
             if numId_elem is None or ilvl_elem is None:
-                return "", current_list_context
+                return "", current_list_context, None
                 
             numId = numId_elem.val
             ilvl = ilvl_elem.val
             
             if numId is None or ilvl is None:
-                return "", current_list_context
-                
-            # Get numbering definition
-            numbering_part = self._doc.part.numbering_part
-            if numbering_part is None:
-                return "", current_list_context
-                
-            # Find the abstract numbering definition
-            abstract_num_id = self._get_abstract_num_id(numbering_part, numId)
-            if abstract_num_id is None:
-                return "", current_list_context
-                
-            # Create a key for this numbering context
-            list_context = (numId, abstract_num_id)
-            
-            # Initialize numbering state if it doesn't exist
-            if list_context not in numbering_states:
-                numbering_states[list_context] = {}
-                
-            # Get numbering format for this level
-            num_format = self._get_number_format(numbering_part, abstract_num_id, ilvl)
-            if not num_format:
-                return "", list_context
+                return "", current_list_context, None
                 
-            # Update numbering state
-            level_state = numbering_states[list_context]
-            
-            # Reset higher levels if we're going back to a lower level
-            for l in range(ilvl + 1, 10):  # Assuming max 10 levels
-                if l in level_state:
-                    del level_state[l]
-                    
-            # Initialize or increment current level
-            if ilvl not in level_state:
-                level_state[ilvl] = 0
-            level_state[ilvl] += 1
-            
-            # Return ONLY the current level's number (not the full hierarchy)
-            current_number = self._format_number(level_state[ilvl], num_format)
-            
-            return current_number + ".", list_context
+            return self._number_paragraph(numbering, numbering_states, current_list_context, numId, ilvl)
             
         except (AttributeError, TypeError, KeyError):
-            return "", current_list_context
+            return "", current_list_context, None
 
-    def _continue_current_numbering(self, list_context, numbering_states):
+    @classmethod
+    def _number_paragraph(cls, numbering: NumberingModel, numbering_states, current_list_context, numId, ilvl) -> tuple:
         """
-        Continue the current numbering without incrementing the level.
-        Returns only the current level's number.
+        The numbering state machine of get_paragraphs, for a paragraph whose <w:numPr> has numId / ilvl.
+        Returns (label, list context, level).
         """
-        if list_context not in numbering_states:
-            return ""
+        # Find the abstract numbering definition
+        abstract_num_id = numbering.abstract_num_id(numId)
+        if abstract_num_id is None:
+            return "", current_list_context, None
             
-        level_state = numbering_states[list_context]
-        if not level_state:
-            return ""
+        # Create a key for this numbering context
+        list_context = (numId, abstract_num_id)
+        
+        # Initialize numbering state if it doesn't exist
+        if list_context not in numbering_states:
+            numbering_states[list_context] = {}
             
-        # Find the highest level with a value (current level)
-        if not level_state:
-            return ""
+        # Get numbering format for this level (a <w:lvlOverride> takes precedence)
+        level = numbering.level(numId, ilvl)
+        num_format = level.fmt if level is not None else None
+        if not num_format:
+            return "", list_context, None
             
-        current_level = max(level_state.keys())
-        current_number = level_state[current_level]
+        # Update numbering state
+        level_state = numbering_states[list_context]
         
-        # Get numbering format for current level
-        numbering_part = self._doc.part.numbering_part
-        if numbering_part is None:
-            return ""
-            
-        abstract_num_id = list_context[1]
-        num_format = self._get_number_format(numbering_part, abstract_num_id, current_level)
+        # Reset higher levels if we're going back to a lower level
+        for l in range(ilvl + 1, 10):  # Assuming max 10 levels
+            if l in level_state:
+                del level_state[l]
+                
+        # Initialize or increment current level
+        if ilvl not in level_state:
+            level_state[ilvl] = 0
+        level_state[ilvl] += 1
         
-        # Format only the current level's number
-        formatted_number = self._format_number(current_number, num_format or "decimal")
+        # Return ONLY the current level's number (not the full hierarchy)
+        current_number = cls._format_number(level_state[ilvl], num_format)
         
-        return formatted_number + "."
-
-    def _get_abstract_num_id(self, numbering_part, numId):
-        """Get the abstract numbering ID for a concrete numbering ID."""
-        for num in numbering_part.element.findall(qn('w:num')):
-            if num.get(qn('w:numId')) == str(numId):
-                abstractNumId = num.find(qn('w:abstractNumId'))
-                if abstractNumId is not None:
-                    return abstractNumId.get(qn('w:val'))
-        return None
-
-    def _get_number_format(self, numbering_part, abstract_num_id, ilvl):
-        """Get the number format for a specific level in a numbering definition."""
-        for abstractNum in numbering_part.element.findall(qn('w:abstractNum')):
-            if abstractNum.get(qn('w:abstractNumId')) == abstract_num_id:
-                for lvl in abstractNum.findall(qn('w:lvl')):
-                    if lvl.get(qn('w:ilvl')) == str(ilvl):
-                        numFmt = lvl.find(qn('w:numFmt'))
-                        if numFmt is not None:
-                            return numFmt.get(qn('w:val'))
-        return None
+        return current_number + ".", list_context, ilvl
 
-    def _format_number(self, number, num_format):
+    @classmethod
+    def _format_number(cls, number, num_format):
         """Format a number according to the specified format."""
         format_map = {
             'decimal': str(number),
-            'lowerLetter': self._number_to_letters(number).lower(),
-            'upperLetter': self._number_to_letters(number),
-            'lowerRoman': self._number_to_roman(number).lower(),
-            'upperRoman': self._number_to_roman(number),
+            'lowerLetter': cls._number_to_letters(number).lower(),
+            'upperLetter': cls._number_to_letters(number),
+            'lowerRoman': cls._number_to_roman(number).lower(),
+            'upperRoman': cls._number_to_roman(number),
             'bullet': '•',
         }
         
         return format_map.get(num_format, str(number))
 
-    def _number_to_letters(self, num):
+    @staticmethod
+    def _number_to_letters(num):
         """Convert a number to letters (1 = A, 2 = B, ..., 27 = AA, etc.)."""
         letters = ''
         while num > 0:
@@ -670,7 +1020,8 @@ class document:
             letters = chr(65 + remainder) + letters
         return letters
 
-    def _number_to_roman(self, num):
+    @staticmethod
+    def _number_to_roman(num):
         """Convert a number to Roman numerals."""
         val = [
             1000, 900, 500, 400,
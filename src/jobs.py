@@ -0,0 +1,122 @@
+# in-process job queue for the server: a bounded worker pool, no external broker
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when max_queued jobs are already waiting for a worker"""
+
+
+class Job:
+    def __init__(self, func: Callable[..., Any], args: tuple) -> None:
+        self.id = uuid.uuid4().hex
+        self.func = func
+        self.args = args
+        self.status = QUEUED
+        self.result: Any = None
+        self.error: str | None = None
+        self.submitted_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def timings(self) -> dict[str, float | None]:
+        """Seconds spent waiting in the queue, running, and in total (None while not reached yet)"""
+        now = time.time()
+        queued = (self.started_at or now) - self.submitted_at
+        running = (self.finished_at or now) - self.started_at if self.started_at is not None else None
+        total = (self.finished_at - self.submitted_at) if self.finished_at is not None else None
+        return {"queued": queued, "running": running, "total": total}
+
+
+class JobQueue:
+    """
+    Runs submitted callables on a fixed number of worker threads.
+    Jobs beyond the worker count wait in the executor's queue, at most max_queued of them
+    (None: no limit); finished jobs are kept (oldest evicted first) so that their status and
+    result can still be fetched.
+    """
+
+    def __init__(self, workers: int = 2, max_finished: int = 256, max_queued: int | None = None) -> None:
+        self.workers = max(1, workers)
+        self.max_finished = max_finished
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="reso-job")
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._queued = 0
+        self._lock = threading.Lock()
+
+    def submit(self, func: Callable[..., Any], *args) -> Job:
+        """Queue func(*args); QueueFull if max_queued jobs are already waiting"""
+        job = Job(func, args)
+        with self._lock:
+            if self.max_queued is not None and self._queued >= self.max_queued:
+                raise QueueFull(f"{self._queued} jobs are waiting")
+            self._queued += 1
+            self._jobs[job.id] = job
+            self._evict()
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a worker"""
+        with self._lock:
+            return self._queued
+
+    def estimated_wait(self) -> float:
+        """Seconds until a worker takes a newly submitted job, from the run times of the finished jobs kept"""
+        with self._lock:
+            runs = [job.finished_at - job.started_at for job in self._jobs.values()
+                    if job.finished_at is not None and job.started_at is not None]
+            queued = self._queued
+        mean = sum(runs) / len(runs) if runs else 1.0
+        return (queued + 1) * mean / self.workers
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return {"workers": self.workers, **counts}
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job) -> None:
+        with self._lock:
+            self._queued -= 1
+        job.started_at = time.time()
+        job.status = RUNNING
+        try:
+            job.result = job.func(*job.args)
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            job.func, job.args = None, ()  # type: ignore # drop references to the inputs
+            with self._lock:
+                self._evict()
+
+    def _evict(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
@@ -1,15 +1,37 @@
+# `python -m src.main ...` hands the run to the resident daemon (src/daemon.py) if one is listening,
+# before paying for the imports below
+if __name__ == "__main__":
+    import sys as _sys
+    from src.daemon import run_client
+    _code = run_client(_sys.argv[1:])
+    if _code is not None:
+        _sys.exit(_code)
+
 from docx.api import Document
 from docx.opc.exceptions import PackageNotFoundError
 import src.document as doc
+from src.reader import DocxReader
+from src.writer import write_docx
 from pathlib import Path
 from src.core.resolution import *
+from src.utils.phrase_matcher import PhraseAutomaton
+from src.rules import CompiledRules, RuleRegistry, registry as default_rules, profiles
+from src.cache import LRUCache
+from src.profiling import span, stage, recording, Timings
 import re
 import roman
-from typing import Generic, TypeVar, cast, Callable
-import json
+from typing import Generic, TypeVar, cast, Callable, IO, Any, Iterator, NamedTuple
+import functools
+import sys
+from contextlib import nullcontext
 from colorama import Fore, Back, init, Style
 import argparse
 import os
+import glob
+import time
+import cProfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import freeze_support
 from sys import exit
 init() # colorama
 
@@ -17,31 +39,22 @@ verbose: bool = False
 
 # ==== CONFIG ====
 
-preamb_config_path = Path("./src/config/preambs/config.json")
-operationals_config_path = Path("./src/config/operationals/config.json")
-
-preamb_config: dict[str, list[str] | str | dict] = {}
-with preamb_config_path.open("r", encoding="utf-8") as f:
-    preamb_config = json.load(f)
-
-operationals_config: dict[str, list[str] | str | dict] = {}
-with operationals_config_path.open("r", encoding="utf-8") as f:
-    operationals_config = json.load(f)
-
-preamb_phrases = sorted(preamb_config.get('preambs_phrases', []))
-operationals_phrases = sorted(cast(list[str], operationals_config.get('operationals_phrases', [])))
-list_phrases = sorted(operationals_config.get("list_phrases", []))
-
-if preamb_phrases == []:
-    print(f"{Fore.RED}Warning: no preamb phrases loaded{Style.RESET_ALL}")
-if operationals_phrases == []:
-    print(f"{Fore.RED}Warning: no operational phrases loaded{Style.RESET_ALL}")
-if list_phrases == []:
-    print(f"{Fore.RED}Warning: no list phrases loaded{Style.RESET_ALL}")
-
-if verbose: print(f"{Fore.GREEN}{len(preamb_phrases)} preamb phrases loaded.{Style.RESET_ALL}")
-if verbose: print(f"{Fore.GREEN}{len(operationals_phrases)} operational phrases loaded.{Style.RESET_ALL}")
-if verbose: print(f"{Fore.GREEN}{len(list_phrases)} list phrases loaded.{Style.RESET_ALL}")
+# phrase lists and matchers live in the rule registry and are only loaded when a document is parsed
+rules: RuleRegistry = default_rules
+
+# names that used to be module-level globals loaded at import time; resolved lazily from the registry
+_RULE_ATTRIBUTES = {
+    "preamb_config", "operationals_config",
+    "preamb_phrases", "operationals_phrases", "list_phrases",
+    "preamb_trie", "operationals_automaton", "list_suffix_index",
+}
+
+def __getattr__(name: str):
+    if name in _RULE_ATTRIBUTES:
+        return getattr(rules.compiled, name)
+    if name == "rules_fingerprint":
+        return rules.fingerprint
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 # ====
 
 # print("Loading language package. This may take a while.")
@@ -145,366 +158,521 @@ class ResolutionComponent(Generic[T]):
             return [item.strip() for item in first.split(delimiter)] # type: ignore
         return self.getValues()
 
-def parseToResolution (doc: doc.document)\
-      -> tuple[Resolution, dict[str, _rc_t], list[ResolutionParsingError]]:
-    # TODO: implement security council formatting
-    paragraphs = doc.get_paragraphs()
+# ==== HEADER FIELDS ====
 
-    components: dict[str, ResolutionComponent[_rc_inner_t]] = {}
-    errorList: list[ResolutionParsingError] = []
-
-    # make patterns more permissive (allow colon, dash, or whitespace separators)
-    components['committee'] = cast(_rc_t, ResolutionComponent[str](patterns=[
+# make patterns more permissive (allow colon, dash, or whitespace separators)
+header_patterns: dict[str, list[str]] = {
+    'committee': [
         r'committee\s*[:\-\s]\s*(.*)', r'committee[:\-\s]*(.*)',
         r'submitted to\s*[:\-\s]\s*(.*)', r'submitted to[:\-\s]*(.*)',
         r'forum\s*[:\-\s]\s*(.*)', r'forum[:\-\s]*(.*)',
-    ]))
-
-    components['mainSubmitter'] = cast(_rc_t, ResolutionComponent[str](patterns=[
+    ],
+    'mainSubmitter': [
         r'main[\s\-]*submitter[s]?\s*[:\-\s]\s*(.*)',
         r'main[\s\-]*submitter[s]?\s*[:\-\s]*(.*)',
         r'main[\s\-]*submitted by[s]?\s*[:\-\s]\s*(.*)',
         r'main[\s\-]*submitted by[s]?\s*[:\-\s]*(.*)',
         r'submitted by[s]?\s*[:\-\s]*(.*)',
         r'submitted by[s]?\s*[:\-\s]\s*(.*)'
-    ]))
-
-    components['coSubmitters'] = cast(_rc_t, ResolutionComponent[str](patterns=[
-        r'co[\s\-]*submitter[s]?\s*[:\-\s]\s*(.*)', 
+    ],
+    'coSubmitters': [
+        r'co[\s\-]*submitter[s]?\s*[:\-\s]\s*(.*)',
         r'co[\s\-]*submitter[s]?\s*[:\-\s]*(.*)',
-        r'cosubmitter[s]?\s*[:\-\s]\s*(.*)', 
+        r'cosubmitter[s]?\s*[:\-\s]\s*(.*)',
         r'cosubmitter[s]?\s*[:\-\s]*(.*)',
         r'co[\s\-]*submitted\s+by\s*[:\-\s]?\s*(.*)',
         r'co[\s\-]*submitted\s+by\s*(.*)',
-    ]))
-
-    components['topic'] = cast(_rc_t, ResolutionComponent[str](patterns=[
+    ],
+    'topic': [
         r'topic[s]?\s*[:\-\s]\s*(.*)', r'topic[s]?\s*[:\-\s]*(.*)',
         r'subject[s]?\s*[:\-\s]\s*(.*)', r'subject[s]?\s*[:\-\s]*(.*)',
         r'question of[s]?\s*[:\-\s]\s*(.*)', r'question of[s]?\s*[:\-\s]*(.*)',
-    ]))
-
-    listPreambs: list[preamb] = []
-    listOperationals: list[clause] = []
-
-    def sanitize_text(s: str) -> str:
-        """Trim whitespace, collapse duplicate punctuation, strip trailing commas/semicolons/colons and extra spaces."""
-        if s is None:
-            return ""
-        s = s.strip()
-        # replace multiple commas or semicolons with single
-        while ',,' in s:
-            s = s.replace(',,', ',')
-        while ';;' in s:
-            s = s.replace(';;', ';')
-        # remove trailing punctuation that should not remain
-        s = s.rstrip(' ,;:')
-        # collapse multiple spaces
-        s = re.sub(r'\s+', ' ', s)
-        return s
-    
-    def normalize_committee(name: str) -> str:
-        # Also remove parentheses from the comparison text to ensure a match
-        name = re.sub(r'\s*\([^)]*\)', '', name)
-        return name.strip().lower()
+    ],
+}
+HEADER_FIELDS: tuple[str, ...] = tuple(header_patterns)
+
+@functools.cache
+def _header_regex(fields: tuple[str, ...]) -> re.Pattern:
+    """
+    One alternation over the patterns of the given header fields. Every pattern captures
+    its value in a group named `<field>__<n>`, so `lastgroup` tells which field matched.
+    """
+    alternatives = []
+    for field in fields:
+        for n, pattern in enumerate(header_patterns[field]):
+            assert pattern.endswith('(.*)'), pattern
+            alternatives.append(f"{pattern[:-len('(.*)')]}(?P<{field}__{n}>.*)")
+    return re.compile('|'.join(alternatives), re.IGNORECASE)
 
-    def is_intro_line(text: str, committee_name: str) -> bool:
-        # Strip trailing punctuation/space and parentheses from the line to match normalized committee
-        norm_text = re.sub(r'[,\s]+$', '', text.strip())
-        norm_text = re.sub(r'\s*\([^)]*\)', '', norm_text).lower()
-        norm_committee = normalize_committee(committee_name)
-        return norm_text == f"the {norm_committee}"
+_header_regex(HEADER_FIELDS) # compiled at import, subsets compile on first use
 
+def match_header_field(text: str, fields: tuple[str, ...] = HEADER_FIELDS) -> tuple[str, str] | None:
+    """
+    Scan a line once for any of the given header fields.
 
-    def _preambs_match_function(text: str) -> tuple[preamb | None, bool]:
+    Returns:
+    (field, value) -> the (leftmost) field label found in the line and the text after it
+    None           -> the line is not a header line
+    """
+    if not fields:
+        return None
+    m = _header_regex(fields).search(text)
+    if m is None or m.lastgroup is None:
+        return None
+    return m.lastgroup.split('__')[0], m.group(m.lastgroup).strip()
+
+def sanitize_text(s: str) -> str:
+    """Trim whitespace, collapse duplicate punctuation, strip trailing commas/semicolons/colons and extra spaces."""
+    if s is None:
+        return ""
+    s = s.strip()
+    # replace multiple commas or semicolons with single
+    while ',,' in s:
+        s = s.replace(',,', ',')
+    while ';;' in s:
+        s = s.replace(';;', ';')
+    # remove trailing punctuation that should not remain
+    s = s.rstrip(' ,;:')
+    # collapse multiple spaces
+    s = re.sub(r'\s+', ' ', s)
+    return s
+
+# a numbered / lettered / roman operational line, never a preamb
+_NUMBERED_PREFIX = re.compile(r'^\s*(\d+[\.\)]|\(?[A-Za-z][\.\)]|\(?[ivxIVX]+\s*[\.\)])')
+_CLAUSE_LINE = re.compile(r'^\s*(\d+)\s*[\.\)]\s*(.+)$')
+_SUBSUBCLAUSE_LINE = re.compile(r'^\s*\(?([ivxIVX]{1,4})\)?\s*[\.\)]\s*(.+)$')
+_SUBCLAUSE_LINE = re.compile(r'^\s*\(?([A-Za-z])\)?\s*[\.\)]\s*(.+)$')
+
+class LineClass(NamedTuple):
+    """
+    What a stripped line is, from its text and the rules alone, so it can be shared between documents.
+    Whether it is the intro line, and where it attaches, depends on the document and is decided by the parser.
+    """
+    preamb: tuple[str, str] | None # (phrase, remainder) if the line reads as a preamb
+    marker: str | None  # 'clause', 'subsubclause', 'subclause', or None for a continuation line
+    label: str          # the clause number, roman numeral or subclause letter
+    verb: str           # clause verb ("" if none was found)
+    text: str           # sanitized body (after the verb for a clause)
+
+def _find_first_operational_phrase(text: str, matcher: PhraseAutomaton) -> tuple[str | None, str, bool]:
+    if not len(matcher):
+        return (None, text, False)
+    # the automaton prefers a phrase at the start (allowing leading punctuation/quotes), then the
+    # longest one that is not part of a numbered/lettered prefix (so we don't pick up internal
+    # words from subclauses accidentally)
+    found = matcher.search(text)
+    if found is None:
+        return (None, text, False)
+    start_idx, end_idx, at_start = found
+    rest = text[end_idx:].lstrip(" \t\n\r:;,-—–.()[]\"'")
+    rest = sanitize_text(strip_punctuations(rest))
+    return (text[start_idx:end_idx], rest, at_start)
+
+def _split_preamb(raw: str, compiled: CompiledRules) -> tuple[str, str] | None:
+    # If the line appears to be a numbered / lettered / roman operational line,
+    # don't try to treat it as a preamb.
+    if _NUMBERED_PREFIX.match(raw):
+        return None
+    # The trie picks the longest phrase so we don't prematurely match a short phrase that's
+    # a substring of a longer one.
+    m = compiled.preamb_trie.match(raw)
+    if m:
+        phrase, remainder = m
+        return (phrase, sanitize_text(strip_punctuations(remainder.strip())))
+    # Header-like lines that end with comma/colon and are not numbered -> treat as preamb header
+    if raw.endswith(',') or raw.endswith(':'):
+        head = raw.rstrip(',;:').strip()
+        # ensure it's not a numbered/lettered/roman header
+        if not _NUMBERED_PREFIX.match(head):
+            return (head, "")
+    return None
+
+def _split_operational(raw: str, compiled: CompiledRules) -> tuple[str | None, str, str, str]:
+    # Top-level clause detection (Arabic numerals)
+    m = _CLAUSE_LINE.match(raw)
+    if m:
+        body = m.group(2).strip()
+        # detect verb phrase using operationals_phrases
+        verb_phrase, rest_of_sentence, at_start = _find_first_operational_phrase(body, compiled.operationals_automaton)
+        if verb_phrase:
+            return ('clause', m.group(1), sanitize_text(verb_phrase.strip()), sanitize_text(rest_of_sentence if rest_of_sentence else ""))
+        return ('clause', m.group(1), "", sanitize_text(body))
+    # Sub-subclause detection: roman numerals (i, ii, iii, ...)
+    m = _SUBSUBCLAUSE_LINE.match(raw)
+    if m:
+        return ('subsubclause', m.group(1), "", sanitize_text(m.group(2).strip()))
+    # Subclause detection: single letter like "a." or "(a)"
+    m = _SUBCLAUSE_LINE.match(raw)
+    if m:
+        return ('subclause', m.group(1), "", sanitize_text(m.group(2).strip()))
+    return (None, "", "", raw)
+
+# boilerplate preambs and clauses recur across the drafts of a committee: their classification is
+# kept per (rules fingerprint, line) for every document this process parses
+CLASSIFY_CACHE_ENTRIES = 8192
+CLASSIFY_CACHE_BYTES = 16 * 1024 * 1024
+classify_cache = LRUCache(CLASSIFY_CACHE_ENTRIES, CLASSIFY_CACHE_BYTES)
+
+def classify_line(raw: str, compiled: CompiledRules, cache: LRUCache | None = None) -> LineClass:
+    """Classify a stripped line, through cache (default: the shared classify_cache)"""
+    if cache is None:
+        cache = classify_cache
+    key = (compiled.fingerprint, raw)
+    found = cache.get(key)
+    if found is None:
+        found = LineClass(_split_preamb(raw, compiled), *_split_operational(raw, compiled))
+        # approximate: the key and every string in the entry, plus the tuples around them
+        size = 2 * sys.getsizeof(raw) + sum(sys.getsizeof(s) for s in found[1:]) + 200
+        cache.put(key, found, size)
+    return found
+
+class ParsedComponent(NamedTuple):
+    """One item yielded by iterParse"""
+    kind: str   # a header field ('committee', 'mainSubmitter', 'coSubmitters', 'topic'), 'preamb', 'clause' or 'error'
+    value: Any  # the header text, a preamb, a clause or a ResolutionParsingError
+    paragraph: doc.ParagraphRecord | None # the paragraph it starts at, None for end-of-document errors
+
+class ResolutionParser:
+    """
+    Parses documents into resolutions. A parser holds its own options and rules, and every call
+    keeps its state to itself, so one parser (or several) can be used from many threads at once.
+
+    rules: the phrase rules to match with (default: the shared registry)
+    verbose: print every line as it is read
+    cache: the line classification cache (default: the shared classify_cache)
+    """
+
+    def __init__(self, rules: RuleRegistry | None = None, verbose: bool = False, cache: LRUCache | None = None) -> None:
+        self.rules = rules if rules is not None else default_rules
+        self.verbose = verbose
+        self._cache = cache
+
+    @property
+    def cache(self) -> LRUCache:
+        # the shared cache is looked up on use, the server may replace it after import
+        return self._cache if self._cache is not None else classify_cache
+
+    def iterParse(self, doc: doc.document | DocxReader) -> Iterator[ParsedComponent]:
         """
-        Parse one line of preambular text.
+        Parse a document incrementally, reading its paragraphs as a stream.
 
-        Returns:
-        (preamb_obj, True)  -> created a valid preambular clause
-        (preamb_obj, False) -> could not match
+        Header fields and preambs are yielded as soon as their line is read, a clause once it is
+        complete (the next clause starts or the document ends); parser errors are yielded where
+        they happen and missing required fields at the end. A caller can stop at any point,
+        e.g. after the header block, and the rest of the document is never parsed.
         """
-        raw = text.strip()
-        if not raw:
-            return (preamb("__EMPTY__", ""), False)
-        if is_intro_line(raw, cast(str, components['committee'].getValues()[0])):
-            return None, False
-        # If the line appears to be a numbered / lettered / roman operational line,
-        # don't try to treat it as a preamb.
-        if re.match(r'^\s*(\d+[\.\)]|\(?[A-Za-z][\.\)]|\(?[ivxIVX]+\s*[\.\)])', raw):
-            return (preamb("__SKIP__", raw), False)
-
-        # Try longest phrases first so we don't prematurely match a short phrase that's
-        # a substring of a longer one.
-        for phrase in sorted(set(preamb_phrases), key=len, reverse=True):
-            ph_esc = re.escape(phrase)
-            # match phrase at start (optionally preceded by quotes/parentheses) and capture remainder
-            # pattern = rf'^\s*[\(\["\']*\s*{ph_esc}\b(?:\s+(.*?))?\s*[,;]?\s*$'
-            pattern = rf'^\s*[\(\["\']*\s*{ph_esc}\b[ ,]*(.*)$'
-            m = re.match(pattern, raw, flags=re.IGNORECASE)
-            if m:
-                remainder = (m.group(1) or "").strip()
-                remainder = sanitize_text(strip_punctuations(remainder))
-                p = preamb(phrase, remainder)
-                listPreambs.append(p)
-                return (p, True)
-
-        # Header-like lines that end with comma/colon and are not numbered -> treat as preamb header
-        if raw.endswith(',') or raw.endswith(':'):
-            head = raw.rstrip(',;:').strip()
-            # ensure it's not a numbered/lettered/roman header
-            if not re.match(r'^\s*(\d+[\.\)]|\(?[A-Za-z][\.\)]|\(?[ivxIVX]+\s*[\.\)])', head):
-                p = preamb(head, "")
-                listPreambs.append(p)
-                return (p, True)
-
-        # No match
-        return (preamb("__ERROR__", raw), False)
-
-    def dedupe_preserve_order(seq):
-        seen = set()
-        out = []
-        for s in seq:
-            if s not in seen:
-                seen.add(s)
-                out.append(s)
-        return out
-
-    def _find_first_operational_phrase(text: str, phrases: list[str]) -> tuple[str | None, str, bool]:
-        if not phrases:
-            return (None, text, False)
-        sorted_phrases = sorted(set(phrases), key=lambda s: len(s), reverse=True)
-        orig = text
-        # first try to match phrase at start (allow leading punctuation/quotes)
-        for ph in sorted_phrases:
-            ph_esc = re.escape(ph)
-            pattern_start = rf'^\s*[\(\["\']*\s*({ph_esc})\b'
-            m = re.search(pattern_start, orig, flags=re.IGNORECASE)
-            if m:
-                start_idx = m.start(1)
-                end_idx = m.end(1)
-                rest = orig[end_idx:].lstrip(" \t\n\r:;,-—–.()[]\"'")
-                rest = sanitize_text(strip_punctuations(rest))
-                return (orig[start_idx:end_idx], rest, True)
-
-        # If no start matches, search for the first occurrence but ensure it's not part of a
-        # numbered/lettered prefix (so we don't pick up internal words from subclauses accidentally).
-        for ph in sorted_phrases:
-            ph_esc = re.escape(ph)
-            pattern_any = rf'\b({ph_esc})\b'
-            m = re.search(pattern_any, orig, flags=re.IGNORECASE)
-            if m:
-                # ensure the match isn't inside a leading clause marker like "1." or "a)"
-                prefix = orig[:m.start(1)]
-                if re.search(r'^\s*$', prefix) or not re.search(r'[\dA-Za-z\)\.]\s*$', prefix):
-                    rest = orig[m.end(1):].lstrip(" \t\n\r:;,-—–.()[]\"'")
-                    rest = sanitize_text(strip_punctuations(rest))
-                    return (orig[m.start(1):m.end(1)], rest, False)
-        return (None, text, False)
+        # TODO: implement security council formatting
+        # one snapshot for the whole document, even if the rules are reloaded meanwhile
+        compiled = self.rules.compiled
+        cache = self.cache
+
+        # header values found so far (each field is only taken once)
+        headers: dict[str, list[str]] = {field: [] for field in HEADER_FIELDS}
+
+        def normalize_committee(name: str) -> str:
+            # Also remove parentheses from the comparison text to ensure a match
+            name = re.sub(r'\s*\([^)]*\)', '', name)
+            return name.strip().lower()
+
+        def is_intro_line(text: str, committee_name: str) -> bool:
+            # Strip trailing punctuation/space and parentheses from the line to match normalized committee
+            norm_text = re.sub(r'[,\s]+$', '', text.strip())
+            norm_text = re.sub(r'\s*\([^)]*\)', '', norm_text).lower()
+            norm_committee = normalize_committee(committee_name)
+            return norm_text == f"the {norm_committee}"
+
+
+        def _preambs_match_function(text: str, line: LineClass) -> tuple[preamb | None, bool]:
+            """
+            Parse one line of preambular text.
+
+            Returns:
+            (preamb_obj, True)  -> created a valid preambular clause
+            (preamb_obj, False) -> could not match
+            """
+            raw = text.strip()
+            if not raw:
+                return (preamb("__EMPTY__", ""), False)
+            if is_intro_line(raw, headers['committee'][0]):
+                return None, False
+            if line.preamb is None:
+                return (preamb("__ERROR__", raw), False)
+            return (preamb(*line.preamb), True)
+
+        # clause numbering and the clause / subclause lines attach to, for this document only
+        st: dict[str, Any] = {
+            "clause_counter"        : 0,
+            "subclause_counter"     : 0,
+            "subsubclause_counter"  : 0,
+            "current_clause"        : None,
+            "current_subclause"     : None,
+            "current_subsubclause"  : None,
+        }
+
+        def _operationals_match_function(text: str, line: LineClass) -> tuple[clause, bool]:
+            raw = text.strip()
+            if not raw:
+                return (st["current_clause"] if st["current_clause"] is not None else clause(0, "__EMPTY__", "__EMPTY__"), False)
+
+            def roman_to_int_lower(s: str) -> int | None:
+                try:
+                    return roman.fromRoman(s.upper())
+                except Exception:
+                    return None
+
+            # Top-level clause detection (Arabic numerals)
+            if line.marker == 'clause':
+                try:
+                    idx = int(line.label)
+                except Exception:
+                    st["clause_counter"] += 1
+                    idx = st["clause_counter"]
+
+                st["clause_counter"] = max(st["clause_counter"], idx)
+
+                new_clause = clause(idx, verb=line.verb, text=line.text)
+                st["current_clause"      ] = new_clause
+                st["current_subclause"   ] = None
+                st["current_subsubclause"] = None
+                st["subclause_counter"   ] = 0
+                st["subsubclause_counter"] = 0
 
-    def _operationals_match_function(text: str) -> tuple[clause, bool]:
-        global verbose
-
-        # persistent state stored on the function object
-        if not hasattr(_operationals_match_function, "state"):
-            _operationals_match_function.state = { # type: ignore
-                "clause_counter"        : 0,
-                "subclause_counter"     : 0,
-                "subsubclause_counter"  : 0,
-                "current_clause"        : None,
-                "current_subclause"     : None,
-                "current_subsubclause"  : None,
-            }
-        st = _operationals_match_function.state # type: ignore
-
-        raw = text.strip()
-        if not raw:
-            return (st["current_clause"] if st["current_clause"] is not None else clause(0, "__EMPTY__", "__EMPTY__"), False)
-
-        def roman_to_int_lower(s: str) -> int | None:
-            try:
-                return roman.fromRoman(s.upper())
-            except Exception:
-                return None
-
-        # Top-level clause detection (Arabic numerals)
-        m_clause = re.match(r'^\s*(\d+)\s*[\.\)]\s*(.+)$', raw)
-        if m_clause:
-            num = m_clause.group(1)
-            body = m_clause.group(2).strip()
-            try:
-                idx = int(num)
-            except Exception:
-                st["clause_counter"] += 1
-                idx = st["clause_counter"]
-
-            st["clause_counter"] = max(st["clause_counter"], idx)
-
-            # detect verb phrase using operationals_phrases (if available)
-            try:
-                phrases = operationals_phrases
-            except NameError:
-                phrases = []
-
-            verb_phrase, rest_of_sentence, at_start = _find_first_operational_phrase(body, phrases)
-            if verb_phrase:
-                verb = sanitize_text(verb_phrase.strip())
-                clause_text = sanitize_text(rest_of_sentence if rest_of_sentence else "")
-            else:
-                verb = ""#clause verb"
-                clause_text = sanitize_text(body)
-
-            new_clause = clause(idx, verb=verb, text=clause_text)
-            st["current_clause"      ] = new_clause
-            st["current_subclause"   ] = None
-            st["current_subsubclause"] = None
-            st["subclause_counter"   ] = 0
-            st["subsubclause_counter"] = 0
-
-            try:
-                listOperationals.append(new_clause)
-            except NameError:
-                pass
-
-            return (new_clause, True)
-
-        # Sub-subclause detection: roman numerals (i, ii, iii, ...)
-        m_ssc = re.match(r'^\s*\(?([ivxIVX]{1,4})\)?\s*[\.\)]\s*(.+)$', raw)
-        if m_ssc:
-            roman_str = m_ssc.group(1)
-            body = sanitize_text(m_ssc.group(2).strip())
-            roman_idx = roman_to_int_lower(roman_str)
-            if st["current_subclause"] is not None:
-                idx = roman_idx if roman_idx is not None else (st["subsubclause_counter"] + 1)
-                st["subsubclause_counter"] += 1
-                new_ssc = subsubclause(idx, text=body)
-                st["current_subclause"   ].append(new_ssc)
-                st["current_subsubclause"] = new_ssc
-                return (st["current_clause"], False)
-            # fallback: create a new subclause and attach this as its first sub-subclause
-            if st["current_clause"] is not None:
-                st["subclause_counter"] += 1
-                new_sub = subclause(st["subclause_counter"], text=body)
+                return (new_clause, True)
+
+            # Sub-subclause detection: roman numerals (i, ii, iii, ...)
+            if line.marker == 'subsubclause':
+                body = line.text
+                roman_idx = roman_to_int_lower(line.label)
+                if st["current_subclause"] is not None:
+                    idx = roman_idx if roman_idx is not None else (st["subsubclause_counter"] + 1)
+                    st["subsubclause_counter"] += 1
+                    new_ssc = subsubclause(idx, text=body)
+                    st["current_subclause"   ].append(new_ssc)
+                    st["current_subsubclause"] = new_ssc
+                    return (st["current_clause"], False)
+                # fallback: create a new subclause and attach this as its first sub-subclause
+                if st["current_clause"] is not None:
+                    st["subclause_counter"] += 1
+                    new_sub = subclause(st["subclause_counter"], text=body)
+                    st["current_clause"      ].listsubclauses.append(new_sub)
+                    st["current_subclause"   ] = new_sub
+                    st["current_subsubclause"] = None
+                    st["subsubclause_counter"] = 0
+                    return (st["current_clause"], False)
+
+            # Subclause detection: single letter like "a." or "(a)"
+            if line.marker == 'subclause' and st["current_clause"] is not None:
+                letter = line.label.lower()
+                body = line.text
+                if letter.isalpha() and len(letter) == 1:
+                    idx = ord(letter) - ord('a') + 1
+                else:
+                    st["subclause_counter"] += 1
+                    idx = st["subclause_counter"]
+
+                new_sub = subclause(idx, text=body)
                 st["current_clause"      ].listsubclauses.append(new_sub)
                 st["current_subclause"   ] = new_sub
                 st["current_subsubclause"] = None
                 st["subsubclause_counter"] = 0
                 return (st["current_clause"], False)
 
-        # Subclause detection: single letter like "a." or "(a)"
-        m_sub = re.match(r'^\s*\(?([A-Za-z])\)?\s*[\.\)]\s*(.+)$', raw)
-        if m_sub and st["current_clause"] is not None:
-            letter = m_sub.group(1).lower()
-            body = sanitize_text(m_sub.group(2).strip())
-            if letter.isalpha() and len(letter) == 1:
-                idx = ord(letter) - ord('a') + 1
+            # Continuation: append to most recent item
+            cont = raw
+            if st["current_subsubclause"] is not None:
+                combined = sanitize_text(strip_punctuations(st["current_subsubclause"].text + " " + cont))
+                st["current_subsubclause"].text = combined
+                return (st["current_clause"], False)
+            if st["current_subclause"] is not None:
+                combined = sanitize_text(strip_punctuations(st["current_subclause"].text + " " + cont))
+                st["current_subclause"].text = combined
+                return (st["current_clause"], False)
+            if st["current_clause"] is not None:
+                combined = sanitize_text(strip_punctuations(st["current_clause"].text + " " + cont))
+                st["current_clause"].text = combined
+                return (st["current_clause"], False)
+
+            # nothing matched
+            return (clause(0, "__ERROR__", raw), False)
+
+        # ====== Main Loop ======
+        pending_fields = HEADER_FIELDS
+        # the clause being built; subclauses and continuation lines still attach to it
+        pending_clause: ParsedComponent | None = None
+        matchFuncs = (('preambs', _preambs_match_function), ('operationals', _operationals_match_function))
+        for index, record in enumerate(doc.get_paragraphs()):
+            line = record.line
+            text = line.strip()
+            if not text: continue
+            if self.verbose: print(f"{Fore.MAGENTA}{index:3}{Style.RESET_ALL}| {line}")
+
+            # classify inside the span, yield outside it (the consumer's time between lines isn't ours)
+            emitted: list[ParsedComponent] = []
+            with span("classify lines"):
+                # 1. Check Headers First (one regex scan over the fields not found yet)
+                found = match_header_field(text, pending_fields)
+                if found is not None:
+                    field, value = found
+                    headers[field].append(value)
+                    pending_fields = tuple(f for f in pending_fields if f != field)
+                    emitted.append(ParsedComponent(field, value, record))
+                else:
+                    # 2. Check Structural Components (MatchFunc-based)
+                    line_class = classify_line(text, compiled, cache)
+                    for componentName, matchFunc in matchFuncs:
+                        try:
+                            val, ok = matchFunc(text, line_class)
+                        except Exception as e:
+                            emitted.append(ParsedComponent('error', ResolutionParsingError(f"{componentName} parser exception: {e}", index + 1), record))
+                            continue
+                        # Only take it if it's a valid structural match
+                        if ok and val is not None:
+                            if componentName == 'preambs':
+                                emitted.append(ParsedComponent('preamb', val, record))
+                            else:
+                                if pending_clause is not None:
+                                    emitted.append(pending_clause)
+                                pending_clause = ParsedComponent('clause', val, record)
+                            break # Stop looking once a line is claimed as a clause/preamb
+            yield from emitted
+
+        if pending_clause is not None:
+            yield pending_clause
+
+        # Add errors if key header components were never found at all
+        for cname in ["committee", "mainSubmitter", "topic"]:
+            if not headers[cname]:
+                yield ParsedComponent('error', ResolutionParsingError(f"Missing required field: {cname}", -1), None)
+
+    @stage("build resolution")
+    def parseToResolution(self, doc: doc.document | DocxReader) \
+            -> tuple[Resolution, dict[str, _rc_t], list[ResolutionParsingError]]:
+        """Parse the whole document (see iterParse) into a Resolution, its components and the parsing errors"""
+        components: dict[str, ResolutionComponent[_rc_inner_t]] = {}
+        errorList: list[ResolutionParsingError] = []
+
+        for field in HEADER_FIELDS:
+            components[field] = cast(_rc_t, ResolutionComponent[str](patterns=header_patterns[field]))
+
+        listPreambs: list[preamb] = []
+        listOperationals: list[clause] = []
+
+        for item in self.iterParse(doc):
+            if item.kind == 'preamb':
+                listPreambs.append(item.value)
+            elif item.kind == 'clause':
+                listOperationals.append(item.value)
+            elif item.kind == 'error':
+                errorList.append(item.value)
             else:
-                st["subclause_counter"] += 1
-                idx = st["subclause_counter"]
-
-            new_sub = subclause(idx, text=body)
-            st["current_clause"      ].listsubclauses.append(new_sub)
-            st["current_subclause"   ] = new_sub
-            st["current_subsubclause"] = None
-            st["subsubclause_counter"] = 0
-            return (st["current_clause"], False)
-
-        # Continuation: append to most recent item
-        cont = raw
-        if st["current_subsubclause"] is not None:
-            combined = sanitize_text(strip_punctuations(st["current_subsubclause"].text + " " + cont))
-            st["current_subsubclause"].text = combined
-            return (st["current_clause"], False)
-        if st["current_subclause"] is not None:
-            combined = sanitize_text(strip_punctuations(st["current_subclause"].text + " " + cont))
-            st["current_subclause"].text = combined
-            return (st["current_clause"], False)
-        if st["current_clause"] is not None:
-            combined = sanitize_text(strip_punctuations(st["current_clause"].text + " " + cont))
-            st["current_clause"].text = combined
-            return (st["current_clause"], False)
-
-        # nothing matched
-        return (clause(0, "__ERROR__", raw), False)
-
-    components['preambs'     ] = cast(_rc_t, ResolutionComponent[preamb]())
-    components['operationals'] = cast(_rc_t, ResolutionComponent[clause]())
-
-    components['preambs'     ].matchFunc = _preambs_match_function
-    components['operationals'].matchFunc = _operationals_match_function
-    componentsList: list[str] = ['committee',
-                                 'mainSubmitter',
-                                 'coSubmitters',
-                                 'topic',
-                                 'preambs',
-                                 'operationals']
-
-    # ====== Main Loop ======
-    for index, line in enumerate(paragraphs):
-        text = line.strip()
-        if not text: continue
-        if verbose: print(f"{Fore.MAGENTA}{index:3}{Style.RESET_ALL}| {line}")
-
-        # 1. Check Headers First (Regex-based)
-        header_matched = False
-        for componentName in ['committee', 'mainSubmitter', 'coSubmitters', 'topic']:
-            comp = components[componentName]
-            before = len(comp.getValues())
-            comp.extract(text, re.IGNORECASE)
-            if len(comp.getValues()) > before:
-                header_matched = True
-                break 
-        
-        if header_matched: continue
-
-        # 2. Check Structural Components (MatchFunc-based)
-        for componentName in ['preambs', 'operationals']:
-            comp = components[componentName]
-            if comp.matchFunc is None: continue
-            
-            try:
-                val, ok = comp.matchFunc(text)
-                # Only append if it's a valid structural match
-                if ok and val is not None:
-                    # Note: MatchFuncs already append to listPreambs/listOperationals
-                    # This appendValue is for the component's internal state
-                    comp.appendValue(val)
-                    break # Stop looking once a line is claimed as a clause/preamb
-            except Exception as e:
-                errorList.append(ResolutionParsingError(f"{componentName} parser exception: {e}", index + 1))
-                
-
-
-    # finalize values (preambs and operationals built by matchFuncs)
-    components['preambs'     ].setValue(cast(list[_rc_inner_t], listPreambs))
-    components['preambs'     ].markFinished()
-
-    components['operationals'].setValue(cast(list[_rc_inner_t], listOperationals))
-    components['operationals'].markFinished()
-    
-    # Add errors if key header components were never found at all
-    for cname in ["committee", "mainSubmitter", "topic"]:
-        if not components[cname].getValues():
-            errorList.append(
-                ResolutionParsingError(f"Missing required field: {cname}", -1)
-            )
-
-
-    reso = Resolution(
-        cast(str, components['committee'].getFirst()),
-        cast(str, components['mainSubmitter'].getFirst()),
-        cast(list[str], dedupe_preserve_order(components['coSubmitters'].getListValues() or ['None'])),
-        cast(str, components['topic'].getFirst()),
-    )
+                components[item.kind].appendValue(item.value)
+
+        def dedupe_preserve_order(seq):
+            seen = set()
+            out = []
+            for s in seq:
+                if s not in seen:
+                    seen.add(s)
+                    out.append(s)
+            return out
+
+        # finalize values (preambs and operationals built by the parser)
+        components['preambs'     ] = cast(_rc_t, ResolutionComponent[preamb]())
+        components['operationals'] = cast(_rc_t, ResolutionComponent[clause]())
+
+        components['preambs'     ].setValue(cast(list[_rc_inner_t], listPreambs))
+        components['preambs'     ].markFinished()
+
+        components['operationals'].setValue(cast(list[_rc_inner_t], listOperationals))
+        components['operationals'].markFinished()
+
+        reso = Resolution(
+            cast(str, components['committee'].getFirst()),
+            cast(str, components['mainSubmitter'].getFirst()),
+            cast(list[str], dedupe_preserve_order(components['coSubmitters'].getListValues() or ['None'])),
+            cast(str, components['topic'].getFirst()),
+        )
 
-    reso.preambs = listPreambs
-    reso.clauses = listOperationals
+        reso.preambs = listPreambs
+        reso.clauses = listOperationals
 
-    return (reso, components, errorList)
+        return (reso, components, errorList)
 
-def writeToFile(resolution: Resolution, filename: str | Path) -> int:
-    outDoc = doc.document(None, str(filename), line_spacing=2)
+def iterParse(doc: doc.document | DocxReader) -> Iterator[ParsedComponent]:
+    """ResolutionParser.iterParse with the module's rules and verbose flag"""
+    return ResolutionParser(rules, verbose).iterParse(doc)
 
+def parseToResolution(doc: doc.document | DocxReader) -> tuple[Resolution, dict[str, _rc_t], list[ResolutionParsingError]]:
+    """ResolutionParser.parseToResolution with the module's rules and verbose flag"""
+    return ResolutionParser(rules, verbose).parseToResolution(doc)
+
+def selectRules(profile: str | None = None) -> RuleRegistry:
+    """
+    The rules of a profile: a name from src.rules.profiles ("default" or a directory under
+    src/config/profiles), or the path of a config directory. None: the module's rules.
+    Raises KeyError if profile is neither.
+    """
+    if profile is None:
+        return rules
+    try:
+        return profiles.get(profile)
+    except KeyError:
+        if Path(profile).is_dir():
+            return profiles.for_directory(profile)
+        raise
+
+def _registry(registry: RuleRegistry | None) -> RuleRegistry:
+    return registry if registry is not None else rules
+
+def ends_with_list_phrase(text: str, compiled: CompiledRules | None = None) -> bool:
+    """Return True if text ends with any phrase in list_phrases (robust to trailing punctuation/whitespace)"""
+    if compiled is None:
+        compiled = rules.compiled
+    return compiled.list_suffix_index.endswith(text) is not None
+
+# writeToFile backends: the document render backends, and "stream"
+OUTPUT_BACKENDS = doc.RENDER_BACKENDS + ("stream",)
+
+def writeToFile(resolution: Resolution, filename: str | Path | IO[bytes], backend: str = "lxml",
+                timeout: float | None = None, rules: RuleRegistry | None = None) -> int:
+    """
+    Render the resolution to filename, a path or a binary stream (e.g. io.BytesIO).
+    backend: "lxml" builds the paragraph XML directly, "docx" goes through the python-docx API;
+    "stream" writes the lxml paragraphs straight into the zip, one at a time, without keeping the
+    document in memory (for very large outputs, or non-seekable streams). All produce the same document.
+    timeout: seconds to wait for a locked output file before raising doc.SaveTimeoutError (None: wait).
+    rules: whose list phrases and formatting options to use (default: the module's rules)
+    """
+    compiled = _registry(rules).compiled
+    if backend == "stream":
+        options = compiled.options
+        write_docx(resolutionParagraphs(resolution, compiled), str(filename) if isinstance(filename, Path) else filename,
+                   font=options.font, fontsize=options.font_size, line_spacing=options.line_spacing, timeout=timeout)
+        if verbose: print(f"File saved to {filename}" if isinstance(filename, (str, Path)) else "File saved to stream")
+        return 0
+    outDoc = buildDocument(resolution, filename, backend, compiled)
+    with span("save"):
+        outDoc.save(verbose=verbose, timeout=timeout)
+    return 0
+
+@stage("render")
+def buildDocument(resolution: Resolution, filename: str | Path | IO[bytes], backend: str = "lxml",
+                  compiled: CompiledRules | None = None) -> doc.document:
+    """Render the resolution into a new, unsaved document whose output is filename (compiled: rules snapshot to use)"""
+    if compiled is None:
+        compiled = rules.compiled
+    options = compiled.options
+    outDoc = doc.document(None, str(filename) if isinstance(filename, (str, Path)) else filename,
+                          font=options.font, fontsize=options.font_size, line_spacing=options.line_spacing,
+                          backend=backend)
+    for par in resolutionParagraphs(resolution, compiled):
+        outDoc.append(par)
+    return outDoc
+
+def resolutionParagraphs(resolution: Resolution, compiled: CompiledRules | None = None) -> Iterator[doc.paragraph]:
+    """The paragraphs of the formatted resolution, in order; clauses are only turned into paragraphs as they are reached"""
+    if compiled is None:
+        compiled = rules.compiled
     topicPar = doc.paragraph(bold=True)
     topicPar.add_run("Topic: ", bold=True)
     topicPar.add_run(resolution.topic, bold=False)
@@ -528,30 +696,19 @@ def writeToFile(resolution: Resolution, filename: str | Path) -> int:
         bold=False
     )
 
+    yield from (topicPar, committeePar, mainSubmitterPar, coSubmittersPar, committeeSubjectPar)
+
     # --- preambs ---
-    preambs: list = []
     for pre in resolution.preambs:
         temp = doc.paragraph()
         # Custom capitalization to preserve acronyms like (UNGA)
         formatted_adverb = pre.adverb[0].upper() + pre.adverb[1:] if pre.adverb else ""
         temp.add_run(formatted_adverb, italic=True)
         temp.add_run(" " + pre.content + ",", italic=False)
-        preambs.append(temp)
+        yield temp
 
     # --- operationals ---
 
-   
-    def _ends_with_list_phrase(text: str) -> bool:
-        # Return True if text ends with any phrase in list_phrases (robust to trailing punctuation/whitespace)
-        if not text:
-            return False
-        for ph in list_phrases:
-            # match phrase at the end, allow optional trailing spaces and punctuation
-            pattern = rf'(?i)\b{re.escape(ph)}[ \t\r\n]*[,:;.\-–—]*$'
-            if re.search(pattern, text):
-                return True
-        return False
-
     def render_clause(theclause: clause | subclause | subsubclause,
                       level: int = 1,
                       is_last: bool = False,
@@ -566,7 +723,7 @@ def writeToFile(resolution: Resolution, filename: str | Path) -> int:
         def choose_end(text: str, is_last: bool, last_within_top_clause: bool, has_children: bool = False) -> str:
             base = text.rstrip(",.").rstrip(":").rstrip(";")
             # 1) if it has children or ends with a list phrase -> colon (overrides absolute last)
-            if has_children or _ends_with_list_phrase(text): # TODO: determine if remove has_children condition
+            if has_children or ends_with_list_phrase(text, compiled): # TODO: determine if remove has_children condition
                 return base + ":"
             # 2) absolute last leaf -> period
             if is_last:
@@ -620,28 +777,213 @@ def writeToFile(resolution: Resolution, filename: str | Path) -> int:
         return paragraphs
 
 
-    for par in [
-        topicPar, committeePar, mainSubmitterPar,
-        coSubmittersPar, committeeSubjectPar
-    ]:
-        outDoc.append(par)
-
-    for pre in preambs:
-        outDoc.append(pre)
-
     # Render all clauses, passing is_last=True to the last clause
     for i, cl in enumerate(resolution.clauses):
         is_last_clause = (i == len(resolution.clauses) - 1)
         # For top-level clauses, last_within_top_clause is the same as is_last_clause
-        pars = render_clause(cl, level=1, is_last=is_last_clause, last_within_top_clause=is_last_clause)
-        for par in pars:
-            outDoc.append(par)
+        yield from render_clause(cl, level=1, is_last=is_last_clause, last_within_top_clause=is_last_clause)
+
 
-    outDoc.save(verbose=verbose)
+# ==== BATCH MODE ====
+
+# a batch worker skips an output that stays locked (e.g. open in Word) this long instead of hanging
+BATCH_SAVE_TIMEOUT = 30.0
+
+def _collect_inputs(patterns: list[str]) -> list[Path]:
+    """Expand directories (their *.docx files) and glob patterns into a de-duplicated list of input files"""
+    found: list[Path] = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            candidates = sorted(path.glob("*.docx"))
+        elif glob.has_magic(pattern):
+            candidates = [Path(p) for p in sorted(glob.glob(pattern, recursive=True))]
+        else:
+            candidates = [path]
+        for candidate in candidates:
+            # skip the "~$name.docx" lock files Word leaves next to open documents
+            if candidate.name.startswith("~$") or candidate in found:
+                continue
+            found.append(candidate)
+    return found
+
+def _output_names(files: list[Path]) -> list[Path]:
+    """
+    Where each input goes under the output / log directory: its file name, or if two inputs share a
+    name (e.g. -b a/ b/), every input's path relative to the directory the inputs have in common
+    """
+    names = [f.name.lower() for f in files] # case-insensitive file systems collide too
+    if len(set(names)) == len(names):
+        return [Path(f.name) for f in files]
+    resolved = [f.resolve() for f in files]
+    common = Path(os.path.commonpath([str(f.parent) for f in resolved]))
+    return [f.relative_to(common) for f in resolved]
+
+# whether batch workers record per-stage timings (set by _init_batch_worker)
+_profile_batch = False
+
+def _init_batch_worker(verbose_flag: bool, profile_flag: bool = False, rules_profile: str | None = None) -> None:
+    """
+    Runs once in every batch worker process: loads the phrase configs and builds the matchers
+    up front, so every file the worker formats reuses them.
+    """
+    global verbose, _profile_batch
+    verbose = verbose_flag
+    _profile_batch = profile_flag
+    selectRules(rules_profile).load()
+
+def _format_one(input_filename: Path, output_filename: Path, log_filename: Path | None,
+                rules_profile: str | None = None) -> dict:
+    """Format a single file for the batch runner; never raises, failures are reported in the result"""
+    start = time.perf_counter()
+    result = {"file": str(input_filename), "output": str(output_filename), "ok": False, "errors": 0, "message": ""}
+    hits, misses = classify_cache.hits, classify_cache.misses
+    timings = Timings() if _profile_batch else None
+    with recording(timings) if timings is not None else nullcontext():
+        try:
+            registry = selectRules(rules_profile) # compiled once per worker, by _init_batch_worker
+            with DocxReader(str(input_filename)) as resolutionRawDocument:
+                parsedResolution, components, errorList = \
+                    ResolutionParser(registry, verbose).parseToResolution(resolutionRawDocument)
+            result["errors"] = len(errorList)
+            if errorList:
+                if log_filename is not None:
+                    with open(str(log_filename), "w") as f:
+                        f.write(f"ERROR LOG FOR {os.path.abspath(input_filename)}\n")
+                        for error in errorList:
+                            f.write(str(error) + "\n")
+                else:
+                    result["message"] = "; ".join(str(error) for error in errorList)
+            writeToFile(parsedResolution, output_filename, timeout=BATCH_SAVE_TIMEOUT, rules=registry)
+            result["ok"] = True
+        except PackageNotFoundError:
+            result["message"] = "invalid or unreadable .docx file"
+        except Exception as e:
+            result["message"] = f"{type(e).__name__}: {e}"
+    if timings is not None:
+        result["stages"] = timings.as_dict()
+    result["classify_hits"] = classify_cache.hits - hits
+    result["classify_misses"] = classify_cache.misses - misses
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def formatBatch(inputs: list[str],
+                output_dir: str | Path | None = None,
+                log_dir: str | Path | None = None,
+                workers: int | None = None,
+                profile: bool = False,
+                rules_profile: str | None = None) -> int:
+    """
+    Format many resolutions at once, fanning the files out over a process pool.
+
+    inputs: files, directories (all *.docx inside) or glob patterns
+    output_dir: where formatted files go (same file name, or the same relative path if two inputs
+                share a name); None overwrites the inputs
+    log_dir: per-file error logs (<name>.log, placed like the outputs) for files with errors; None prints them
+    workers: number of worker processes (default: CPU count)
+    profile: print the time spent in each stage, summed over all files
+    rules_profile: the rule profile to format with, see selectRules (default: the module's rules)
+
+    Returns the exit code: 0 if every file was formatted, 1 otherwise.
+    """
+    files = _collect_inputs(inputs)
+    if not files:
+        print(f"{Fore.RED}{Style.BRIGHT}Error: no .docx files found{Style.RESET_ALL}")
+        return 1
+    if output_dir is None:
+        print(f"{Fore.RED}Changing the original files as output directory is not given{Style.RESET_ALL}")
+    else:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+    if log_dir is not None:
+        Path(log_dir).mkdir(parents=True, exist_ok=True)
+
+    jobs = []
+    for f, name in zip(files, _output_names(files)):
+        out = Path(output_dir) / name if output_dir is not None else f
+        log = Path(log_dir) / name.with_suffix(".log") if log_dir is not None else None
+        for target in (out, log):
+            if target is not None:
+                target.parent.mkdir(parents=True, exist_ok=True)
+        jobs.append((f, out, log, rules_profile))
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    if verbose: print(f"Formatting {len(jobs)} files with {workers} worker(s)")
+
+    results: list[dict] = []
+    def report(result: dict) -> None:
+        results.append(result)
+        if not result["ok"]:
+            print(f"{Fore.RED}FAILED {result['file']}: {result['message']}{Style.RESET_ALL}")
+        elif result["errors"]:
+            print(f"{Fore.YELLOW}{result['file']} -> {result['output']} ({result['errors']} errors corrected){Style.RESET_ALL}")
+            if result["message"]:
+                print(f"{Fore.MAGENTA}  {result['message']}{Style.RESET_ALL}")
+        elif verbose:
+            print(f"{Fore.GREEN}{result['file']} -> {result['output']}{Style.RESET_ALL}")
+
+    start = time.perf_counter()
+    if workers == 1:
+        _init_batch_worker(verbose, profile, rules_profile)
+        for job in jobs:
+            report(_format_one(*job))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                 initargs=(verbose, profile, rules_profile)) as pool:
+            for future in as_completed([pool.submit(_format_one, *job) for job in jobs]):
+                report(future.result())
+    elapsed = time.perf_counter() - start
+
+    failed = sum(1 for r in results if not r["ok"])
+    with_errors = sum(1 for r in results if r["ok"] and r["errors"])
+    print(f"{Style.BRIGHT}Formatted {len(results) - failed}/{len(results)} files "
+          f"({with_errors} with corrected errors, {failed} failed) "
+          f"in {elapsed:.2f}s with {workers} worker(s): {len(results) / elapsed if elapsed else 0:.1f} docs/sec{Style.RESET_ALL}")
+    lookups = sum(r.get("classify_hits", 0) + r.get("classify_misses", 0) for r in results)
+    if lookups:
+        hits = sum(r.get("classify_hits", 0) for r in results)
+        print(f"Line classification cache: {hits / lookups:.0%} hits ({hits}/{lookups} lines)")
+    if log_dir is not None and with_errors:
+        print(f"{Fore.RED}Check {log_dir} for logs / errors{Style.RESET_ALL}")
+    if profile:
+        timings = Timings()
+        for r in results:
+            timings.add(r.get("stages", {}))
+        print(timings.table())
+    return 1 if failed else 0
+
+
+def formatFile(input_filename: str | Path, output_filename: str | Path, log_filename: str | Path | None = None,
+               rules: RuleRegistry | None = None) -> int:
+    """Format one resolution (with rules, default: the module's); errors go to log_filename, or are printed if it's None. Returns the exit code"""
+    # Step 1: Read doc and parse to object
+    try:
+        with DocxReader(str(input_filename)) as resolutionRawDocument:
+            parseResult = ResolutionParser(_registry(rules), verbose).parseToResolution(resolutionRawDocument)
+        parsedResolution, components, errorList = parseResult
+    except PackageNotFoundError:
+        print(f"{Fore.RED}{Style.BRIGHT}Error: invalid input / output path{Style.RESET_ALL}")
+        return 1
+
+    if verbose: print(str(parsedResolution))
+
+    # Step 2: Conflict/Error showing
+    if (len(errorList) != 0) and log_filename is not None:
+        print(f"{Fore.RED}Errors found and corrected. Check {log_filename} for log / errors{Style.RESET_ALL}")
+        with open(str(log_filename), "w") as f:
+            f.write(f"ERROR LOG FOR {os.path.abspath(input_filename)}\n")
+            for error in errorList:
+                f.write(str(error) + "\n")
+    elif len(errorList) != 0:
+        print(f"{Fore.RED}Errors in resolution:{Style.RESET_ALL}")
+        for error in errorList:
+            print(f"{Fore.MAGENTA}{str(error)}{Style.RESET_ALL}")
+
+    # Step 3: Write to file
+    writeToFile(parsedResolution, output_filename, rules=rules)
     return 0
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
     
     """
     Step 0: Parse args
@@ -657,12 +999,31 @@ def main() -> int:
                     description='Formats a resolution (.docx) and outputs file.')
     parser.add_argument('filename', nargs='?', help='input filename (optional)')  # Changed to optional
     parser.add_argument('-v', '--verbose', help='enable verbose mode', action='store_true')
-    parser.add_argument('-o', '--output', nargs='?', help='output filename')
-    parser.add_argument('-l', '--log', nargs='?', help="log file name")
-    args = parser.parse_args()
+    parser.add_argument('-o', '--output', nargs='?', help='output filename (output directory in batch mode)')
+    parser.add_argument('-l', '--log', nargs='?', help="log file name (log directory in batch mode)")
+    parser.add_argument('-b', '--batch', nargs='+', metavar='PATH', help='batch mode: format every .docx in these files, directories or glob patterns')
+    parser.add_argument('-j', '--jobs', type=int, help='number of worker processes in batch mode (default: CPU count)')
+    parser.add_argument('--profile', action='store_true', help='print the time spent in each stage')
+    parser.add_argument('--pstats', metavar='FILE', help='also run under cProfile and dump the stats to FILE (single file mode)')
+    parser.add_argument('-r', '--rules', metavar='PROFILE', help='rule profile: a name under src/config/profiles, or a config directory (default: src/config)')
+    args = parser.parse_args(argv)
+
+    try:
+        selected = selectRules(args.rules)
+    except KeyError:
+        parser.error(f"unknown rule profile {args.rules!r} (profiles: {', '.join(profiles.names())})")
+    except (OSError, ValueError) as e:
+        parser.error(f"cannot load rule profile {args.rules!r}: {e}")
 
     if args.verbose:
         verbose = True
+        print(f"{Fore.GREEN}{len(selected.preamb_phrases)} preamb phrases loaded.{Style.RESET_ALL}")
+        print(f"{Fore.GREEN}{len(selected.operationals_phrases)} operational phrases loaded.{Style.RESET_ALL}")
+        print(f"{Fore.GREEN}{len(selected.list_phrases)} list phrases loaded.{Style.RESET_ALL}")
+
+    if args.batch:
+        inputs = args.batch + ([args.filename] if args.filename else [])
+        return formatBatch(inputs, args.output, args.log, args.jobs, profile=args.profile, rules_profile=args.rules)
     
     if args.filename:
         if verbose:
@@ -686,43 +1047,23 @@ def main() -> int:
         log_filename = Path(args.log)
     
 
-    """
-    Step 1: Read doc and parse to object
-    """
-    
-    try:
-        resolutionRawDocument = doc.document(str(input_filename), str(output_filename))
-        parseResult = parseToResolution(resolutionRawDocument)
-        parsedResolution, components, errorList = parseResult
-    except PackageNotFoundError:
-        print(f"{Fore.RED}{Style.BRIGHT}Error: invalid input / output path{Style.RESET_ALL}")
-        return 1
-
-    if verbose: print(str(parsedResolution))
-
-
-    """
-    Step 2: Conflict/Error showing
-    """
-
-    if (len(errorList) != 0) and args.log:
-        print(f"{Fore.RED}Errors found and corrected. Check {log_filename} for log / errors{Style.RESET_ALL}")
-        with open(str(log_filename), "w") as f:
-            f.write(f"ERROR LOG FOR {os.path.abspath(input_filename)}\n")
-            for error in errorList:
-                f.write(str(error) + "\n")
-    elif len(errorList) != 0:
-        print(f"{Fore.RED}Errors in resolution:{Style.RESET_ALL}")
-        for error in errorList:
-            print(f"{Fore.MAGENTA}{str(error)}{Style.RESET_ALL}")
+    if not (args.profile or args.pstats):
+        return formatFile(input_filename, output_filename, log_filename if args.log else None, selected)
 
-    """
-    Step 3: Write to file
-    """
-
-    writeToFile(parsedResolution, output_filename)
-    return 0
+    profiler = cProfile.Profile() if args.pstats else None
+    with recording() as timings:
+        if profiler is not None: profiler.enable()
+        try:
+            code = formatFile(input_filename, output_filename, log_filename if args.log else None, selected)
+        finally:
+            if profiler is not None: profiler.disable()
+    print(timings.table())
+    if profiler is not None:
+        profiler.dump_stats(args.pstats)
+        print(f"cProfile stats written to {args.pstats} (python -m pstats {args.pstats})")
+    return code
 
 
 if __name__ == "__main__":
+    freeze_support() # batch mode workers in PyInstaller builds
     exit(main()) # sys.exit
\ No newline at end of file
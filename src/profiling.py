@@ -0,0 +1,128 @@
+# per-stage timing spans; free when nothing is recording
+
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Iterator, TypeVar
+
+T = TypeVar('T')
+
+# the stages the formatter reports, in pipeline order
+STAGES = ("load", "extract numbering", "classify lines", "build resolution", "render", "save")
+
+
+class Timings:
+    """
+    Seconds spent per stage. Spans nest: time spent in an inner span is only counted for the
+    inner stage, so the stages add up to the wall time of the outermost spans.
+    """
+
+    def __init__(self) -> None:
+        self.seconds: dict[str, float] = {}
+        self.calls: dict[str, int] = {}
+        self._stack: list[list[float]] = [] # [start, time spent in child spans]
+
+    def _enter(self) -> None:
+        self._stack.append([perf_counter(), 0.0])
+
+    def _exit(self, name: str) -> None:
+        start, children = self._stack.pop()
+        elapsed = perf_counter() - start
+        self.seconds[name] = self.seconds.get(name, 0.0) + elapsed - children
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self._stack:
+            self._stack[-1][1] += elapsed
+
+    def add(self, seconds: dict[str, float]) -> None:
+        """Add the seconds per stage of another run (e.g. as_dict() from a worker process)"""
+        for name, value in seconds.items():
+            self.seconds[name] = self.seconds.get(name, 0.0) + value
+
+    @property
+    def total(self) -> float:
+        return sum(self.seconds.values())
+
+    def as_dict(self) -> dict[str, float]:
+        """Seconds per stage, known stages first in pipeline order"""
+        ordered = {name: self.seconds[name] for name in STAGES if name in self.seconds}
+        ordered.update((name, seconds) for name, seconds in self.seconds.items() if name not in ordered)
+        return ordered
+
+    def table(self) -> str:
+        total = self.total or 1.0
+        lines = [f"{'stage':<20}{'ms':>10}{'%':>7}"]
+        for name, seconds in self.as_dict().items():
+            lines.append(f"{name:<20}{seconds * 1000:10.2f}{seconds / total * 100:7.1f}")
+        lines.append(f"{'total':<20}{self.total * 1000:10.2f}")
+        return "\n".join(lines)
+
+
+_recording: ContextVar[Timings | None] = ContextVar("reso_timings", default=None)
+
+
+class _Span:
+    __slots__ = ("timings", "name")
+
+    def __init__(self, timings: Timings, name: str) -> None:
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.timings._enter()
+
+    def __exit__(self, *exc) -> None:
+        self.timings._exit(self.name)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str) -> _Span | _NoSpan:
+    """
+    Time a block as stage `name` if timings are being recorded (see recording()),
+    otherwise a shared no-op context manager. Don't yield from inside a span.
+    """
+    timings = _recording.get()
+    if timings is None:
+        return _NO_SPAN
+    return _Span(timings, name)
+
+
+def stage(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorator: run every call of the function in span(name)"""
+    def decorate(func: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> T:
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def recording(timings: Timings | None = None) -> Iterator[Timings]:
+    """Record the spans run inside this block (in this thread / context) into timings"""
+    timings = timings if timings is not None else Timings()
+    token = _recording.set(timings)
+    try:
+        yield timings
+    finally:
+        _recording.reset(token)
+
+
+def timed(func: Callable[..., T], *args, **kwargs) -> tuple[T, dict[str, float]]:
+    """Call func and return (its result, seconds per stage)"""
+    with recording() as timings:
+        result = func(*args, **kwargs)
+    return result, timings.as_dict()
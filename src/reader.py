@@ -0,0 +1,170 @@
+# Read-only fast path for parsing: the paragraphs of a .docx straight from the zip, without python-docx
+
+import posixpath
+import zipfile
+from pathlib import Path
+from typing import IO, Iterator
+
+from docx.opc.exceptions import PackageNotFoundError
+from docx.oxml.ns import qn
+from lxml import etree
+
+from src.document import NumberingModel, ParagraphRecord, document
+from src.profiling import span
+
+W_BODY = qn('w:body')
+W_P = qn('w:p')
+W_R = qn('w:r')
+W_HYPERLINK = qn('w:hyperlink')
+W_T = qn('w:t')
+W_TAB = qn('w:tab')
+W_PTAB = qn('w:ptab')
+W_BR = qn('w:br')
+W_CR = qn('w:cr')
+W_NO_BREAK_HYPHEN = qn('w:noBreakHyphen')
+W_TYPE = qn('w:type')
+W_PPR = qn('w:pPr')
+W_NUMPR = qn('w:numPr')
+W_NUMID = qn('w:numId')
+W_ILVL = qn('w:ilvl')
+W_VAL = qn('w:val')
+
+RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+RT_OFFICE_DOCUMENT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+RT_NUMBERING = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/numbering"
+
+# like python-docx: no entity expansion, no network access
+_PARSER_OPTIONS = {"resolve_entities": False, "no_network": True, "remove_comments": True, "remove_pis": True}
+
+
+def _run_text(r, parts: list[str]) -> None:
+    # the text equivalents python-docx gives run content (CT_R.text)
+    for e in r:
+        tag = e.tag
+        if tag == W_T:
+            parts.append(e.text or "")
+        elif tag == W_TAB or tag == W_PTAB:
+            parts.append("\t")
+        elif tag == W_BR:
+            if e.get(W_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag == W_CR:
+            parts.append("\n")
+        elif tag == W_NO_BREAK_HYPHEN:
+            parts.append("-")
+
+
+def paragraph_text(p) -> str:
+    """Text of a <w:p>, as python-docx's Paragraph.text: its runs and the runs of its hyperlinks"""
+    parts: list[str] = []
+    for child in p:
+        if child.tag == W_R:
+            _run_text(child, parts)
+        elif child.tag == W_HYPERLINK:
+            for r in child:
+                if r.tag == W_R:
+                    _run_text(r, parts)
+    return "".join(parts)
+
+
+def _num_pr(p) -> tuple[int, int] | None:
+    """(numId, ilvl) of a numbered paragraph"""
+    pPr = p.find(W_PPR)
+    numPr = pPr.find(W_NUMPR) if pPr is not None else None
+    if numPr is None:
+        return None
+    numId, ilvl = numPr.find(W_NUMID), numPr.find(W_ILVL)
+    if numId is None or ilvl is None:
+        return None
+    try:
+        return int(numId.get(W_VAL)), int(ilvl.get(W_VAL))
+    except (TypeError, ValueError):
+        return None
+
+
+def _relationship_target(z: zipfile.ZipFile, source: str, reltype: str) -> str | None:
+    """Zip member name of the part that `source` (a member name, "" for the package) relates to with reltype"""
+    directory, name = posixpath.split(source)
+    rels = posixpath.join(directory, "_rels", f"{name}.rels")
+    try:
+        root = etree.fromstring(z.read(rels), etree.XMLParser(**_PARSER_OPTIONS))
+    except KeyError:
+        return None
+    for rel in root.iterchildren(f"{{{RELS_NS}}}Relationship"):
+        if rel.get("Type") == reltype and rel.get("TargetMode") != "External":
+            target = rel.get("Target", "")
+            if target.startswith("/"):
+                return target[1:]
+            return posixpath.normpath(posixpath.join(directory, target))
+    return None
+
+
+class DocxReader:
+    """
+    Read-only view of a .docx for the parser. Opens the zip and reads only the main document
+    part (streamed with iterparse, each paragraph discarded once read) and numbering.xml.
+    get_paragraphs yields the same records as document.get_paragraphs.
+    """
+
+    def __init__(self, source: str | Path | IO[bytes]) -> None:
+        with span("load"):
+            try:
+                self._zip = zipfile.ZipFile(source)
+            except (FileNotFoundError, IsADirectoryError, zipfile.BadZipFile) as e:
+                raise PackageNotFoundError(f"Package not found at '{source}'") from e
+            self._document_part = _relationship_target(self._zip, "", RT_OFFICE_DOCUMENT) or "word/document.xml"
+            if self._document_part not in self._zip.namelist():
+                self._zip.close()
+                raise PackageNotFoundError(f"no main document part in '{source}'")
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def __enter__(self) -> 'DocxReader':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get_numbering_model(self) -> NumberingModel:
+        part = _relationship_target(self._zip, self._document_part, RT_NUMBERING)
+        if part is None or part not in self._zip.namelist():
+            return NumberingModel(None)
+        return NumberingModel(etree.fromstring(self._zip.read(part), etree.XMLParser(**_PARSER_OPTIONS)))
+
+    def get_paragraphs(self) -> Iterator[ParagraphRecord]:
+        """Yields a ParagraphRecord for every non-empty top-level paragraph, see document.get_paragraphs"""
+        numbering_states: dict = {}
+        current_list_context = None
+        with span("extract numbering"):
+            numbering = self.get_numbering_model()
+
+        i = -1
+        with self._zip.open(self._document_part) as stream:
+            for _, p in etree.iterparse(stream, events=("end",), tag=W_P, **_PARSER_OPTIONS):
+                body = p.getparent()
+                if body is None or body.tag != W_BODY:
+                    continue # in a table, text box, ...: not a body paragraph, dropped with its container
+                i += 1
+                with span("extract numbering"):
+                    text = paragraph_text(p).strip()
+                    label, level = "", None
+                    if text:
+                        num_pr = _num_pr(p)
+                        if num_pr is not None:
+                            label, list_context, level = document._number_paragraph(
+                                numbering, numbering_states, current_list_context, *num_pr)
+                            if list_context:
+                                current_list_context = list_context
+                    # done with it and everything before it
+                    p.clear()
+                    while p.getprevious() is not None:
+                        del body[0]
+                if text:
+                    yield ParagraphRecord(text, label, level, i)
+
+
+def read_paragraphs(source: str | Path | IO[bytes]) -> Iterator[ParagraphRecord]:
+    """The non-empty paragraphs of a .docx, without loading it through python-docx"""
+    with DocxReader(source) as reader:
+        yield from reader.get_paragraphs()
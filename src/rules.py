@@ -0,0 +1,290 @@
+# phrase configs and the matchers compiled from them, loaded on first use
+
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+from typing import NamedTuple, cast
+
+from colorama import Fore, Style
+
+from src.cache import LRUCache
+from src.utils.phrase_matcher import PhraseTrie, PhraseAutomaton, PhraseSuffixIndex
+
+# relative to the package, not the working directory, so importing from anywhere works
+CONFIG_DIR = Path(__file__).resolve().parent / "config"
+# named rule profiles, one directory each (see ProfileRegistry)
+PROFILES_DIR = CONFIG_DIR / "profiles"
+DEFAULT_PROFILE = "default"
+
+# the files of a config directory; a profile may leave out either phrase config
+PREAMBS_CONFIG = Path("preambs") / "config.json"
+OPERATIONALS_CONFIG = Path("operationals") / "config.json"
+OPTIONS_FILE = Path("profile.json")
+
+
+class FormattingOptions(NamedTuple):
+    """How a profile's resolutions are written, from its profile.json"""
+    font: str = "Times New Roman"
+    font_size: int | float = 12
+    line_spacing: int | float = 2
+    # committee name (lower case) -> shorthand used in output file names, before the built-in ones
+    committees: dict[str, str] | None = None
+
+
+class CompiledRules(NamedTuple):
+    """One consistent snapshot of the phrase lists and everything built from them"""
+    preamb_config: dict
+    operationals_config: dict
+    preamb_phrases: list[str]
+    operationals_phrases: list[str]
+    list_phrases: list[str]
+    preamb_trie: PhraseTrie
+    operationals_automaton: PhraseAutomaton
+    list_suffix_index: PhraseSuffixIndex
+    # identifies the phrase lists and options in use, so that cached results are only reused with the same rules
+    fingerprint: str
+    options: FormattingOptions = FormattingOptions()
+
+
+def _load_json(path: Path) -> dict:
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def config_files(config_dir: Path, base_dir: Path | None = None) -> tuple[Path, Path, Path | None]:
+    """The preambs config, operationals config and options file in use; phrase configs missing from config_dir come from base_dir"""
+    def phrase_config(name: Path) -> Path:
+        path = config_dir / name
+        if base_dir is not None and not path.is_file():
+            return base_dir / name
+        return path
+    options = config_dir / OPTIONS_FILE
+    return phrase_config(PREAMBS_CONFIG), phrase_config(OPERATIONALS_CONFIG), options if options.is_file() else None
+
+
+def content_hash(config_dir: Path, base_dir: Path | None = None) -> str:
+    """SHA-256 of the config files compile_rules(config_dir, base_dir) would read"""
+    h = hashlib.sha256()
+    for role, path in zip(("preambs", "operationals", "options"), config_files(config_dir, base_dir)):
+        h.update(role.encode("utf-8") + b"\0")
+        if path is not None:
+            h.update(path.read_bytes())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def file_signature(config_dir: Path, base_dir: Path | None = None) -> tuple:
+    """(path, mtime, size) of the files compile_rules(config_dir, base_dir) would read: cheap to check, changes when they do"""
+    signature = []
+    for path in config_files(config_dir, base_dir):
+        try:
+            st = path.stat() if path is not None else None
+        except OSError:
+            st = None
+        signature.append((str(path), st.st_mtime_ns, st.st_size) if st is not None else (str(path), None, None))
+    return tuple(signature)
+
+
+def load_options(path: Path | None) -> FormattingOptions:
+    if path is None:
+        return FormattingOptions()
+    options = _load_json(path)
+    unknown = set(options) - set(FormattingOptions._fields) - {"_comment"}
+    if unknown:
+        raise ValueError(f"{path}: unknown options {', '.join(sorted(unknown))}")
+    options.pop("_comment", None)
+    if options.get("committees") is not None:
+        options["committees"] = {name.lower(): short for name, short in options["committees"].items()}
+    return FormattingOptions(**options)
+
+
+def compile_rules(config_dir: Path, base_dir: Path | None = None) -> CompiledRules:
+    preambs_file, operationals_file, options_file = config_files(config_dir, base_dir)
+    preamb_config = _load_json(preambs_file)
+    operationals_config = _load_json(operationals_file)
+    options = load_options(options_file)
+
+    preamb_phrases = sorted(cast(list[str], preamb_config.get('preambs_phrases', [])))
+    operationals_phrases = sorted(cast(list[str], operationals_config.get('operationals_phrases', [])))
+    list_phrases = sorted(cast(list[str], operationals_config.get("list_phrases", [])))
+
+    if preamb_phrases == []:
+        print(f"{Fore.RED}Warning: no preamb phrases loaded{Style.RESET_ALL}")
+    if operationals_phrases == []:
+        print(f"{Fore.RED}Warning: no operational phrases loaded{Style.RESET_ALL}")
+    if list_phrases == []:
+        print(f"{Fore.RED}Warning: no list phrases loaded{Style.RESET_ALL}")
+
+    return CompiledRules(
+        preamb_config=preamb_config,
+        operationals_config=operationals_config,
+        preamb_phrases=preamb_phrases,
+        operationals_phrases=operationals_phrases,
+        list_phrases=list_phrases,
+        preamb_trie=PhraseTrie(preamb_phrases),
+        operationals_automaton=PhraseAutomaton(operationals_phrases),
+        list_suffix_index=PhraseSuffixIndex(list_phrases, trailing=",:;.-–—"),
+        # options only when they aren't the defaults, which leaves the default rules' fingerprint as it was
+        fingerprint=hashlib.sha256(
+            json.dumps([preamb_phrases, operationals_phrases, list_phrases]
+                       + ([options] if options != FormattingOptions() else [])).encode("utf-8")
+        ).hexdigest(),
+        options=options,
+    )
+
+
+class RuleRegistry:
+    """
+    Lazily loaded phrase rules shared by the parser and the writer.
+
+    Nothing is read until the rules are first used, so importing the formatter (GUI, server,
+    CLI --help) stays cheap. reload() re-reads the configs and swaps in a new snapshot at once;
+    callers that need a consistent view for a whole document should hold on to `compiled`.
+    """
+
+    def __init__(self, config_dir: str | Path | None = None, base_dir: str | Path | None = None) -> None:
+        self.config_dir = Path(config_dir) if config_dir is not None else CONFIG_DIR
+        # where phrase configs missing from config_dir are read from (None: they're required)
+        self.base_dir = Path(base_dir) if base_dir is not None else None
+        self._compiled: CompiledRules | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._compiled is not None
+
+    @property
+    def compiled(self) -> CompiledRules:
+        compiled = self._compiled
+        if compiled is None:
+            with self._lock:
+                if self._compiled is None:
+                    self._compiled = compile_rules(self.config_dir, self.base_dir)
+                compiled = self._compiled
+        return compiled
+
+    def load(self) -> CompiledRules:
+        """Load the rules now if they aren't already (e.g. to warm a worker process)"""
+        return self.compiled
+
+    def reload(self) -> CompiledRules:
+        """Re-read the configs from disk; parses already running keep the snapshot they started with"""
+        compiled = compile_rules(self.config_dir, self.base_dir)
+        with self._lock:
+            self._compiled = compiled
+        return compiled
+
+    @property
+    def preamb_phrases(self) -> list[str]:
+        return self.compiled.preamb_phrases
+
+    @property
+    def operationals_phrases(self) -> list[str]:
+        return self.compiled.operationals_phrases
+
+    @property
+    def list_phrases(self) -> list[str]:
+        return self.compiled.list_phrases
+
+    @property
+    def preamb_trie(self) -> PhraseTrie:
+        return self.compiled.preamb_trie
+
+    @property
+    def operationals_automaton(self) -> PhraseAutomaton:
+        return self.compiled.operationals_automaton
+
+    @property
+    def list_suffix_index(self) -> PhraseSuffixIndex:
+        return self.compiled.list_suffix_index
+
+    @property
+    def fingerprint(self) -> str:
+        return self.compiled.fingerprint
+
+    @property
+    def options(self) -> FormattingOptions:
+        return self.compiled.options
+
+
+_PROFILE_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]*")
+
+class ProfileRegistry:
+    """
+    Named rule profiles, e.g. one per conference: each is a directory under profiles_dir with its own
+    phrase configs (preambs/config.json, operationals/config.json; a missing one is the default's)
+    and formatting options (profile.json). The default profile is the `default` registry.
+
+    Compiled profiles are kept in an LRU keyed by (name, content hash of its files). Selecting a profile
+    only stats its files: their contents are hashed again when their mtime or size changed, and they
+    are compiled when that hash has no entry, so switching between unchanged profiles reads and
+    compiles nothing while edited ones are picked up. reload() forces the hash to be recomputed.
+    """
+
+    def __init__(self, profiles_dir: str | Path | None = None, max_profiles: int = 16,
+                 default: RuleRegistry | None = None) -> None:
+        self.profiles_dir = Path(profiles_dir) if profiles_dir is not None else PROFILES_DIR
+        self.default = default if default is not None else registry
+        self._compiled = LRUCache(max_profiles)
+        self._hashes: dict[str, tuple[tuple, str]] = {} # profile -> (file_signature, content hash) when last hashed
+        self._lock = threading.Lock()
+
+    def names(self) -> list[str]:
+        """The default profile and every profile directory"""
+        found = sorted(p.name for p in self.profiles_dir.iterdir()
+                       if p.is_dir() and _PROFILE_NAME.fullmatch(p.name)) if self.profiles_dir.is_dir() else []
+        return [DEFAULT_PROFILE] + [name for name in found if name != DEFAULT_PROFILE]
+
+    def get(self, name: str | None = None) -> RuleRegistry:
+        """The compiled rules of a profile (None: the default); KeyError for an unknown one"""
+        if name is None or name == DEFAULT_PROFILE:
+            return self.default
+        if not _PROFILE_NAME.fullmatch(name) or not (self.profiles_dir / name).is_dir():
+            raise KeyError(f"unknown rule profile: {name}")
+        return self.for_directory(self.profiles_dir / name, name)
+
+    def for_directory(self, config_dir: str | Path, name: str | None = None) -> RuleRegistry:
+        """The compiled rules of any config directory (cached under name, by default its resolved path)"""
+        config_dir = Path(config_dir)
+        if name is None:
+            name = str(config_dir.resolve())
+        signature = file_signature(config_dir, self.default.config_dir)
+        known = self._hashes.get(name)
+        if known is not None and known[0] == signature:
+            rules = self._compiled.get((name, known[1]))
+            if rules is not None:
+                return rules
+        with self._lock: # one compile per profile, however many requests ask for it at once
+            known = self._hashes.get(name)
+            if known is not None and known[0] == signature:
+                rules = self._compiled.get((name, known[1]))
+                if rules is not None:
+                    return rules
+            # changed, new or evicted: hash what is about to be compiled
+            digest = content_hash(config_dir, self.default.config_dir)
+            self._hashes[name] = (signature, digest)
+            rules = self._compiled.get((name, digest))
+            if rules is None:
+                rules = RuleRegistry(config_dir, base_dir=self.default.config_dir)
+                rules.load()
+                self._compiled.put((name, digest), rules)
+        return rules
+
+    def reload(self, name: str | None = None) -> None:
+        """Hash a profile's files again (all profiles if name is None) the next time it is selected, even if they look unchanged"""
+        with self._lock:
+            if name is None:
+                self._hashes.clear()
+            else:
+                self._hashes.pop(name, None)
+
+    def stats(self) -> dict[str, int | float]:
+        return self._compiled.stats()
+
+
+# the rules used by src.main unless told otherwise
+registry = RuleRegistry()
+# the named profiles, "default" being `registry`
+profiles = ProfileRegistry()
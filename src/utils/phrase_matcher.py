@@ -0,0 +1,256 @@
+# compiled phrase matchers built once from the phrase configs
+# (see src/config/preambs/config.json and src/config/operationals/config.json)
+
+import re
+from typing import Iterable
+
+# leading quotes / brackets a delegate may put in front of a clause phrase
+_LEADING = re.compile(r'\s*[\(\["\']*\s*')
+
+_END = ""  # terminal key in a trie node, maps to the original phrase
+
+
+def _is_word(c: str) -> bool:
+    """Same notion of a word character as `\\w` in a str pattern"""
+    return c.isalnum() or c == '_'
+
+
+def _boundary(text: str, i: int) -> bool:
+    """`\\b` at index i"""
+    before = i > 0 and _is_word(text[i - 1])
+    after = i < len(text) and _is_word(text[i])
+    return before != after
+
+
+def fold(text: str) -> str:
+    """
+    Lower-cases text while keeping every index aligned with the original string,
+    so that spans found in the folded text can be sliced out of the original.
+    """
+    low = text.lower()
+    if len(low) == len(text):
+        return low
+    # a few characters (e.g. 'İ') expand when lower-cased; keep their first code point
+    return ''.join(c.lower()[0] for c in text)
+
+
+class PhraseTrie:
+    """
+    Case-insensitive character trie over a list of phrases.
+
+    Built once from a phrase config; a lookup walks the line a single time instead of
+    trying one regex per phrase.
+    """
+
+    def __init__(self, phrases: Iterable[str]) -> None:
+        self.root: dict = {}
+        self.phrases: list[str] = []
+        for phrase in phrases:
+            self.add(phrase)
+
+    def add(self, phrase: str) -> None:
+        key = fold(phrase)
+        if not key:
+            return
+        node = self.root
+        for c in key:
+            node = node.setdefault(c, {})
+        if _END not in node:
+            self.phrases.append(phrase)
+        node[_END] = phrase
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    def __contains__(self, phrase: str) -> bool:
+        node = self.root
+        for c in fold(phrase):
+            node = node.get(c)
+            if node is None:
+                return False
+        return _END in node
+
+    def longest_at(self, text: str, start: int = 0, folded: str | None = None) -> tuple[str, int] | None:
+        """
+        Longest phrase that starts at `start` and ends on a word boundary.
+
+        Returns:
+        (phrase, end) -> the phrase as written in the config and the end index in text
+        None          -> no phrase starts here
+        """
+        if folded is None:
+            folded = fold(text)
+        node = self.root
+        best: tuple[str, int] | None = None
+        i = start
+        n = len(folded)
+        while i < n:
+            node = node.get(folded[i])
+            if node is None:
+                break
+            i += 1
+            if _END in node:
+                # `\b` after the phrase: the boundary flips between the last phrase character and the next one
+                if _boundary(folded, i):
+                    best = (node[_END], i)
+        return best
+
+    def match(self, text: str) -> tuple[str, str] | None:
+        """
+        Match the longest phrase at the beginning of a line (optionally preceded by
+        quotes / brackets), e.g. `Deeply concerned, about ...`.
+
+        Returns:
+        (phrase, remainder) -> phrase as written in the config and the text after it,
+                               with separating spaces / commas removed
+        None                -> the line does not start with a phrase
+        """
+        start = _LEADING.match(text).end()  # type: ignore # always matches
+        found = self.longest_at(text, start)
+        if found is None:
+            return None
+        phrase, end = found
+        while end < len(text) and text[end] in ' ,':
+            end += 1
+        remainder = text[end:]
+        if '\n' in remainder:
+            # line breaks inside the remainder never matched the old `(.*)$` pattern either
+            return None
+        return phrase, remainder
+
+
+# a phrase found later in a line only counts if it is not glued to a clause marker ("1.", "a)") or a word
+_MARKER_TAIL = re.compile(r'[\dA-Za-z\)\.]\s*$')
+
+
+class PhraseAutomaton(PhraseTrie):
+    """
+    Aho-Corasick automaton over a phrase trie: finds every phrase occurrence in a line
+    in a single left-to-right pass, whatever the number of phrases.
+    """
+
+    def __init__(self, phrases: Iterable[str]) -> None:
+        self._goto: list[dict[str, int]] = []
+        super().__init__(phrases)
+
+    def add(self, phrase: str) -> None:
+        super().add(phrase)
+        self._goto = []  # recompiled on next use
+
+    def _compile(self) -> None:
+        goto: list[dict[str, int]] = [{}]
+        out: list[list[tuple[int, str]]] = [[]]
+        fail: list[int] = [0]
+        # breadth first over the trie so a node's failure target is always numbered before it
+        queue: list[tuple[dict, int]] = [(self.root, 0)]
+        for node, state in queue:
+            for c, child in node.items():
+                if c == _END:
+                    continue
+                new = len(goto)
+                goto.append({})
+                out.append([])
+                fail.append(0)
+                goto[state][c] = new
+                if _END in child:
+                    out[new].append((len(fold(child[_END])), child[_END]))
+                queue.append((child, new))
+        for state in range(1, len(goto)):  # root children keep failing to the root
+            for c, nxt in goto[state].items():
+                f = fail[state]
+                while f and c not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(c, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def finditer(self, text: str, folded: str | None = None):
+        """Yield (start, end, phrase) for every occurrence bounded by `\\b` on both sides, ordered by end."""
+        if not self._goto:
+            self._compile()
+        if folded is None:
+            folded = fold(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, c in enumerate(folded):
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            for length, phrase in out[state]:
+                start = i + 1 - length
+                if _boundary(folded, start) and _boundary(folded, i + 1):
+                    yield start, i + 1, phrase
+
+    def search(self, text: str) -> tuple[int, int, bool] | None:
+        """
+        Locate the operative phrase of a clause.
+
+        A phrase at the start of the line (optionally after quotes / brackets) wins outright.
+        Otherwise the longest phrase whose first occurrence is not preceded by a clause marker
+        or a word is taken, the earliest one on equal length.
+
+        Returns:
+        (start, end, at_start) -> span of the phrase in text and whether it opens the line
+        None                   -> no phrase in the line
+        """
+        folded = fold(text)
+        start = _LEADING.match(text).end()  # type: ignore # always matches
+        found = self.longest_at(text, start, folded)
+        if found is not None:
+            return (start, found[1], True)
+
+        first: dict[str, tuple[int, int]] = {}
+        for s, e, phrase in self.finditer(text, folded):
+            if phrase not in first:
+                first[phrase] = (s, e)
+        best: tuple[int, int] | None = None
+        for s, e in first.values():
+            prefix = text[:s]
+            if prefix.strip() and _MARKER_TAIL.search(prefix):
+                continue
+            if best is None or (e - s, -s) > (best[1] - best[0], -best[0]):
+                best = (s, e)
+        return None if best is None else (best[0], best[1], False)
+
+
+class PhraseSuffixIndex:
+    """
+    Trie over reversed phrases: tells whether a text ends with one of the phrases
+    (followed by optional whitespace and trailing punctuation) by walking back from the end
+    of the text, so the cost depends on the tail of the text and not on the number of phrases.
+    """
+
+    def __init__(self, phrases: Iterable[str], trailing: str = "") -> None:
+        self.root: dict = {}
+        self.trailing = trailing
+        for phrase in phrases:
+            key = fold(phrase)
+            if not key:
+                continue
+            node = self.root
+            for c in reversed(key):
+                node = node.setdefault(c, {})
+            node[_END] = phrase
+
+    def endswith(self, text: str) -> str | None:
+        """Longest phrase the text ends with (as written in the config), or None"""
+        if not text:
+            return None
+        end = len(text)
+        if text.endswith('\n'):  # `$` also matches before a final newline
+            end -= 1
+        while end and text[end - 1] in self.trailing:
+            end -= 1
+        while end and text[end - 1] in ' \t\r\n':
+            end -= 1
+        node = self.root
+        best: str | None = None
+        i = end
+        while i:
+            node = node.get(text[i - 1].lower()[:1])
+            if node is None:
+                break
+            i -= 1
+            if _END in node and _boundary(text, i):
+                best = node[_END]
+        return best
@@ -0,0 +1,98 @@
+# Streaming .docx writer: the package is written part by part and word/document.xml one paragraph
+# at a time, so memory stays flat however long the document is, and the output may be a
+# non-seekable stream (zipfile then writes data descriptors instead of seeking back).
+
+import io
+import threading
+import zipfile
+from typing import IO, Iterable, NamedTuple
+
+from docx import Document
+from docx.oxml.ns import qn
+from lxml import etree
+
+from src.document import _new_document, paragraph, save_output
+from src.profiling import span
+
+DOCUMENT_PART = "word/document.xml"
+
+# every <w:p> is serialized on its own and so declares the namespace again; document.xml already does
+_W_DECLARATION = b' xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+_BODY_MARKER = b"<!--body-->"
+
+
+class Template(NamedTuple):
+    """A new document's package, split around the body content"""
+    document: Document # type: ignore # read while rendering: style ids, numbering id, line spacing
+    parts: list[tuple[str, bytes]] # the package's parts in order, DOCUMENT_PART with b"" as its content
+    head: bytes # document.xml up to the body content
+    tail: bytes # the section properties and the closing tags
+    default_line_spacing: object
+
+
+# keyed like the document skeletons: (overall style, font, font size, line spacing)
+_templates: dict[tuple, Template] = {}
+_templates_lock = threading.Lock()
+
+def get_template(overallstyle: str = "Normal", font: str = "Times New Roman",
+                 fontsize: int | float = 12, line_spacing: int | float = 1) -> Template:
+    """The template for new documents with these settings, built once per process"""
+    key = (overallstyle, font, fontsize, line_spacing)
+    template = _templates.get(key)
+    if template is None:
+        template = _build_template(_new_document(*key))
+        with _templates_lock:
+            template = _templates.setdefault(key, template)
+    return template
+
+def _build_template(d: Document) -> Template: # type: ignore
+    saved = io.BytesIO()
+    d.save(saved)
+    parts = []
+    with zipfile.ZipFile(saved) as z:
+        for name in z.namelist():
+            parts.append((name, b"" if name == DOCUMENT_PART else z.read(name)))
+        root = etree.fromstring(z.read(DOCUMENT_PART))
+    # paragraphs go where render_lxml puts them: after the body's content, before its section properties
+    body = root.find(qn('w:body'))
+    sectPr = body.find(qn('w:sectPr'))
+    if sectPr is not None:
+        sectPr.addprevious(etree.Comment("body"))
+    else:
+        body.append(etree.Comment("body"))
+    head, tail = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True).split(_BODY_MARKER)
+    return Template(d, parts, head, tail, d.styles['Normal'].paragraph_format.line_spacing)
+
+
+def _write_package(template: Template, paragraphs: Iterable[paragraph], f: IO[bytes]) -> None:
+    with zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, data in template.parts:
+            if name != DOCUMENT_PART:
+                with span("save"):
+                    z.writestr(name, data)
+                continue
+            with z.open(DOCUMENT_PART, "w") as part:
+                part.write(template.head)
+                pars = iter(paragraphs)
+                while True:
+                    with span("render"): # including making the paragraph, if the iterable is lazy
+                        par = next(pars, None)
+                        if par is None:
+                            break
+                        p = par.to_lxml(template.document, template.default_line_spacing)
+                    with span("save"):
+                        part.write(etree.tostring(p).replace(_W_DECLARATION, b"", 1))
+                part.write(template.tail)
+
+
+def write_docx(paragraphs: Iterable[paragraph], output: str | IO[bytes], overallstyle: str = "Normal",
+               font: str = "Times New Roman", fontsize: int | float = 12, line_spacing: int | float = 1,
+               atomic: bool = True, timeout: float | None = None) -> None:
+    """
+    Write a new document with these paragraphs to output, a path or a binary stream (seekable or not).
+    Paragraphs are rendered and written as they are taken from the iterable, the output is the same
+    document as appending them to document(None, ..., backend="lxml") and saving it.
+    atomic, timeout: see document.save
+    """
+    template = get_template(overallstyle, font, fontsize, line_spacing)
+    save_output(output, lambda f: _write_package(template, paragraphs, f), atomic, timeout)
@@ -0,0 +1,55 @@
+import contextlib
+import io
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import src.main as formatter
+from src.reader import read_paragraphs
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_batch(self, *inputs: Path) -> int:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return formatter.formatBatch([str(i) for i in inputs], self.root / "out", self.root / "logs", workers=1)
+
+    def test_unique_names_flat(self):
+        shutil.copy("tests/inputs/test_reso.docx", self.root / "a.docx")
+        shutil.copy("tests/inputs/test1.docx", self.root / "b.docx")
+        self.assertEqual(self.run_batch(self.root / "a.docx", self.root / "b.docx"), 0)
+        self.assertEqual(sorted(p.name for p in (self.root / "out").iterdir()), ["a.docx", "b.docx"])
+
+    def test_same_name_in_two_directories(self):
+        for directory, source in (("a", "tests/inputs/test_reso.docx"), ("b", "tests/inputs/test_problematic.docx")):
+            (self.root / "in" / directory).mkdir(parents=True)
+            shutil.copy(source, self.root / "in" / directory / "reso.docx")
+        self.assertEqual(self.run_batch(self.root / "in" / "a", self.root / "in" / "b"), 0)
+
+        out = self.root / "out"
+        self.assertEqual(sorted(str(p.relative_to(out)) for p in out.rglob("*.docx")),
+                         [str(Path("a", "reso.docx")), str(Path("b", "reso.docx"))])
+        # each output is its own input's, not the other one written over it
+        for directory, source in (("a", "tests/inputs/test_reso.docx"), ("b", "tests/inputs/test_problematic.docx")):
+            expected = self.root / f"{directory}.docx"
+            formatter.formatFile(source, str(expected), str(self.root / "expected.log"))
+            self.assertEqual(self.paragraphs(out / directory / "reso.docx"), self.paragraphs(expected))
+        for log in (self.root / "logs").rglob("*.log"):
+            self.assertEqual(log.suffix, ".log")
+            self.assertIn(str(self.root / "in" / log.parent.name / "reso.docx"), log.read_text())
+
+    @staticmethod
+    def paragraphs(path: Path) -> list[str]:
+        return [record.line for record in read_paragraphs(path)]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from src.cache import LRUCache, ResultCache
+
+
+def entry(data: bytes = b"docx bytes") -> dict:
+    return {"filename": "DR_Germany_GA", "data": data, "errors": []}
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), (1, None, 3))
+
+    def test_byte_bound(self):
+        cache = LRUCache(max_entries=10, max_bytes=10)
+        cache.put("a", "a", size=6)
+        cache.put("b", "b", size=6)
+        self.assertEqual((len(cache), cache.size), (1, 6))
+        cache.put("huge", "x", size=11)
+        self.assertIsNone(cache.get("huge"))
+
+    def test_hit_rate(self):
+        cache = LRUCache()
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("b")
+        self.assertEqual(cache.hit_rate, 0.5)
+
+
+class TestResultCache(unittest.TestCase):
+
+    def test_key_depends_on_rules(self):
+        self.assertNotEqual(ResultCache.key(b"doc", "rules-1"), ResultCache.key(b"doc", "rules-2"))
+        self.assertEqual(ResultCache.key(b"doc", "rules-1"), ResultCache.key(b"doc", "rules-1"))
+
+    def test_concurrent_misses_compute_once(self):
+        cache = ResultCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return entry()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 8)
+        self.assertEqual(sum(1 for _, hit in results if not hit), 1)
+
+    def test_finished_between_lookup_and_lock(self):
+        cache = ResultCache()
+        cache.put("k", entry(b"stored"))
+        # the lock-free lookup missed, then the computing thread stored its entry and left _inflight
+        with mock.patch.object(cache, "get", return_value=None):
+            self.assertEqual(cache.get_or_compute("k", lambda: self.fail("computed again")), (entry(b"stored"), True))
+
+    def test_failures_are_not_cached(self):
+        cache = ResultCache()
+
+        def fail():
+            raise ValueError("bad document")
+
+        with self.assertRaises(ValueError):
+            cache.get_or_compute("k", fail)
+        self.assertEqual(cache.get_or_compute("k", entry), (entry(), False))
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as d:
+            ResultCache(disk_dir=d).put("k", entry(b"rendered"))
+            restarted = ResultCache(disk_dir=d)
+            self.assertEqual(restarted.get_or_compute("k", lambda: entry(b"other")), (entry(b"rendered"), True))
+            self.assertEqual(restarted.disk_hits, 1)
+
+    def test_disk_tier_bounded(self):
+        with tempfile.TemporaryDirectory() as d:
+            cache = ResultCache(disk_dir=d, max_disk_bytes=3000)
+            for i, key in enumerate(("a", "b", "c")):
+                cache.put(key, entry(bytes(900)))
+                os.utime(os.path.join(d, f"{key}.json"), (i, i))
+            self.assertIsNotNone(cache._read_disk("a")) # used again: "b" is now the oldest
+            cache.put("d", entry(bytes(900)))
+            self.assertEqual(sorted(os.listdir(d)), ["a.docx", "a.json", "c.docx", "c.json", "d.docx", "d.json"])
+            self.assertLessEqual(cache.stats()["disk_bytes"], 3000)
+            self.assertEqual(cache.disk_evictions, 1)
+            # restarted, it counts what's already there
+            self.assertEqual(ResultCache(disk_dir=d, max_disk_bytes=3000).stats()["disk_bytes"],
+                             cache.stats()["disk_bytes"])
+            cache.put("huge", entry(bytes(4000)))
+            self.assertNotIn("huge.docx", os.listdir(d))
+
+    def test_disk_tier_accounting(self):
+        with tempfile.TemporaryDirectory() as d:
+            cache = ResultCache(disk_dir=d)
+            cache.put("k", entry(bytes(900)))
+            cache.put("k", entry(bytes(900))) # replaces the files, doesn't add to them
+            self.assertEqual(cache.stats()["disk_bytes"], sum(os.path.getsize(os.path.join(d, f)) for f in os.listdir(d)))
+
+            with mock.patch("os.replace", side_effect=OSError(28, "No space left on device")):
+                cache.put("full", entry(bytes(900)))
+            self.assertEqual(sorted(os.listdir(d)), ["k.docx", "k.json"])
+            self.assertEqual(cache.stats()["disk_bytes"], sum(os.path.getsize(os.path.join(d, f)) for f in os.listdir(d)))
+
+
+if __name__ == '__main__':
+    unittest.main()
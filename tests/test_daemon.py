@@ -0,0 +1,159 @@
+import contextlib
+import io
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+from src import daemon
+from src.rules import CONFIG_DIR, OPERATIONALS_CONFIG, PREAMBS_CONFIG, RuleRegistry
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "needs Unix sockets")
+class TestDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp.name, "d.sock")
+
+    def tearDown(self):
+        daemon.request({"op": "stop"}, self.socket_path, timeout=5)
+        self.tmp.cleanup()
+
+    def serve(self, idle_timeout: float = 30) -> threading.Thread:
+        server = daemon.Daemon(self.socket_path, idle_timeout)
+        thread = threading.Thread(target=server.serve, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 10
+        while daemon.request({"op": "status"}, self.socket_path, timeout=1) is None:
+            self.assertLess(time.monotonic(), deadline, "daemon did not start")
+            time.sleep(0.01)
+        return thread
+
+    def test_no_daemon(self):
+        self.assertIsNone(daemon.run_client(["--help"], self.socket_path))
+
+    def test_garbled_reply(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(self.socket_path)
+            listener.listen(1)
+
+            def reply():
+                conn, _ = listener.accept()
+                with conn:
+                    conn.makefile("rb").readline()
+                    conn.sendall(b'{"code": 0, "stdo\n')
+
+            thread = threading.Thread(target=reply, daemon=True)
+            thread.start()
+            self.assertIsNone(daemon.run_client(["--help"], self.socket_path))
+            thread.join(5)
+
+    def test_no_reply(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(self.socket_path)
+            listener.listen(1) # accepts the connection, never answers
+            start = time.monotonic()
+            with mock.patch.dict(os.environ, {"RESO_DAEMON_TIMEOUT": "0.2"}):
+                self.assertIsNone(daemon.run_client(["--help"], self.socket_path))
+            self.assertLess(time.monotonic() - start, 5)
+
+    def test_format_matches_in_process(self):
+        self.serve()
+        output = os.path.join(self.tmp.name, "out.docx")
+        with contextlib.redirect_stdout(io.StringIO()):
+            code = daemon.run_client(["tests/inputs/test_reso.docx", "-o", output], self.socket_path)
+        self.assertEqual(code, 0)
+
+        import src.main as formatter
+        expected = os.path.join(self.tmp.name, "expected.docx")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(formatter.main(["tests/inputs/test_reso.docx", "-o", expected]), 0)
+        with zipfile.ZipFile(output) as got, zipfile.ZipFile(expected) as want:
+            self.assertEqual(got.read("word/document.xml"), want.read("word/document.xml"))
+
+        status = daemon.request({"op": "status"}, self.socket_path)
+        self.assertEqual((status["requests"], status["pid"]), (1, os.getpid()))
+
+    def test_config_edits_picked_up(self):
+        import src.main as formatter
+        config_dir = Path(self.tmp.name) / "config"
+        (config_dir / "preambs").mkdir(parents=True)
+        (config_dir / "operationals").mkdir()
+        (config_dir / OPERATIONALS_CONFIG).write_bytes((CONFIG_DIR / OPERATIONALS_CONFIG).read_bytes())
+        preambs = config_dir / PREAMBS_CONFIG
+        preambs.write_text('{"preambs_phrases": ["noting"]}', encoding="utf-8")
+
+        def run() -> str:
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                code = daemon.run_client(["tests/inputs/test_reso.docx", "-v", "-o",
+                                          os.path.join(self.tmp.name, "out.docx")], self.socket_path)
+            self.assertEqual(code, 0)
+            return stdout.getvalue()
+
+        with mock.patch.object(formatter, "rules", RuleRegistry(config_dir)):
+            self.serve()
+            self.assertIn("1 preamb phrases loaded", run())
+            preambs.write_text('{"preambs_phrases": ["noting", "recalling"]}', encoding="utf-8")
+            self.assertIn("2 preamb phrases loaded", run())
+
+    def test_socket_per_checkout(self):
+        with mock.patch.dict(os.environ, {"XDG_RUNTIME_DIR": self.tmp.name}):
+            os.environ.pop("RESO_DAEMON_SOCKET", None)
+            here = daemon.default_socket_path()
+            with mock.patch.object(daemon, "ROOT", "/elsewhere/resoformatter"):
+                self.assertNotEqual(daemon.default_socket_path(), here)
+            os.environ["RESO_DAEMON_SOCKET"] = self.socket_path
+            self.assertEqual(daemon.default_socket_path(), self.socket_path)
+
+    def test_private_socket_directory(self):
+        with mock.patch.dict(os.environ), mock.patch.object(tempfile, "tempdir", self.tmp.name):
+            os.environ.pop("RESO_DAEMON_SOCKET", None)
+            os.environ.pop("XDG_RUNTIME_DIR", None)
+            path = daemon.default_socket_path()
+            directory = os.path.dirname(path)
+            self.assertEqual(os.path.dirname(directory), self.tmp.name)
+            self.assertEqual(os.stat(directory).st_mode & 0o777, 0o700)
+            # one another user could have made (or could write to) is not used
+            os.chmod(directory, 0o777)
+            with self.assertRaises(PermissionError):
+                daemon.default_socket_path()
+            self.assertIsNone(daemon.run_client(["--help"]))
+
+    @unittest.skipUnless(hasattr(os, "getuid"), "needs uids")
+    def test_socket_of_another_user(self):
+        self.serve()
+        uid = os.getuid()
+        with mock.patch.object(daemon.os, "getuid", return_value=uid + 1):
+            self.assertIsNone(daemon.run_client(["--help"], self.socket_path))
+        self.assertEqual(daemon.request({"op": "status"}, self.socket_path)["requests"], 0)
+
+    def test_other_checkout_refused(self):
+        self.serve()
+        reply = daemon.request({"op": "format", "argv": ["--help"], "cwd": os.getcwd(),
+                                "root": "/elsewhere/resoformatter"}, self.socket_path)
+        self.assertEqual(reply, {"wrong_checkout": True, "root": daemon.ROOT})
+        self.assertEqual(daemon.request({"op": "status"}, self.socket_path)["requests"], 0)
+
+    def test_usage_errors_come_back(self):
+        self.serve()
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            self.assertEqual(daemon.run_client(["--no-such-option"], self.socket_path), 2)
+        self.assertIn("unrecognized arguments", stderr.getvalue())
+
+    def test_idle_timeout(self):
+        thread = self.serve(idle_timeout=0.2)
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(os.path.exists(self.socket_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,293 @@
+import glob
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from docx.oxml import parse_xml
+from docx.shared import Pt
+from lxml import etree
+
+import src.document as mydoc
+import src.main as formatter
+
+NUMBERING_XML = """
+<w:numbering xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">
+  <w:abstractNum w:abstractNumId="3">
+    <w:lvl w:ilvl="0"><w:start w:val="1"/><w:numFmt w:val="decimal"/></w:lvl>
+    <w:lvl w:ilvl="1"><w:start w:val="2"/><w:numFmt w:val="lowerLetter"/></w:lvl>
+  </w:abstractNum>
+  <w:num w:numId="7"><w:abstractNumId w:val="3"/></w:num>
+  <w:num w:numId="8">
+    <w:abstractNumId w:val="3"/>
+    <w:lvlOverride w:ilvl="0">
+      <w:startOverride w:val="5"/>
+      <w:lvl w:ilvl="0"><w:numFmt w:val="upperRoman"/></w:lvl>
+    </w:lvlOverride>
+  </w:num>
+  <w:num w:numId="7"><w:abstractNumId w:val="99"/></w:num>
+</w:numbering>
+"""
+
+
+class TestNumberingModel(unittest.TestCase):
+
+    def setUp(self):
+        self.model = mydoc.NumberingModel(parse_xml(NUMBERING_XML))
+
+    def test_lookup(self):
+        self.assertEqual(self.model.abstract_num_id(7), "3")
+        self.assertEqual(self.model.number_format("3", 1), "lowerLetter")
+        self.assertEqual(self.model.level(7, 1), mydoc.NumberingLevel("lowerLetter", 2))
+
+    def test_first_definition_wins(self):
+        self.assertEqual(self.model.abstract_num_id("7"), "3")
+
+    def test_override(self):
+        self.assertEqual(self.model.level(8, 0), mydoc.NumberingLevel("upperRoman", None))
+        self.assertEqual(self.model.start_overrides["8"], {"0": 5})
+        self.assertEqual(self.model.level(8, 1), mydoc.NumberingLevel("lowerLetter", 2))
+
+    def test_unknown(self):
+        self.assertIsNone(self.model.abstract_num_id(1))
+        self.assertIsNone(self.model.level(1, 0))
+        self.assertIsNone(mydoc.NumberingModel().level(7, 0))
+
+
+class TestInMemoryDocument(unittest.TestCase):
+
+    def test_stream_round_trip(self):
+        out = io.BytesIO()
+        written = mydoc.document(None, out)
+        written.append(mydoc.paragraph("Topic: In memory")).append(mydoc.paragraph("Urges", list_level=1))
+        written.save()
+        read = mydoc.document(io.BytesIO(out.getvalue()), io.BytesIO())
+        self.assertEqual(list(read.get_paragraphs()), [
+            mydoc.ParagraphRecord("Topic: In memory", "", None, 0),
+            mydoc.ParagraphRecord("Urges", "1.", 0, 1),
+        ])
+        self.assertEqual([record.line for record in read.get_paragraphs()], ["Topic: In memory", "1. Urges"])
+
+
+def canonical_parts(data: bytes) -> dict[str, bytes]:
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        return {name: etree.tostring(etree.fromstring(z.read(name)), method="c14n")
+                for name in ("word/document.xml", "word/numbering.xml")}
+
+
+def render_with(backend: str, paragraphs) -> bytes:
+    out = io.BytesIO()
+    d = mydoc.document(None, out, line_spacing=2, backend=backend)
+    for par in paragraphs():
+        d.append(par)
+    d.save()
+    return out.getvalue()
+
+
+def sample_paragraphs() -> list[mydoc.paragraph]:
+    runs = mydoc.paragraph(bold=True, font_color=(10, 20, 30))
+    runs.add_run("Topic: ", bold=True)
+    runs.add_run(" leading and trailing ", italic=True, underline=True, font_color=(255, 0, 0))
+    runs.add_run("tab\there\nand a break", font_size=0)
+    return [
+        runs,
+        mydoc.paragraph("plain", italic=True, underline=True, font_size=14, align="center"),
+        mydoc.paragraph("styled", style="Title", first_line_indent=0.5, right_indent=0.25, line_spacing=1.5),
+        mydoc.paragraph("normal style", style="Normal", left_indent=0.75, align=WD_PARAGRAPH_ALIGNMENT.JUSTIFY),
+        mydoc.paragraph("list item", list_level=1),
+        mydoc.paragraph("hanging", list_level=2, first_line_indent=-0.25, left_indent=1),
+        mydoc.paragraph("", list_level=3, line_spacing=Pt(20)),
+    ]
+
+
+class TestRenderBackends(unittest.TestCase):
+
+    def test_paragraph_options(self):
+        self.assertEqual(canonical_parts(render_with("lxml", sample_paragraphs)),
+                         canonical_parts(render_with("docx", sample_paragraphs)))
+
+    def test_resolutions(self):
+        for filename in sorted(glob.glob("tests/inputs/*.docx")):
+            with self.subTest(filename=filename):
+                resolution, _, _ = formatter.parseToResolution(mydoc.document(filename, io.BytesIO()))
+                rendered = {}
+                for backend in mydoc.RENDER_BACKENDS:
+                    out = io.BytesIO()
+                    formatter.writeToFile(resolution, out, backend=backend)
+                    rendered[backend] = canonical_parts(out.getvalue())
+                self.assertEqual(rendered["lxml"], rendered["docx"])
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            mydoc.document(None, io.BytesIO(), backend="xslt")
+
+
+def body_texts(d: mydoc.document) -> list[str]:
+    body = d.getdocument().element.body
+    return ["".join(body_el.xpath(".//w:t/text()")) for body_el in body.iterchildren() if not body_el.tag.endswith("sectPr")]
+
+
+class TestPositionalInsert(unittest.TestCase):
+
+    def test_matches_appending_in_order(self):
+        for backend in mydoc.RENDER_BACKENDS:
+            with self.subTest(backend=backend):
+                inserted = mydoc.document(None, io.BytesIO(), backend=backend)
+                for text in ("b", "d"):
+                    inserted.append(mydoc.paragraph(text, list_level=1))
+                inserted.append(mydoc.paragraph("a"), index=0)
+                inserted.append(mydoc.paragraph("c", list_level=2), index=-1)
+                inserted.append(mydoc.paragraph("e"), index=99)
+                extra = mydoc.paragraph("x")
+                inserted.append(extra, index=2).remove(extra)
+
+                appended = mydoc.document(None, io.BytesIO(), backend=backend)
+                for par in inserted.paragraphs:
+                    appended.append(par)
+                self.assertEqual(body_texts(inserted), ["a", "b", "c", "d", "e"])
+                self.assertEqual([str(p) for p in inserted.paragraphs], ["a", "b", "c", "d", "e"])
+                self.assertEqual(etree.tostring(inserted.getdocument().element.body, method="c14n"),
+                                 etree.tostring(appended.getdocument().element.body, method="c14n"))
+
+    def test_remove(self):
+        for backend in mydoc.RENDER_BACKENDS:
+            with self.subTest(backend=backend):
+                pars = [mydoc.paragraph(text) for text in "abcd"]
+                d = mydoc.document(None, io.BytesIO(), paragraphs=pars[:2], backend=backend)
+                d.append(pars[2]).append(pars[3])
+                d.remove(pars[0]) # never rendered
+                d.remove(pars[2])
+                self.assertEqual([str(p) for p in d.paragraphs], ["b", "d"])
+                self.assertEqual(body_texts(d), ["d"])
+                d.rebuild_document()
+                self.assertEqual(body_texts(d), ["b", "d"])
+                with self.assertRaises(ValueError):
+                    d.remove(pars[2])
+                with self.assertRaises(ValueError):
+                    d.append(pars[3])
+
+    def test_keeps_existing_content(self):
+        source = Document()
+        source.add_paragraph("existing")
+        source.add_table(rows=1, cols=1).cell(0, 0).text = "table"
+        data = io.BytesIO()
+        source.save(data)
+
+        d = mydoc.document(io.BytesIO(data.getvalue()), io.BytesIO())
+        d.append(mydoc.paragraph("second")).append(mydoc.paragraph("first"), index=0)
+        self.assertEqual(body_texts(d), ["existing", "table", "first", "second"])
+        d.rebuild_document()
+        self.assertEqual(body_texts(d), ["existing", "table", "first", "second"])
+
+    def test_constructor_paragraphs(self):
+        d = mydoc.document(None, io.BytesIO(), paragraphs=[mydoc.paragraph("a"), mydoc.paragraph("c")])
+        d.append(mydoc.paragraph("b"), index=1)
+        self.assertEqual(body_texts(d), ["a", "b", "c"])
+
+
+class TestSave(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.target = os.path.join(self.dir.name, "out.docx")
+        with open(self.target, "wb") as f:
+            f.write(b"previous")
+        self.doc = mydoc.document(None, self.target)
+        self.doc.append(mydoc.paragraph("saved"))
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_atomic_replace(self):
+        self.doc.save()
+        self.assertEqual(os.listdir(self.dir.name), ["out.docx"])
+        self.assertEqual([r.line for r in mydoc.document(self.target, io.BytesIO()).get_paragraphs()], ["saved"])
+
+    def test_retries_while_locked(self):
+        replace = os.replace
+        attempts = iter([PermissionError(13, "locked")])
+
+        def locked_once(src, dst):
+            error = next(attempts, None)
+            if error is not None:
+                raise error
+            replace(src, dst)
+
+        with mock.patch("src.document.os.replace", side_effect=locked_once) as patched:
+            self.doc.save(timeout=5)
+        self.assertEqual(patched.call_count, 2)
+        self.assertEqual(os.listdir(self.dir.name), ["out.docx"])
+
+    def test_timeout(self):
+        with mock.patch("src.document.os.replace", side_effect=PermissionError(13, "locked")):
+            with self.assertRaises(mydoc.SaveTimeoutError) as cm:
+                self.doc.save(timeout=0.2)
+        self.assertIsInstance(cm.exception, TimeoutError)
+        self.assertEqual(cm.exception.filename, self.target)
+        # the target is untouched and the temporary file is cleaned up
+        self.assertEqual(os.listdir(self.dir.name), ["out.docx"])
+        with open(self.target, "rb") as f:
+            self.assertEqual(f.read(), b"previous")
+
+    def test_stream(self):
+        out = io.BytesIO()
+        self.doc.save(out)
+        self.assertEqual([r.line for r in mydoc.document(io.BytesIO(out.getvalue()), io.BytesIO()).get_paragraphs()], ["saved"])
+
+
+class TestSkeleton(unittest.TestCase):
+
+    def test_copies_are_independent(self):
+        first = mydoc.document(None, io.BytesIO(), line_spacing=2)
+        second = mydoc.document(None, io.BytesIO(), line_spacing=2)
+        first.append(mydoc.paragraph("only in the first", list_level=1))
+        # the styles tree is shared, not copied, while only the renderer uses it
+        self.assertIs(first._doc.part._styles_part.element, second._doc.part._styles_part.element)
+        self.assertEqual(body_texts(first), ["only in the first"])
+        self.assertEqual(body_texts(second), [])
+        self.assertIsNot(first.getdocument().part.numbering_part.element,
+                         second.getdocument().part.numbering_part.element)
+        self.assertIsNot(first.getdocument().part._styles_part.element, second.getdocument().part._styles_part.element)
+
+    def test_style_changes_stay_in_their_document(self):
+        changed = mydoc.document(None, io.BytesIO(), line_spacing=2)
+        styles = changed.getdocument().styles
+        styles["Normal"].font.size = Pt(30)
+        styles.add_style("Only Here", WD_STYLE_TYPE.PARAGRAPH)
+        changed.append(mydoc.paragraph("changed"))
+        changed.save()
+        self.assertIn(b"Only Here", zipfile.ZipFile(changed.outputfile).read("word/styles.xml"))
+
+        for backend in mydoc.RENDER_BACKENDS:
+            with self.subTest(backend=backend):
+                later = mydoc.document(None, io.BytesIO(), line_spacing=2, backend=backend)
+                later.append(mydoc.paragraph("later"))
+                later.save()
+                self.assertNotIn(b"Only Here", zipfile.ZipFile(later.outputfile).read("word/styles.xml"))
+                self.assertEqual(later.getdocument().styles["Normal"].font.size, Pt(12))
+
+    def test_numbering_defined_once(self):
+        data = render_with("lxml", sample_paragraphs)
+        numbering = etree.fromstring(canonical_parts(data)["word/numbering.xml"])
+        ns = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
+        num_ids = numbering.xpath("//w:num/@w:numId", namespaces=ns)
+        self.assertEqual(len(num_ids), len(set(num_ids)))
+        used = etree.fromstring(canonical_parts(data)["word/document.xml"]).xpath("//w:numId/@w:val", namespaces=ns)
+        self.assertEqual(set(used), {num_ids[-1]})
+        # a second document gets the same definitions
+        self.assertEqual(canonical_parts(render_with("lxml", sample_paragraphs)), canonical_parts(data))
+
+    def test_style_settings(self):
+        normal = mydoc.document(None, io.BytesIO(), font="Arial", fontsize=11, line_spacing=1.5).getdocument().styles["Normal"]
+        self.assertEqual((normal.font.name, normal.font.size, normal.paragraph_format.line_spacing), ("Arial", Pt(11), 1.5))
+        normal = mydoc.document(None, io.BytesIO(), line_spacing=2).getdocument().styles["Normal"]
+        self.assertEqual((normal.font.name, normal.font.size, normal.paragraph_format.line_spacing), ("Times New Roman", Pt(12), 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
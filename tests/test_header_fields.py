@@ -0,0 +1,29 @@
+import unittest
+
+import src.main as formatter
+
+
+class TestMatchHeaderField(unittest.TestCase):
+
+    def test_fields(self):
+        self.assertEqual(formatter.match_header_field("Committee: General Assembly"), ("committee", "General Assembly"))
+        self.assertEqual(formatter.match_header_field("Main Submitter: Germany"), ("mainSubmitter", "Germany"))
+        self.assertEqual(formatter.match_header_field("Co-Submitters: France, Italy"), ("coSubmitters", "France, Italy"))
+        self.assertEqual(formatter.match_header_field("TOPIC - Climate change"), ("topic", "Climate change"))
+
+    def test_not_a_header(self):
+        self.assertIsNone(formatter.match_header_field("Noting with concern the rise in emissions,"))
+
+    def test_leftmost_label_wins(self):
+        # "submitted by" inside "co-submitted by" must not be read as the main submitter
+        self.assertEqual(formatter.match_header_field("Co-submitted by: France"), ("coSubmitters", "France"))
+        self.assertEqual(formatter.match_header_field("Topic: Reform of the committee system"),
+                         ("topic", "Reform of the committee system"))
+
+    def test_only_pending_fields_are_scanned(self):
+        self.assertIsNone(formatter.match_header_field("Committee: General Assembly", ("topic",)))
+        self.assertIsNone(formatter.match_header_field("Committee: General Assembly", ()))
+
+
+if __name__ == '__main__':
+    unittest.main()
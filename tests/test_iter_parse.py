@@ -0,0 +1,139 @@
+import glob
+import io
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import unittest
+
+import src.document as mydoc
+import src.main as formatter
+from benchmarks.synth import SynthOptions, generate_bytes
+
+
+def build_document() -> mydoc.document:
+    out = io.BytesIO()
+    written = mydoc.document(None, out)
+    for text in ("Committee: General Assembly", "Main Submitter: Germany", "Co-Submitters: France, Japan",
+                 "Topic: Streaming", "The General Assembly,", "Recalling its previous resolutions,"):
+        written.append(mydoc.paragraph(text))
+    written.append(mydoc.paragraph("Urges member states to act:", list_level=1))
+    written.append(mydoc.paragraph("quickly,", list_level=2))
+    written.append(mydoc.paragraph("together;", list_level=2))
+    written.append(mydoc.paragraph("Requests a report.", list_level=1))
+    written.save()
+    return mydoc.document(io.BytesIO(out.getvalue()), io.BytesIO())
+
+
+class CountingDocument:
+    """Wraps a document and counts the paragraphs the parser actually pulled"""
+
+    def __init__(self, document: mydoc.document) -> None:
+        self.document = document
+        self.read = 0
+
+    def get_paragraphs(self):
+        for record in self.document.get_paragraphs():
+            self.read += 1
+            yield record
+
+
+class TestIterParse(unittest.TestCase):
+
+    def test_events(self):
+        events = list(formatter.iterParse(build_document()))
+        self.assertEqual([e.kind for e in events],
+                         ["committee", "mainSubmitter", "coSubmitters", "topic", "preamb", "clause", "clause"])
+        first = events[5]
+        self.assertEqual((first.value.verb, len(first.value.listsubclauses)), ("Urges", 2))
+        self.assertEqual((first.paragraph.label, first.paragraph.level), ("1.", 0))
+
+    def test_stop_after_header(self):
+        counting = CountingDocument(build_document())
+        header = list(itertools.takewhile(lambda e: e.kind in formatter.HEADER_FIELDS, formatter.iterParse(counting)))
+        self.assertEqual(dict((e.kind, e.value) for e in header)["topic"], "Streaming")
+        # the header block, the intro line and the first preamb that ended the block; no clause was read
+        self.assertEqual(counting.read, 6)
+
+    def test_clauses_are_complete_when_yielded(self):
+        for filename in sorted(glob.glob("tests/inputs/*.docx")):
+            with self.subTest(filename=filename):
+                yielded = [(e.value, len(e.value.listsubclauses), e.value.text)
+                           for e in formatter.iterParse(mydoc.document(filename, io.BytesIO())) if e.kind == "clause"]
+                resolution, _, _ = formatter.parseToResolution(mydoc.document(filename, io.BytesIO()))
+                self.assertEqual([(c.verb, n, text) for c, n, text in yielded],
+                                 [(c.verb, len(c.listsubclauses), c.text) for c in resolution.clauses])
+
+    def test_missing_fields_come_last(self):
+        out = io.BytesIO()
+        written = mydoc.document(None, out)
+        written.append(mydoc.paragraph("Topic: Only a topic"))
+        written.save()
+        events = list(formatter.iterParse(mydoc.document(io.BytesIO(out.getvalue()), io.BytesIO())))
+        self.assertEqual([e.kind for e in events], ["topic", "error", "error"])
+        self.assertEqual([str(e.value) for e in events[1:]],
+                         ["LINE -1: Missing required field: committee", "LINE -1: Missing required field: mainSubmitter"])
+        self.assertIsNone(events[-1].paragraph)
+
+
+class TestClassifyCache(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = formatter.classify_cache
+        formatter.classify_cache = formatter.LRUCache(1024, 1024 * 1024)
+
+    def tearDown(self):
+        formatter.classify_cache = self.saved
+
+    def test_second_parse_hits(self):
+        first, _, _ = formatter.parseToResolution(build_document())
+        misses = formatter.classify_cache.misses
+        second, _, _ = formatter.parseToResolution(build_document())
+        self.assertEqual(formatter.classify_cache.misses, misses)
+        self.assertGreater(formatter.classify_cache.hits, 0)
+        self.assertEqual(str(first), str(second))
+        # only the classification is shared, each parse builds its own clauses
+        self.assertIsNot(first.clauses[0], second.clauses[0])
+        self.assertIsNot(first.clauses[0].listsubclauses[0], second.clauses[0].listsubclauses[0])
+
+    def test_keyed_by_rules(self):
+        compiled = formatter.rules.compiled
+        line = formatter.classify_line("1. Urges member states to act:", compiled)
+        self.assertEqual((line.marker, line.label, line.verb, line.text), ("clause", "1", "Urges", "member states to act"))
+        formatter.classify_line("1. Urges member states to act:", compiled._replace(fingerprint="other"))
+        self.assertEqual((formatter.classify_cache.hits, formatter.classify_cache.misses), (0, 2))
+
+    def test_bounded(self):
+        formatter.classify_cache = formatter.LRUCache(4, 1024 * 1024)
+        compiled = formatter.rules.compiled
+        for n in range(10):
+            formatter.classify_line(f"{n}. Requests a report.", compiled)
+        self.assertEqual(len(formatter.classify_cache), 4)
+
+
+class TestConcurrentParsing(unittest.TestCase):
+
+    def test_32_threads_match_serial(self):
+        sources = [open(f, "rb").read() for f in sorted(glob.glob("tests/inputs/*.docx"))]
+        sources += [generate_bytes(SynthOptions(10, 30, noise=0.3, seed=seed)) for seed in range(4)]
+
+        def parse(parser: formatter.ResolutionParser, data: bytes):
+            resolution, _, errors = parser.parseToResolution(mydoc.document(io.BytesIO(data), None))
+            return resolution.to_dict(), [str(e) for e in errors]
+
+        serial = [parse(formatter.ResolutionParser(cache=formatter.LRUCache(0, 0)), data) for data in sources]
+
+        # one shared parser with a tiny cache (constant eviction), all threads released at once
+        shared = formatter.ResolutionParser(cache=formatter.LRUCache(8, 1024 * 1024))
+        start = threading.Barrier(32)
+        def run(n: int):
+            start.wait()
+            return n % len(sources), parse(shared, sources[n % len(sources)])
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            results = list(pool.map(run, range(32)))
+        for i, result in results:
+            self.assertEqual(result, serial[i])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import threading
+import time
+import unittest
+
+from src.jobs import JobQueue, QueueFull
+
+
+def wait_for(job, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not job.finished:
+        if time.monotonic() > deadline:
+            raise TimeoutError(job.id)
+        time.sleep(0.01)
+
+
+class TestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = JobQueue(workers=1, max_finished=2)
+
+    def tearDown(self):
+        self.queue.shutdown()
+
+    def test_result_and_timings(self):
+        job = self.queue.submit(lambda a, b: a + b, 1, 2)
+        wait_for(job)
+        self.assertEqual((job.status, job.result), ("done", 3))
+        timings = job.timings()
+        self.assertGreaterEqual(timings["total"], timings["running"])
+
+    def test_failure_is_recorded(self):
+        def boom():
+            raise ValueError("bad document")
+        job = self.queue.submit(boom)
+        wait_for(job)
+        self.assertEqual((job.status, job.error), ("failed", "bad document"))
+
+    def test_queue_depth_is_bounded_by_workers(self):
+        gate = threading.Event()
+        first = self.queue.submit(gate.wait)
+        while first.status == "queued":
+            time.sleep(0.01)
+        second = self.queue.submit(lambda: None)
+        self.assertEqual(second.status, "queued")
+        self.assertEqual(self.queue.queue_depth(), 1)
+        gate.set()
+        wait_for(first)
+        wait_for(second)
+        self.assertEqual(self.queue.queue_depth(), 0)
+
+    def test_bounded_queue(self):
+        queue = JobQueue(workers=1, max_queued=1)
+        self.addCleanup(queue.shutdown)
+        gate = threading.Event()
+        running = queue.submit(gate.wait)
+        while running.status == "queued":
+            time.sleep(0.01)
+        waiting = queue.submit(lambda: None)
+        with self.assertRaises(QueueFull):
+            queue.submit(lambda: None)
+        self.assertEqual(queue.stats()["queued"], 1)
+        gate.set()
+        wait_for(running)
+        wait_for(waiting)
+        wait_for(queue.submit(lambda: None))
+        self.assertGreater(queue.estimated_wait(), 0)
+
+    def test_old_finished_jobs_are_evicted(self):
+        jobs = [self.queue.submit(lambda: None) for _ in range(4)]
+        for job in jobs:
+            wait_for(job)
+        self.assertIsNone(self.queue.get(jobs[0].id))
+        self.assertIsNotNone(self.queue.get(jobs[-1].id))
+        self.assertEqual(self.queue.stats()["done"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+import glob
+import json
+import random
+import re
+import unittest
+
+import src.document as mydoc
+from src.utils.phrase_matcher import PhraseTrie, PhraseAutomaton, PhraseSuffixIndex
+
+with open("src/config/preambs/config.json", "r", encoding="utf-8") as f:
+    PREAMB_PHRASES: list[str] = json.load(f)["preambs_phrases"]
+with open("src/config/operationals/config.json", "r", encoding="utf-8") as f:
+    _operationals_config = json.load(f)
+    OPERATIONALS_PHRASES: list[str] = _operationals_config["operationals_phrases"]
+    LIST_PHRASES: list[str] = _operationals_config["list_phrases"]
+
+
+# the per-phrase regex loop the trie replaces
+def regex_preamb_match(text: str, phrases: list[str]) -> tuple[str, str] | None:
+    for phrase in sorted(set(phrases), key=len, reverse=True):
+        m = re.match(rf'^\s*[\(\["\']*\s*{re.escape(phrase)}\b[ ,]*(.*)$', text, flags=re.IGNORECASE)
+        if m:
+            return phrase, m.group(1) or ""
+    return None
+
+
+# the two-pass regex search the automaton replaces
+def regex_operational_search(text: str, phrases: list[str]) -> tuple[int, int, bool] | None:
+    sorted_phrases = sorted(set(phrases), key=len, reverse=True)
+    for ph in sorted_phrases:
+        m = re.search(rf'^\s*[\(\["\']*\s*({re.escape(ph)})\b', text, flags=re.IGNORECASE)
+        if m:
+            return (m.start(1), m.end(1), True)
+    # the old loop left equal-length phrases in set order; take the earliest of them
+    found: tuple[int, int] | None = None
+    for ph in sorted_phrases:
+        if found is not None and len(ph) < found[1] - found[0]:
+            break
+        m = re.search(rf'\b({re.escape(ph)})\b', text, flags=re.IGNORECASE)
+        if m:
+            prefix = text[:m.start(1)]
+            if re.search(r'^\s*$', prefix) or not re.search(r'[\dA-Za-z\)\.]\s*$', prefix):
+                if found is None or m.start(1) < found[0]:
+                    found = (m.start(1), m.end(1))
+    return None if found is None else (found[0], found[1], False)
+
+
+# the per-phrase regex search the suffix index replaces
+def regex_ends_with(text: str, phrases: list[str]) -> bool:
+    return any(re.search(rf'(?i)\b{re.escape(ph)}[ \t\r\n]*[,:;.\-–—]*$', text) for ph in phrases)
+
+
+def input_lines() -> list[str]:
+    lines = []
+    for filename in sorted(glob.glob("tests/inputs/*.docx")):
+        lines.extend(record.line for record in mydoc.document(filename, filename).get_paragraphs())
+    return lines
+
+
+class TestPhraseTrie(unittest.TestCase):
+
+    def setUp(self):
+        self.trie = PhraseTrie(PREAMB_PHRASES)
+
+    def test_longest_phrase_wins(self):
+        self.assertEqual(self.trie.match("Deeply concerned by the rise"), ("deeply concerned", "by the rise"))
+        self.assertEqual(self.trie.match("Alarmed by the rise"), ("alarmed by", "the rise"))
+
+    def test_case_and_leading_punctuation(self):
+        self.assertEqual(self.trie.match('("NOTING, further that'), ("noting", "further that"))
+
+    def test_word_boundary(self):
+        self.assertIsNone(self.trie.match("Notingly enough"))
+        self.assertEqual(self.trie.match("Noting"), ("noting", ""))
+
+    def test_no_match(self):
+        self.assertIsNone(self.trie.match("1. Urges all member states"))
+        self.assertIsNone(self.trie.match(""))
+
+    def test_same_as_regex_on_inputs(self):
+        for line in input_lines():
+            with self.subTest(line=line):
+                self.assertEqual(self.trie.match(line.strip()), regex_preamb_match(line.strip(), PREAMB_PHRASES))
+
+    def test_same_as_regex_on_noise(self):
+        rng = random.Random(0)
+        words = PREAMB_PHRASES + ["the", "of", "states", "Noting", "further", "reminding", "x", "(", '"', ",", "_", "1."]
+        for _ in range(2000):
+            line = " ".join(rng.choice(words) for _ in range(rng.randint(1, 6)))
+            if rng.random() < 0.3:
+                line = line.upper()
+            with self.subTest(line=line):
+                self.assertEqual(self.trie.match(line), regex_preamb_match(line, PREAMB_PHRASES))
+
+
+class TestPhraseAutomaton(unittest.TestCase):
+
+    def setUp(self):
+        self.automaton = PhraseAutomaton(OPERATIONALS_PHRASES)
+
+    def test_phrase_at_start(self):
+        text = "Strongly encourages all member states"
+        self.assertEqual(self.automaton.search(text), (0, len("Strongly encourages"), True))
+
+    def test_phrase_later_in_line(self):
+        text = "All member states, urges to act"
+        start = text.index("urges")
+        self.assertEqual(self.automaton.search(text), (start, start + len("urges"), False))
+
+    def test_phrase_after_word_is_ignored(self):
+        self.assertIsNone(self.automaton.search("The council urges"))
+
+    def test_finditer_reports_overlapping_phrases(self):
+        phrases = {phrase for _, _, phrase in self.automaton.finditer("Also calls for action")}
+        self.assertTrue({"also calls for", "calls", "calls for"} <= phrases)
+
+    def test_same_as_regex_on_inputs(self):
+        for line in input_lines():
+            # clause bodies are searched after the number is stripped
+            for text in (line, re.sub(r'^\s*(\d+|[A-Za-z]|[ivxIVX]+)\s*[\.\)]\s*', '', line)):
+                with self.subTest(text=text):
+                    self.assertEqual(self.automaton.search(text), regex_operational_search(text, OPERATIONALS_PHRASES))
+
+    def test_same_as_regex_on_noise(self):
+        rng = random.Random(0)
+        words = OPERATIONALS_PHRASES + ["the", "of", "states", "1.", "a)", "(", '"', ",", ";", "-", "x", "_"]
+        for _ in range(2000):
+            line = " ".join(rng.choice(words) for _ in range(rng.randint(1, 8)))
+            if rng.random() < 0.3:
+                line = line.title()
+            with self.subTest(line=line):
+                self.assertEqual(self.automaton.search(line), regex_operational_search(line, OPERATIONALS_PHRASES))
+
+
+class TestPhraseSuffixIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = PhraseSuffixIndex(LIST_PHRASES, trailing=",:;.-–—")
+
+    def test_longest_phrase(self):
+        self.assertEqual(self.index.endswith("measures including but not limited to:"), "including but not limited to")
+        self.assertEqual(self.index.endswith("Including,\n"), "including")
+
+    def test_word_boundary(self):
+        self.assertIsNone(self.index.endswith("a new toolkit"))  # "kit" != "to"
+        self.assertIsNone(self.index.endswith("measures like lighting"))
+        self.assertIsNone(self.index.endswith(""))
+
+    def test_same_as_regex_on_noise(self):
+        rng = random.Random(0)
+        words = LIST_PHRASES + ["states", "into", "buy", "x", ",", ";", ":", "-", "—", " ", "\n"]
+        for _ in range(3000):
+            text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 6)))
+            text += "".join(rng.choice(" ,:;.\n\t") for _ in range(rng.randint(0, 3)))
+            if rng.random() < 0.3:
+                text = text.upper()
+            with self.subTest(text=text):
+                self.assertEqual(self.index.endswith(text) is not None, regex_ends_with(text, LIST_PHRASES))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import io
+import time
+import unittest
+
+import src.document as mydoc
+import src.main as formatter
+from src import profiling
+
+
+class TestSpans(unittest.TestCase):
+
+    def test_disabled_is_shared_noop(self):
+        self.assertIs(profiling.span("load"), profiling.span("render"))
+        with profiling.span("load"):
+            pass
+
+    def test_nested_spans_count_self_time(self):
+        with profiling.recording() as timings:
+            with profiling.span("outer"):
+                time.sleep(0.02)
+                with profiling.span("inner"):
+                    time.sleep(0.02)
+        self.assertGreaterEqual(timings.seconds["inner"], 0.02)
+        self.assertLess(timings.seconds["outer"], 0.02 + timings.seconds["inner"])
+        self.assertEqual(timings.calls, {"outer": 1, "inner": 1})
+        self.assertIsNone(profiling._recording.get())
+
+    def test_as_dict_in_pipeline_order(self):
+        timings = profiling.Timings()
+        timings.add({"custom": 1.0, "render": 2.0, "load": 3.0})
+        self.assertEqual(list(timings.as_dict()), ["load", "render", "custom"])
+        self.assertEqual(timings.total, 6.0)
+        self.assertIn("total", timings.table())
+
+
+class TestPipelineStages(unittest.TestCase):
+
+    def test_all_stages_recorded(self):
+        def run():
+            parsed, _, _ = formatter.parseToResolution(mydoc.document("tests/inputs/test_reso.docx", io.BytesIO()))
+            formatter.writeToFile(parsed, io.BytesIO())
+            return parsed
+
+        parsed, stages = profiling.timed(run)
+        self.assertEqual(parsed.committee, formatter.parseToResolution(
+            mydoc.document("tests/inputs/test_reso.docx", io.BytesIO()))[0].committee)
+        self.assertEqual(list(stages), list(profiling.STAGES))
+        self.assertTrue(all(seconds >= 0 for seconds in stages.values()))
+
+    def test_iter_parse_stops_early_inside_recording(self):
+        with profiling.recording() as timings:
+            events = formatter.iterParse(mydoc.document("tests/inputs/test_reso.docx", io.BytesIO()))
+            next(events)
+            events.close()
+        self.assertEqual(timings._stack, [])
+        self.assertIn("classify lines", timings.seconds)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import copy
+import glob
+import io
+import unittest
+
+from docx import Document
+from docx.enum.text import WD_BREAK
+from docx.opc.exceptions import PackageNotFoundError
+from docx.oxml import parse_xml
+
+import src.document as mydoc
+import src.main as formatter
+from benchmarks.synth import SynthOptions, generate_bytes
+from src.reader import DocxReader, read_paragraphs
+
+
+def with_python_docx(data: bytes) -> list[mydoc.ParagraphRecord]:
+    return list(mydoc.document(io.BytesIO(data), io.BytesIO()).get_paragraphs())
+
+
+def awkward_document() -> bytes:
+    """Runs, breaks, tabs, a hyperlink, a table and empty paragraphs, next to a numbered list"""
+    out = io.BytesIO()
+    written = mydoc.document(None, out)
+    written.append(mydoc.paragraph("Topic: Awkward")).append(mydoc.paragraph("Urges", list_level=1))
+    written.append(mydoc.paragraph("Sub", list_level=2)).append(mydoc.paragraph("Calls", list_level=1))
+    written.save()
+
+    d = Document(io.BytesIO(out.getvalue()))
+    d.add_paragraph("")
+    p = d.add_paragraph("split ")
+    p.add_run("across\truns").add_break()
+    p.add_run("after a line break").add_break(WD_BREAK.PAGE)
+    p.add_run(" after a page break")
+    table = d.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "in a table"
+    link = d.add_paragraph("see ")
+    link._p.append(parse_xml(
+        '<w:hyperlink xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        '<w:r><w:t>the link</w:t></w:r><w:r><w:noBreakHyphen/><w:t>text</w:t></w:r></w:hyperlink>'))
+    d.add_paragraph("   ")
+    d.add_paragraph("Requests")._p.get_or_add_pPr().append(copy.deepcopy(d.paragraphs[1]._p.pPr.numPr))
+    data = io.BytesIO()
+    d.save(data)
+    return data.getvalue()
+
+
+class TestDocxReader(unittest.TestCase):
+
+    def assertSameRecords(self, data: bytes):
+        expected = with_python_docx(data)
+        self.assertTrue(expected)
+        self.assertEqual(list(read_paragraphs(io.BytesIO(data))), expected)
+
+    def test_inputs(self):
+        for filename in sorted(glob.glob("tests/inputs/*.docx")):
+            with self.subTest(filename=filename), open(filename, "rb") as f:
+                self.assertSameRecords(f.read())
+
+    def test_synth(self):
+        for seed in range(3):
+            with self.subTest(seed=seed):
+                self.assertSameRecords(generate_bytes(SynthOptions(clauses=20, noise=0.5, seed=seed)))
+
+    def test_awkward_content(self):
+        data = awkward_document()
+        self.assertSameRecords(data)
+        lines = [record.line for record in read_paragraphs(io.BytesIO(data))]
+        self.assertIn("split across\truns\nafter a line break after a page break", lines)
+        self.assertIn("see the link-text", lines)
+        self.assertNotIn("in a table", lines)
+        self.assertEqual(lines[-1], "3. Requests")
+
+    def test_parses_the_same(self):
+        with open("tests/inputs/test_reso.docx", "rb") as f:
+            data = f.read()
+        expected, _, expected_errors = formatter.parseToResolution(mydoc.document(io.BytesIO(data), io.BytesIO()))
+        with DocxReader(io.BytesIO(data)) as reader:
+            parsed, _, errors = formatter.parseToResolution(reader)
+        self.assertEqual(parsed.to_bytes(), expected.to_bytes())
+        self.assertEqual([str(e) for e in errors], [str(e) for e in expected_errors])
+
+    def test_not_a_package(self):
+        for source in ("tests/inputs/no_such_file.docx", "tests/inputs", io.BytesIO(b"not a zip")):
+            with self.subTest(source=source), self.assertRaises(PackageNotFoundError):
+                DocxReader(source)
+
+
+if __name__ == '__main__':
+    unittest.main()
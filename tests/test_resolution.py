@@ -0,0 +1,63 @@
+import io
+import json
+import pickle
+import unittest
+
+import src.document as mydoc
+import src.main as formatter
+from src.core.resolution import Resolution, preamb, clause, subclause, subsubclause
+
+
+def sample() -> Resolution:
+    reso = Resolution("General Assembly", "Germany", ["France", "Japan"], "Encodings ✓")
+    reso.preambs = [preamb("recalling", "its resolutions"), preamb("noting", "")]
+    first = clause(1, "Urges", "member states to act:")
+    sub = subclause(1, "quickly")
+    sub.append(subsubclause(1, "now"))
+    first.append(sub)
+    first.append(subclause(2, "together"))
+    reso.clauses = [first, clause(-2, "", "with an odd number")]
+    return reso
+
+
+class TestResolutionModel(unittest.TestCase):
+
+    def test_slotted(self):
+        for obj in (sample(), preamb(), clause(1), subclause(1), subsubclause(1)):
+            with self.subTest(type=type(obj).__name__):
+                self.assertFalse(hasattr(obj, "__dict__"))
+                with self.assertRaises(AttributeError):
+                    obj.unknown = 1 # type: ignore
+
+    def test_dict_round_trip(self):
+        reso = sample()
+        d = json.loads(json.dumps(reso.to_dict()))
+        self.assertEqual(Resolution.from_dict(d).to_dict(), reso.to_dict())
+        # texts are kept as they are, __init__ doesn't add another trailing comma
+        self.assertEqual(Resolution.from_dict(d).clauses[0].text, reso.clauses[0].text)
+
+    def test_bytes_round_trip(self):
+        reso = sample()
+        data = reso.to_bytes()
+        self.assertEqual(Resolution.from_bytes(data).to_dict(), reso.to_dict())
+        self.assertEqual(pickle.loads(pickle.dumps(reso)).to_dict(), reso.to_dict())
+        # repeated strings are stored once
+        self.assertEqual(data.count("France".encode()), 1)
+
+    def test_parsed_documents_round_trip(self):
+        for filename in ("tests/inputs/test_reso.docx", "tests/inputs/test_problematic.docx"):
+            with self.subTest(filename=filename):
+                reso, _, _ = formatter.parseToResolution(mydoc.document(filename, io.BytesIO()))
+                decoded = Resolution.from_bytes(reso.to_bytes())
+                self.assertEqual(str(decoded), str(reso))
+
+    def test_corrupt_input(self):
+        data = sample().to_bytes()
+        for bad in (b"", b"RESO", b"not a resolution", data[:-1], data + b"\x00", b"RESO\x09" + data[5:]):
+            with self.subTest(bad=bad[:8]):
+                with self.assertRaises(ValueError):
+                    Resolution.from_bytes(bad)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+from docx import Document
+
+import src.main as formatter
+from src import rules as rules_module
+from src.reader import DocxReader
+from src.rules import CONFIG_DIR, DEFAULT_PROFILE, FormattingOptions, ProfileRegistry, RuleRegistry
+
+
+def write_configs(config_dir: Path, preambs: list[str], operationals: list[str], lists: list[str]) -> None:
+    (config_dir / "preambs").mkdir(parents=True, exist_ok=True)
+    (config_dir / "operationals").mkdir(parents=True, exist_ok=True)
+    (config_dir / "preambs" / "config.json").write_text(json.dumps({"preambs_phrases": preambs}), encoding="utf-8")
+    (config_dir / "operationals" / "config.json").write_text(
+        json.dumps({"operationals_phrases": operationals, "list_phrases": lists}), encoding="utf-8")
+
+
+class TestRuleRegistry(unittest.TestCase):
+
+    def test_lazy_and_independent_of_cwd(self):
+        registry = RuleRegistry()
+        self.assertFalse(registry.loaded)
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as d:
+            os.chdir(d)
+            try:
+                self.assertIn("recalling", registry.preamb_phrases)
+            finally:
+                os.chdir(cwd)
+        self.assertTrue(registry.loaded)
+        self.assertEqual(registry.config_dir, CONFIG_DIR)
+
+    def test_reload_swaps_snapshot(self):
+        with tempfile.TemporaryDirectory() as d:
+            write_configs(Path(d), ["noting"], ["urges"], ["the following:"])
+            registry = RuleRegistry(d)
+            before = registry.compiled
+            self.assertEqual(before.preamb_trie.match("Noting that"), ("noting", "that"))
+
+            write_configs(Path(d), ["noting with concern"], ["urges"], ["the following:"])
+            self.assertIs(registry.compiled, before)
+            after = registry.reload()
+            self.assertEqual(after.preamb_trie.match("Noting with concern that"), ("noting with concern", "that"))
+            self.assertNotEqual(before.fingerprint, after.fingerprint)
+            self.assertIs(registry.compiled, after)
+
+    def test_main_module_attributes(self):
+        self.assertEqual(formatter.preamb_phrases, formatter.rules.preamb_phrases)
+        self.assertEqual(formatter.rules_fingerprint, formatter.rules.fingerprint)
+        with self.assertRaises(AttributeError):
+            formatter.not_a_rule
+
+
+class TestProfiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.profiles_dir = Path(self.tmp.name)
+        self.profiles = ProfileRegistry(self.profiles_dir, max_profiles=2)
+        # only the operationals: the preambs come from the default config
+        write_configs(self.profiles_dir / "sc", [], ["solemnly demands"], ["the following:"])
+        (self.profiles_dir / "sc" / "preambs" / "config.json").unlink()
+        (self.profiles_dir / "sc" / "profile.json").write_text(json.dumps(
+            {"font": "Arial", "line_spacing": 1.5, "committees": {"Security Council": "unsc"}}), encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_names(self):
+        self.assertEqual(self.profiles.names(), [DEFAULT_PROFILE, "sc"])
+        self.assertIs(self.profiles.get(None), self.profiles.default)
+        self.assertIs(self.profiles.get(DEFAULT_PROFILE), self.profiles.default)
+        for name in ("missing", "../sc", ".hidden", ""):
+            with self.subTest(name=name), self.assertRaises(KeyError):
+                self.profiles.get(name)
+
+    def test_profile_contents(self):
+        sc = self.profiles.get("sc")
+        self.assertEqual(sc.operationals_phrases, ["solemnly demands"])
+        self.assertIn("recalling", sc.preamb_phrases)
+        self.assertEqual(sc.options, FormattingOptions(font="Arial", line_spacing=1.5, committees={"security council": "unsc"}))
+        self.assertEqual(self.profiles.default.options, FormattingOptions())
+        self.assertNotEqual(sc.fingerprint, self.profiles.default.fingerprint)
+
+    def test_unknown_option(self):
+        (self.profiles_dir / "sc" / "profile.json").write_text(json.dumps({"fontsize": 11}), encoding="utf-8")
+        with self.assertRaises(ValueError):
+            self.profiles.get("sc")
+
+    def test_switching_reads_nothing(self):
+        sc = self.profiles.get("sc")
+        with mock.patch.object(rules_module, "content_hash") as hashed, \
+                mock.patch.object(rules_module, "compile_rules") as compiled:
+            for _ in range(3):
+                self.assertIs(self.profiles.get("sc"), sc)
+                self.profiles.get(None)
+        hashed.assert_not_called()
+        compiled.assert_not_called()
+
+    def test_edits_picked_up(self):
+        sc = self.profiles.get("sc")
+        self.profiles.reload("sc")
+        self.assertIs(self.profiles.get("sc"), sc) # same content, same compiled rules
+        write_configs(self.profiles_dir / "sc", ["noting"], ["urges"], ["the following:"])
+        changed = self.profiles.get("sc")
+        self.assertIsNot(changed, sc)
+        self.assertEqual(changed.preamb_phrases, ["noting"])
+        self.assertIs(self.profiles.get("sc"), changed)
+
+    def test_bounded(self):
+        for name in ("a", "b"):
+            write_configs(self.profiles_dir / name, ["noting"], ["urges"], [])
+        with contextlib.redirect_stdout(io.StringIO()): # no list phrases warning
+            first = self.profiles.get("sc")
+            self.profiles.get("a")
+            self.profiles.get("b")
+        self.assertEqual(self.profiles.stats()["entries"], 2)
+        # evicted, and edited meanwhile: compiled again, under the hash of what was compiled
+        write_configs(self.profiles_dir / "sc", ["noting"], ["urges"], ["the following:"])
+        again = self.profiles.get("sc")
+        self.assertIsNot(again, first)
+        self.assertEqual(again.preamb_phrases, ["noting"])
+        self.assertEqual(self.profiles._hashes["sc"][1],
+                         rules_module.content_hash(self.profiles_dir / "sc", self.profiles.default.config_dir))
+
+    def test_formatting_options_in_output(self):
+        with DocxReader("tests/inputs/test_reso.docx") as reader:
+            resolution, _, _ = formatter.parseToResolution(reader)
+        for backend in formatter.OUTPUT_BACKENDS:
+            with self.subTest(backend=backend):
+                out = io.BytesIO()
+                formatter.writeToFile(resolution, out, backend=backend, rules=self.profiles.get("sc"))
+                normal = Document(io.BytesIO(out.getvalue())).styles["Normal"]
+                self.assertEqual((normal.font.name, normal.paragraph_format.line_spacing), ("Arial", 1.5))
+
+    def test_cli(self):
+        with tempfile.TemporaryDirectory() as out_dir:
+            output = os.path.join(out_dir, "out.docx")
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(formatter.main(["tests/inputs/test_reso.docx", "-o", output,
+                                                 "--rules", str(self.profiles_dir / "sc")]), 0)
+            with zipfile.ZipFile(output) as z:
+                self.assertIn(b"Arial", z.read("word/styles.xml"))
+        with contextlib.redirect_stderr(io.StringIO()) as stderr, self.assertRaises(SystemExit):
+            formatter.main(["tests/inputs/test_reso.docx", "--rules", "no-such-profile"])
+        self.assertIn("unknown rule profile", stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import io
+import json
+import tempfile
+import threading
+import time
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+import server
+import src.document as mydoc
+import src.main as formatter
+from src.cache import ResultCache
+from src.jobs import JobQueue
+from src.rules import ProfileRegistry
+from tests.test_jobs import wait_for
+
+
+def upload(path: str = "tests/inputs/test_reso.docx", name: str = "reso.docx") -> dict:
+    with open(path, "rb") as f:
+        return {"file": (io.BytesIO(f.read()), name)}
+
+
+class ServerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.profiles_dir = Path(self.tmp.name)
+        (self.profiles_dir / "arial").mkdir()
+        (self.profiles_dir / "arial" / "profile.json").write_text(
+            json.dumps({"font": "Arial", "committees": {"united nations general assembly (unga)": "unga"}}),
+            encoding="utf-8")
+        patches = [
+            mock.patch.object(server, "profiles", ProfileRegistry(self.profiles_dir, default=server.formatter.rules)),
+            mock.patch.object(server, "result_cache", ResultCache(max_entries=16)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.client = server.app.test_client()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+class TestProfiles(ServerTestCase):
+
+    def test_list(self):
+        response = self.client.get("/profiles")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {"profiles": ["default", "arial"]})
+
+    def test_unknown_profile(self):
+        for route in ("/upload", "/parse", "/jobs"):
+            with self.subTest(route=route):
+                response = self.client.post(f"{route}?profile=nope", data=upload())
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json["profiles"], ["default", "arial"])
+
+    def test_profile_per_upload(self):
+        default = self.client.post("/upload", data=upload())
+        arial = self.client.post("/upload", data={**upload(), "profile": "arial"})
+        self.assertEqual((default.status_code, arial.status_code), (200, 200))
+        # a separate cache entry, not the default profile's result
+        self.assertNotEqual(server.result_cache.key(b"", server.profiles.get("arial").fingerprint),
+                            server.result_cache.key(b"", server.profiles.get(None).fingerprint))
+        self.assertEqual((default.headers["X-Cache"], arial.headers["X-Cache"]), ("MISS", "MISS"))
+        self.assertNotEqual(default.data, arial.data)
+        with zipfile.ZipFile(io.BytesIO(arial.data)) as z:
+            self.assertIn(b"Arial", z.read("word/styles.xml"))
+        self.assertTrue(default.headers["X-Filename"].endswith("_GA"))
+        self.assertTrue(arial.headers["X-Filename"].endswith("_UNGA"))
+
+        again = self.client.post("/upload?profile=arial", data=upload())
+        self.assertEqual(again.headers["X-Cache"], "HIT")
+        self.assertEqual(again.data, arial.data)
+
+
+class TestParse(ServerTestCase):
+
+    def test_matches_the_parser(self):
+        # test_no_line_space.docx has parsing errors, test_reso.docx none
+        for path in ("tests/inputs/test_reso.docx", "tests/inputs/test_no_line_space.docx"):
+            with self.subTest(path=path):
+                response = self.client.post("/parse", data=upload(path))
+                self.assertEqual(response.status_code, 200)
+                resolution, _, errors = formatter.parseToResolution(mydoc.document(path, io.BytesIO()))
+                self.assertEqual(response.json["resolution"], json.loads(json.dumps(resolution.to_dict())))
+                self.assertEqual(response.json["errors"], server.errors_to_json(errors))
+                self.assertEqual(response.json["summary"], json.loads(json.dumps(resolution.summary())))
+                self.assertIn("load;dur=", response.headers["Server-Timing"])
+
+    def test_not_a_docx(self):
+        for data, error in (({"file": (io.BytesIO(b"plain text"), "notes.txt")}, "File type not allowed"),
+                            ({"file": (io.BytesIO(b"not a zip"), "reso.docx")}, "Invalid or unreadable"),
+                            ({}, "No file part")):
+            with self.subTest(error=error):
+                response = self.client.post("/parse", data=data)
+                self.assertEqual(response.status_code, 400)
+                self.assertTrue(response.json["error"].startswith(error))
+
+
+class TestJobs(ServerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.queue = JobQueue(workers=1, max_queued=1)
+        patch = mock.patch.object(server, "job_queue", self.queue)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.addCleanup(self.queue.shutdown)
+
+    def test_submit_status_result(self):
+        submitted = self.client.post("/jobs", data=upload())
+        self.assertEqual(submitted.status_code, 202)
+        job_id = submitted.json["id"]
+        self.assertEqual(submitted.headers["Location"], f"/jobs/{job_id}")
+        wait_for(self.queue.get(job_id))
+
+        status = self.client.get(f"/jobs/{job_id}")
+        self.assertEqual(status.status_code, 200)
+        self.assertEqual(status.json["status"], "done")
+        self.assertTrue(status.json["filename"].endswith("_GA"))
+        result = self.client.get(f"/jobs/{job_id}/result")
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(result.data, self.client.post("/upload", data=upload()).data)
+
+    def test_unknown_job(self):
+        for route in ("/jobs/nope", "/jobs/nope/result"):
+            with self.subTest(route=route):
+                response = self.client.get(route)
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json, {"error": "Unknown job"})
+
+    def test_full_queue(self):
+        gate = threading.Event()
+        self.addCleanup(gate.set)
+        running = self.queue.submit(gate.wait)
+        while running.status == "queued":
+            time.sleep(0.01)
+        self.assertEqual(self.client.post("/jobs", data=upload()).status_code, 202)
+
+        full = self.client.post("/jobs", data=upload())
+        self.assertEqual(full.status_code, 503)
+        self.assertGreaterEqual(int(full.headers["Retry-After"]), 1)
+        self.assertEqual(full.json["queue_depth"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
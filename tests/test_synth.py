@@ -0,0 +1,37 @@
+import io
+import unittest
+
+import src.document as mydoc
+import src.main as formatter
+from benchmarks.synth import SynthOptions, generate_bytes
+
+
+def parse(options: SynthOptions):
+    return formatter.parseToResolution(mydoc.document(io.BytesIO(generate_bytes(options)), io.BytesIO()))
+
+
+class TestSynth(unittest.TestCase):
+
+    def test_clean_document_parses_exactly(self):
+        options = SynthOptions(preambs=7, clauses=12, subclauses=2, subsubclauses=1, seed=3)
+        resolution, _, errors = parse(options)
+        self.assertEqual(errors, [])
+        self.assertEqual((resolution.committee, resolution.mainSubmitter), ("General Assembly", "Germany"))
+        self.assertEqual(len(resolution.preambs), options.preambs)
+        self.assertEqual([c.index for c in resolution.clauses], list(range(1, options.clauses + 1)))
+        self.assertTrue(any(c.listsubclauses for c in resolution.clauses))
+
+    def test_deterministic(self):
+        options = SynthOptions(clauses=5, noise=0.5, seed=1)
+        first, second = parse(options)[0], parse(options)[0]
+        self.assertEqual([(c.verb, c.text) for c in first.clauses], [(c.verb, c.text) for c in second.clauses])
+
+    def test_noise_keeps_clauses(self):
+        options = SynthOptions(preambs=5, clauses=30, noise=0.5, seed=2)
+        resolution, _, errors = parse(options)
+        self.assertEqual(errors, [])
+        self.assertEqual(len(resolution.clauses), options.clauses)
+
+
+if __name__ == '__main__':
+    unittest.main()
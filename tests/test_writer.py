@@ -0,0 +1,83 @@
+import glob
+import io
+import os
+import random
+import tempfile
+import unittest
+import zipfile
+
+from lxml import etree
+
+import src.document as mydoc
+import src.main as formatter
+from src.writer import write_docx
+
+
+def canonical_parts(data: bytes) -> dict[str, bytes]:
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        return {name: etree.tostring(etree.fromstring(z.read(name)), method="c14n")
+                for name in ("word/document.xml", "word/numbering.xml")}
+
+
+class Unseekable(io.RawIOBase):
+    """A write-only, non-seekable sink like a socket or an HTTP response body"""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data += b
+        return len(b)
+
+
+class TestStreamWriter(unittest.TestCase):
+
+    def test_same_document_as_lxml(self):
+        for filename in sorted(glob.glob("tests/inputs/*.docx")):
+            with self.subTest(filename=filename):
+                resolution, _, _ = formatter.parseToResolution(mydoc.document(filename, io.BytesIO()))
+                rendered = {}
+                for backend in ("lxml", "stream"):
+                    out = io.BytesIO()
+                    formatter.writeToFile(resolution, out, backend=backend)
+                    rendered[backend] = canonical_parts(out.getvalue())
+                self.assertEqual(rendered["stream"], rendered["lxml"])
+
+    def test_unseekable_output(self):
+        with open("tests/inputs/test_reso.docx", "rb") as f:
+            data = f.read()
+        resolution, _, _ = formatter.parseToResolution(mydoc.document(io.BytesIO(data), io.BytesIO()))
+        sink = Unseekable()
+        formatter.writeToFile(resolution, sink, backend="stream")
+        expected = io.BytesIO()
+        formatter.writeToFile(resolution, expected)
+        self.assertEqual(canonical_parts(bytes(sink.data)), canonical_parts(expected.getvalue()))
+
+    def test_path_output(self):
+        with tempfile.TemporaryDirectory() as directory:
+            target = os.path.join(directory, "out.docx")
+            write_docx([mydoc.paragraph("first"), mydoc.paragraph("second", list_level=1)], target)
+            self.assertEqual(os.listdir(directory), ["out.docx"])
+            self.assertEqual([r.line for r in mydoc.document(target, io.BytesIO()).get_paragraphs()],
+                             ["first", "1. second"])
+
+    def test_written_as_consumed(self):
+        rng = random.Random(0)
+        sink = Unseekable()
+        written_at: dict[int, int] = {}
+
+        def paragraphs():
+            for i in range(2000):
+                written_at[i] = len(sink.data)
+                yield mydoc.paragraph("".join(rng.choice("abcdefghij ") for _ in range(80)))
+
+        write_docx(paragraphs(), sink)
+        # most of the output went out before the last paragraph was even made
+        self.assertGreater(written_at[1999], len(sink.data) // 2)
+
+
+if __name__ == '__main__':
+    unittest.main()